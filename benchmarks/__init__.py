@@ -0,0 +1,5 @@
+import os
+
+# The benchmarks draw to an off-screen surface, so they run without a display
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
@@ -0,0 +1,51 @@
+"""
+A minimal bot for benchmarking the bot I/O: it reads every game state and answers
+with the first move that doesn't run into a wall or a trail. After MAX_MOVES moves
+in a game it stops steering, so every game ends.
+
+It asks for the "binary" protocol when the server offers it, and reads the states
+with the reference decoder of src/backend/binary_protocol.py.
+"""
+
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.backend.binary_protocol import read_message  # noqa: E402
+
+MAX_MOVES = 200
+
+# (row, col) offset of each move
+MOVES = {1: (0, -1), 2: (-1, 0), 3: (0, 1), 4: (1, 0)}
+
+
+def choose_move(state: dict) -> int:
+    board = state.get("board")
+    head = state.get("me", {}).get("head")
+    if not board or not head:
+        return 1
+
+    for move, (d_row, d_col) in MOVES.items():
+        if board[head["x"] + d_row][head["y"] + d_col] == 0:
+            return move
+    return 1
+
+
+def main() -> None:
+    moves = 0
+    while (state := read_message(sys.stdin.buffer)) is not None:
+        if state.get("type") == "hello":
+            protocol = "binary" if "binary" in state["protocols"] else "full"
+            print(json.dumps({"protocol": protocol}), flush=True)
+            continue
+        # A trail of only the head is the first tick of a new game
+        if len(state.get("me", {}).get("trail", [])) == 1:
+            moves = 0
+        moves += 1
+        print(choose_move(state) if moves <= MAX_MOVES else 0, flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+"""
+The echo bot as an in-process plugin: the same moves, chosen from a GameView
+instead of the JSON state, to measure what PluginPlayer saves over BotPlayer.
+"""
+
+from benchmarks.echo_bot import MAX_MOVES, MOVES
+
+
+class EchoPlugin:
+    def __init__(self):
+        self.moves = 0
+
+    def __call__(self, game) -> int:
+        me = game.me
+        # A trail of only the head is the first tick of a new game
+        if len(me.trail) == 1:
+            self.moves = 0
+        self.moves += 1
+        if self.moves > MAX_MOVES:
+            return 0
+
+        row, col = me.head
+        for move, (d_row, d_col) in MOVES.items():
+            if game.is_free(row + d_row, col + d_col):
+                return move
+        return 1
@@ -0,0 +1,143 @@
+import json
+from itertools import cycle
+
+from src.backend.binary_protocol import FRAME_HEADER, decode_state
+from src.backend.consts import PLAYER_1, PLAYER_2, MOVE_LEFT, MOVE_UP, MOVE_RIGHT, MOVE_DOWN
+from src.backend.GameState import GameState
+from src.backend.player import Player
+
+from benchmarks.harness import measure
+
+
+def loop_moves(width: int, height: int) -> list[int]:
+    """
+    Get the moves that go around a rectangle clockwise, starting at its top left corner.
+
+    :param width: The number of columns of the rectangle
+    :type width: int
+    :param height: The number of rows of the rectangle
+    :type height: int
+    :return: The moves of one lap
+    :rtype: list[int]
+    """
+    return (
+        [MOVE_RIGHT] * (width - 1) + [MOVE_DOWN] * (height - 1)
+        + [MOVE_LEFT] * (width - 1) + [MOVE_UP] * (height - 1)
+    )
+
+
+def endless_game(size: int) -> tuple[GameState, cycle, cycle]:
+    """
+    Create a game that never ends: each player goes around its own half of the board,
+    on a lap longer than its trail.
+
+    :param size: The size of the board, at least 8
+    :type size: int
+    :return: The game and the endless moves of player 1 and player 2
+    :rtype: tuple[GameState, cycle, cycle]
+    """
+    if size < 8:
+        raise ValueError("The board must be at least 8x8")
+
+    inner = size - 2
+    top = inner // 2
+    game = GameState(
+        size,
+        Player(PLAYER_1, size, initial_position=(1, 1)),
+        Player(PLAYER_2, size, initial_position=(1 + top, 1)),
+    )
+    return game, cycle(loop_moves(inner, top)), cycle(loop_moves(inner, inner - top))
+
+
+def bench_tick(size: int) -> float:
+    game, moves_1, moves_2 = endless_game(size)
+    return measure(lambda: game.tick(next(moves_1), next(moves_2)))
+
+
+def bench_player_move(size: int) -> float:
+    player = Player(PLAYER_1, size, initial_position=(1, 1))
+    moves = cycle(loop_moves(size - 2, size - 2))
+    return measure(lambda: player.move(next(moves)))
+
+
+def bench_serialize(size: int) -> float:
+    """
+    Serialize the state for one player and encode it with json.dumps, as it was sent to bots.
+    """
+    game, moves_1, moves_2 = endless_game(size)
+    for _ in range(size * 4):
+        game.tick(next(moves_1), next(moves_2))
+    return measure(lambda: json.dumps(game.serialize_for_player(PLAYER_1)))
+
+
+def bench_encode_tick(size: int) -> float:
+    """
+    Play a tick and encode the state for both players, as the game loop does.
+    """
+    game, moves_1, moves_2 = endless_game(size)
+
+    def tick_and_encode():
+        game.tick(next(moves_1), next(moves_2))
+        game.serialize_json_for_player(PLAYER_1)
+        game.serialize_json_for_player(PLAYER_2)
+
+    return measure(tick_and_encode)
+
+
+def bench_wire_json(size: int) -> float:
+    """
+    Play a tick, encode the state for both players as JSON and decode it as a bot would.
+    """
+    game, moves_1, moves_2 = endless_game(size)
+
+    def tick_and_round_trip():
+        game.tick(next(moves_1), next(moves_2))
+        json.loads(game.serialize_json_for_player(PLAYER_1))
+        json.loads(game.serialize_json_for_player(PLAYER_2))
+
+    return measure(tick_and_round_trip)
+
+
+def bench_wire_binary(size: int) -> float:
+    """
+    Same as bench_wire_json with the frames of the binary protocol and its reference decoder.
+    """
+    game, moves_1, moves_2 = endless_game(size)
+
+    def tick_and_round_trip():
+        game.tick(next(moves_1), next(moves_2))
+        decode_state(game.serialize_binary_for_player(PLAYER_1)[FRAME_HEADER.size:])
+        decode_state(game.serialize_binary_for_player(PLAYER_2)[FRAME_HEADER.size:])
+
+    return measure(tick_and_round_trip)
+
+
+def bench_analysis(size: int) -> float:
+    """
+    Play a tick and compute its analysis and the JSON of it, as for the bots that ask for it.
+    """
+    game, moves_1, moves_2 = endless_game(size)
+
+    def tick_and_analyze():
+        game.tick(next(moves_1), next(moves_2))
+        game.analysis().to_json()
+
+    return measure(tick_and_analyze)
+
+
+def bench_make_unmake(size: int) -> float:
+    """
+    Play a tick with make_move, read the position hash and undo it, as a search visits a node.
+    """
+    game, moves_1, moves_2 = endless_game(size)
+    for _ in range(size * 4):
+        game.tick(next(moves_1), next(moves_2))
+    move_1, move_2 = next(moves_1), next(moves_2)
+    game.position_hash
+
+    def visit():
+        game.make_move(move_1, move_2)
+        game.position_hash
+        game.unmake_move()
+
+    return measure(visit)
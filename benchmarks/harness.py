@@ -0,0 +1,78 @@
+import json
+import time
+
+
+def measure(operation, min_time: float = 0.2, repeat: int = 5) -> float:
+    """
+    Time an operation like timeit: find a number of calls that takes at least
+    min_time, time that many calls `repeat` times and keep the best run.
+
+    :param operation: The function to time, called without arguments
+    :type operation: Callable[[], object]
+    :param min_time: Minimum seconds of each run
+    :type min_time: float
+    :param repeat: Number of runs
+    :type repeat: int
+    :return: Seconds per call of the best run
+    :rtype: float
+    """
+    number = 1
+    while True:
+        elapsed = _run(operation, number)
+        if elapsed >= min_time:
+            break
+        number *= 2 if elapsed == 0 else max(2, min(10, int(min_time / elapsed) + 1))
+
+    best = elapsed
+    for _ in range(repeat - 1):
+        best = min(best, _run(operation, number))
+    return best / number
+
+
+def _run(operation, number: int) -> float:
+    start = time.perf_counter()
+    for _ in range(number):
+        operation()
+    return time.perf_counter() - start
+
+
+def load_json(path: str) -> dict:
+    with open(path, "r", encoding="utf-8") as file:
+        return json.load(file)
+
+
+def save_json(path: str, data: dict) -> None:
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(data, file, indent=2, sort_keys=True)
+        file.write("\n")
+
+
+def find_regressions(
+    results: dict[str, float],
+    thresholds: dict[str, float] | None = None,
+    baseline: dict[str, float] | None = None,
+    max_slowdown: float = 1.25
+) -> list[str]:
+    """
+    Compare benchmark results with absolute thresholds and with a previous run.
+
+    :param results: Nanoseconds per operation of each benchmark
+    :type results: dict[str, float]
+    :param thresholds: Maximum nanoseconds per operation allowed for each benchmark
+    :type thresholds: dict[str, float] | None
+    :param baseline: Nanoseconds per operation of each benchmark in a previous run
+    :type baseline: dict[str, float] | None
+    :param max_slowdown: How many times slower than the baseline a benchmark may be
+    :type max_slowdown: float
+    :return: A description of every regression, empty if there are none
+    :rtype: list[str]
+    """
+    regressions = []
+    for name, ns in results.items():
+        if thresholds and name in thresholds and ns > thresholds[name]:
+            regressions.append(f"{name}: {ns:.0f} ns/op is over the threshold of {thresholds[name]:.0f} ns/op")
+        if baseline and name in baseline and ns > baseline[name] * max_slowdown:
+            regressions.append(
+                f"{name}: {ns:.0f} ns/op is {ns / baseline[name]:.2f}x the baseline of {baseline[name]:.0f} ns/op"
+            )
+    return regressions
@@ -0,0 +1,167 @@
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import time
+from random import Random
+
+from src.backend.consts import MOVE_LEFT, MOVE_UP, MOVE_RIGHT, MOVE_DOWN
+from src.backend.GameState import GameState
+from src.backend.players.bot_player import BotPlayer, PROTOCOL_BINARY
+from src.backend.players.player_input import IPlayerType
+from src.backend.players.plugin_player import PluginPlayer
+from src.main import play
+
+ECHO_BOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "echo_bot.py")
+ECHO_PLUGIN = "benchmarks.echo_plugin:EchoPlugin"
+
+# (row, col) offset of each move
+MOVES = {MOVE_LEFT: (0, -1), MOVE_UP: (-1, 0), MOVE_RIGHT: (0, 1), MOVE_DOWN: (1, 0)}
+
+
+class StubPlayer(IPlayerType):
+    """
+    An in-process player that looks at the game directly and picks a random move
+    into a free cell, so the games last and little time is spent in the player.
+    After max_moves it stops steering and keeps going until it crashes.
+    """
+
+    def __init__(self, game: GameState, player_number: int, rng: Random, max_moves: int = 200):
+        self.game = game
+        self.player_number = player_number
+        self.rng = rng
+        self.moves_left = max_moves
+
+    async def initialize(self) -> bool:
+        return True
+
+    async def get_move(self, game_state_json: str) -> int:
+        self.moves_left -= 1
+        if self.moves_left < 0:
+            return 0  # Invalid, so the player keeps its direction
+
+        player = self.game.player(self.player_number)
+        row, col = player.head
+        board = self.game.board
+        free = [
+            move for move, (d_row, d_col) in MOVES.items()
+            if board[row + d_row][col + d_col] == 0
+        ]
+        return self.rng.choice(free) if free else MOVE_UP
+
+    async def cleanup(self) -> None:
+        pass
+
+
+class NullFrontend:
+    """
+    Stands in for Frontend so the play loop is measured without drawing.
+    """
+
+    def draw_game_board(self) -> None:
+        pass
+
+    def player_cells(self) -> dict:
+        return {}
+
+    def draw_cells(self, cells: dict) -> None:
+        pass
+
+    def update_display(self, dirty) -> None:
+        pass
+
+
+async def play_games(size: int, make_players, min_ticks: int) -> tuple[int, float]:
+    """
+    Play games with play() until at least min_ticks ticks were played.
+
+    :param make_players: Creates the two players of a game from the game and the game index
+    :type make_players: Callable[[GameState, int], tuple[IPlayerType, IPlayerType]]
+    :return: The number of ticks played and the seconds it took
+    :rtype: tuple[int, float]
+    """
+    rng = Random(size)
+    ticks = 0
+    elapsed = 0.0
+    index = 0
+    with contextlib.redirect_stdout(io.StringIO()):
+        while ticks < min_ticks:
+            game = GameState(size, rng=rng)
+            players = list(make_players(game, index))
+            start = time.perf_counter()
+            await play(game, NullFrontend(), players, True, tick_rate=0)
+            elapsed += time.perf_counter() - start
+            ticks += game.tick_count
+            index += 1
+
+    return ticks, elapsed
+
+
+def bench_play_stub(size: int) -> float:
+    """
+    Seconds per tick of play() with two in-process stub players.
+    """
+    def make_players(game, index):
+        rng = Random(index)
+        return StubPlayer(game, 1, rng), StubPlayer(game, 2, rng)
+
+    ticks, elapsed = asyncio.run(play_games(size, make_players, 5000))
+    return elapsed / ticks
+
+
+def bench_play_echo(size: int, offered_protocols: list[str] | None = None) -> float:
+    """
+    Seconds per tick of play() with two echo bots running as subprocesses, started once
+    and reused for every game. Their start-up isn't measured.
+    """
+    async def run() -> tuple[int, float]:
+        bots = [
+            BotPlayer(ECHO_BOT, offered_protocols, base_command=[sys.executable, "-u"])
+            for _ in range(2)
+        ]
+        with contextlib.redirect_stdout(io.StringIO()):
+            if not all(await asyncio.gather(*(bot.initialize() for bot in bots))):
+                raise RuntimeError("The echo bots didn't start")
+        try:
+            return await play_games(size, lambda game, index: bots, 2000)
+        finally:
+            with contextlib.redirect_stdout(io.StringIO()):
+                await asyncio.gather(*(bot.cleanup() for bot in bots))
+
+    ticks, elapsed = asyncio.run(run())
+    return elapsed / ticks
+
+
+def bench_play_echo_binary(size: int) -> float:
+    """
+    Same as bench_play_echo, with the bots agreeing to the binary protocol.
+    """
+    return bench_play_echo(size, [PROTOCOL_BINARY])
+
+
+def bench_play_plugin(size: int, isolated: bool = False) -> float:
+    """
+    Seconds per tick of play() with the echo bot as two in-process plugins,
+    to compare with bench_play_echo.
+    """
+    async def run() -> tuple[int, float]:
+        bots = [PluginPlayer(ECHO_PLUGIN, isolated) for _ in range(2)]
+        with contextlib.redirect_stdout(io.StringIO()):
+            if not all(await asyncio.gather(*(bot.initialize() for bot in bots))):
+                raise RuntimeError("The echo plugins didn't load")
+        try:
+            return await play_games(size, lambda game, index: bots, 5000)
+        finally:
+            with contextlib.redirect_stdout(io.StringIO()):
+                await asyncio.gather(*(bot.cleanup() for bot in bots))
+
+    ticks, elapsed = asyncio.run(run())
+    return elapsed / ticks
+
+
+def bench_play_plugin_thread(size: int) -> float:
+    """
+    Seconds per tick of play() with the echo plugins each in a worker thread.
+    """
+    return bench_play_plugin(size, isolated=True)
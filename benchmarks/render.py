@@ -0,0 +1,21 @@
+from src.frontend.Frontend import Frontend
+
+from benchmarks.engine import endless_game
+from benchmarks.harness import measure
+
+CELL_SIZE = 30
+
+
+def bench_draw_game_board(size: int) -> float:
+    """
+    Play a tick and draw the board, as the game loop does. The tick is a small
+    part of the time, see bench_tick.
+    """
+    game, moves_1, moves_2 = endless_game(size)
+    frontend = Frontend(game, CELL_SIZE)
+
+    def tick_and_draw():
+        game.tick(next(moves_1), next(moves_2))
+        frontend.draw_game_board()
+
+    return measure(tick_and_draw)
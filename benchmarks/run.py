@@ -0,0 +1,106 @@
+import argparse
+import os
+import platform
+import sys
+import time
+
+from benchmarks.engine import (
+    bench_tick, bench_player_move, bench_serialize, bench_encode_tick, bench_wire_json, bench_wire_binary,
+    bench_make_unmake, bench_analysis,
+)
+from benchmarks.harness import find_regressions, load_json, save_json
+from benchmarks.play import (
+    bench_play_stub, bench_play_echo, bench_play_echo_binary, bench_play_plugin, bench_play_plugin_thread,
+)
+from benchmarks.render import bench_draw_game_board
+
+THRESHOLDS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "thresholds.json")
+
+# Each benchmark returns the seconds per operation for a board size
+BENCHMARKS = {
+    "tick": bench_tick,
+    "player_move": bench_player_move,
+    "serialize_json": bench_serialize,
+    "encode_tick": bench_encode_tick,
+    "wire_json": bench_wire_json,
+    "wire_binary": bench_wire_binary,
+    "make_unmake": bench_make_unmake,
+    "analysis": bench_analysis,
+    "play_stub": bench_play_stub,
+    "play_echo": bench_play_echo,
+    "play_echo_binary": bench_play_echo_binary,
+    "play_plugin": bench_play_plugin,
+    "play_plugin_thread": bench_play_plugin_thread,
+    "draw_game_board": bench_draw_game_board,
+}
+
+DEFAULT_SIZES = [8, 16, 32, 64]
+
+
+def get_bench_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run the HackaTron benchmarks.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="Board sizes to run every benchmark with (at least 8)")
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS),
+                        help="Run only these benchmarks")
+    parser.add_argument("--output", default=None,
+                        help="Write the results to this JSON file")
+    parser.add_argument("--thresholds", default=THRESHOLDS_FILE,
+                        help="JSON file with the maximum ns/op of each benchmark")
+    parser.add_argument("--baseline", default=None,
+                        help="Results of a previous run to compare with")
+    parser.add_argument("--max-slowdown", type=float, default=1.25,
+                        help="How many times slower than the baseline a benchmark may be")
+    parser.add_argument("--update-thresholds", type=float, default=None, metavar="FACTOR",
+                        help="Write these results times FACTOR as the new thresholds")
+    return parser.parse_args()
+
+
+def run(names: list[str], sizes: list[int]) -> dict[str, float]:
+    """
+    Run the benchmarks for every board size.
+
+    :return: The nanoseconds per operation of each benchmark, keyed "<name>/<size>"
+    :rtype: dict[str, float]
+    """
+    results = {}
+    for name in names:
+        for size in sizes:
+            key = f"{name}/{size}"
+            results[key] = BENCHMARKS[name](size) * 1e9
+            print(f"{key:<24} {results[key]:>14,.0f} ns/op", flush=True)
+    return results
+
+
+def main() -> None:
+    args = get_bench_args()
+    names = args.only or list(BENCHMARKS)
+
+    results = run(names, args.sizes)
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "unit": "ns/op",
+        "results": results,
+    }
+    if args.output:
+        save_json(args.output, report)
+
+    if args.update_thresholds is not None:
+        thresholds = load_json(args.thresholds) if os.path.exists(args.thresholds) else {}
+        thresholds.update({name: round(ns * args.update_thresholds) for name, ns in results.items()})
+        save_json(args.thresholds, thresholds)
+        return
+
+    thresholds = load_json(args.thresholds) if os.path.exists(args.thresholds) else None
+    baseline = load_json(args.baseline)["results"] if args.baseline else None
+    regressions = find_regressions(results, thresholds, baseline, args.max_slowdown)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
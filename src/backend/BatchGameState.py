@@ -0,0 +1,331 @@
+import numpy as np
+
+from src.backend.consts import (
+    PLAYER_1, PLAYER_2, N_STELLA, WALL, MOVE_UP, PLAYERS_COLLIDED, BOTH_DEAD
+)
+from src.backend.player import InvalidMoveError
+
+# Outcome of a game that is still being played
+ONGOING = -1
+
+# Row and column offsets of each move, indexed by the move (0 is unused)
+MOVE_ROWS = np.array([0, 0, -1, 0, 1], dtype=np.int16)
+MOVE_COLS = np.array([0, -1, 0, 1, 0], dtype=np.int16)
+
+
+class BatchGameState:
+    """
+    Many independent two-player games stepped in lockstep with NumPy.
+
+    Every game follows the same rules as GameState: for the same initial positions
+    and moves, each game has the same outcomes, trails and board as a GameState.
+
+    The trails are ring buffers of N_STELLA + 1 cells. For game b and player p,
+    segment k of the trail (0 is the head) is in slot (cursor[b] + k) % (N_STELLA + 1)
+    of trails[b, p], and is only part of the trail if occupied[b, p, slot] is set.
+    """
+
+    def __init__(
+        self,
+        batch_size: int,
+        size: int,
+        rng: np.random.Generator | None = None,
+        auto_reset: bool = True
+    ):
+        """
+        Start batch_size games on boards of the given size.
+
+        :param batch_size: The number of games
+        :type batch_size: int
+        :param size: The size of every game board
+        :type size: int
+        :param rng: The random number generator for the initial positions
+        :type rng: np.random.Generator | None
+        :param auto_reset: Whether finished games start again at the end of the step they finished in.
+            Otherwise they stay finished and are ignored by step.
+        :type auto_reset: bool
+        """
+        self.__batch_size: int = batch_size
+        self.__size: int = size
+        self.__length: int = N_STELLA + 1
+        self.__rng: np.random.Generator = rng or np.random.default_rng()
+        self.__auto_reset: bool = auto_reset
+
+        self.__trails: np.ndarray = np.zeros((batch_size, 2, self.__length, 2), dtype=np.int16)
+        self.__occupied: np.ndarray = np.zeros((batch_size, 2, self.__length), dtype=bool)
+        self.__cursor: np.ndarray = np.zeros(batch_size, dtype=np.int64)
+        self.__previous_moves: np.ndarray = np.zeros((batch_size, 2), dtype=np.int64)
+        self.__boards: np.ndarray = np.zeros((batch_size, size, size), dtype=np.uint8)
+        self.__initial_positions: np.ndarray = np.zeros((batch_size, 2, 2), dtype=np.int16)
+        self.__outcomes: np.ndarray = np.full(batch_size, ONGOING, dtype=np.int8)
+        self.__ticks: np.ndarray = np.zeros(batch_size, dtype=np.int64)
+
+        self.__wall_mask: np.ndarray = np.zeros((size, size), dtype=bool)
+        self.__wall_mask[[0, -1], :] = True
+        self.__wall_mask[:, [0, -1]] = True
+
+        self.reset(np.arange(batch_size))
+
+    @property
+    def batch_size(self) -> int:
+        """
+        Get the number of games.
+
+        :rtype: int
+        """
+        return self.__batch_size
+
+    @property
+    def size(self) -> int:
+        """
+        Get the size of the game boards.
+
+        :rtype: int
+        """
+        return self.__size
+
+    @property
+    def boards(self) -> np.ndarray:
+        """
+        Get the boards of all the games, with the same cell values as GameState.board.
+
+        :return: A read-only (batch_size, size, size) uint8 array
+        :rtype: np.ndarray
+        """
+        view = self.__boards.view()
+        view.flags.writeable = False
+        return view
+
+    @property
+    def heads(self) -> np.ndarray:
+        """
+        Get the head of both players in every game.
+
+        :return: A (batch_size, 2, 2) array of (row, col)
+        :rtype: np.ndarray
+        """
+        games = np.arange(self.__batch_size)
+        return self.__trails[games, :, self.__cursor]
+
+    @property
+    def previous_moves(self) -> np.ndarray:
+        """
+        Get the previous move of both players in every game, like Player.previous_move.
+
+        :return: A read-only (batch_size, 2) array
+        :rtype: np.ndarray
+        """
+        view = self.__previous_moves.view()
+        view.flags.writeable = False
+        return view
+
+    @property
+    def outcomes(self) -> np.ndarray:
+        """
+        Get the outcome of every game: ONGOING, PLAYERS_COLLIDED, BOTH_DEAD or the number of the winner.
+        With auto_reset the finished games start again, so this is only ONGOING for them.
+
+        :return: A read-only (batch_size,) array
+        :rtype: np.ndarray
+        """
+        view = self.__outcomes.view()
+        view.flags.writeable = False
+        return view
+
+    @property
+    def ticks(self) -> np.ndarray:
+        """
+        Get the number of ticks played in the current game of every slot.
+
+        :rtype: np.ndarray
+        """
+        view = self.__ticks.view()
+        view.flags.writeable = False
+        return view
+
+    def initial_positions(self, game: int) -> tuple[tuple[int, int], tuple[int, int]]:
+        """
+        Get the initial positions of both players of the current game in a slot,
+        e.g. to play the same game with GameState.
+
+        :param game: The index of the game
+        :type game: int
+        :return: The initial (row, col) of player 1 and player 2
+        :rtype: tuple[tuple[int, int], tuple[int, int]]
+        """
+        (row_1, col_1), (row_2, col_2) = self.__initial_positions[game].tolist()
+        return (row_1, col_1), (row_2, col_2)
+
+    def position(self, game: int, player_number: int) -> list[tuple[int, int] | None]:
+        """
+        Get the trail of a player in the same form as Player.position.
+
+        :param game: The index of the game
+        :type game: int
+        :param player_number: PLAYER_1 or PLAYER_2
+        :type player_number: int
+        :return: The positions from the head to the tail, None for the segments not placed yet
+        :rtype: list[tuple[int, int] | None]
+        """
+        player = player_number - 1
+        slots = (self.__cursor[game] + np.arange(self.__length)) % self.__length
+        return [
+            (int(self.__trails[game, player, slot, 0]), int(self.__trails[game, player, slot, 1]))
+            if self.__occupied[game, player, slot] else None
+            for slot in slots
+        ]
+
+    def reset(self, games: np.ndarray) -> None:
+        """
+        Start new games in the given slots, with random initial positions
+        in the same zones as Player.
+
+        :param games: The indices of the games to reset
+        :type games: np.ndarray
+        """
+        games = np.asarray(games, dtype=np.int64)
+        count = len(games)
+        if count == 0:
+            return
+
+        size = self.__size
+        rng = self.__rng
+        col_1 = rng.integers(2, size - 1, count)
+        row_1 = rng.integers(1, col_1)
+        row_2 = rng.integers(2, size - 1, count)
+        col_2 = rng.integers(1, row_2)
+
+        self.__initial_positions[games, 0, 0] = row_1
+        self.__initial_positions[games, 0, 1] = col_1
+        self.__initial_positions[games, 1, 0] = row_2
+        self.__initial_positions[games, 1, 1] = col_2
+
+        self.__trails[games] = 0
+        self.__occupied[games] = False
+        self.__cursor[games] = 0
+        self.__trails[games, :, 0] = self.__initial_positions[games]
+        self.__occupied[games, :, 0] = True
+        self.__previous_moves[games] = 0
+        self.__outcomes[games] = ONGOING
+        self.__ticks[games] = 0
+
+        self.__boards[games] = np.where(self.__wall_mask, WALL, 0).astype(np.uint8)
+        self.__boards[games, row_1, col_1] = PLAYER_1
+        self.__boards[games, row_2, col_2] = PLAYER_2
+
+    def step(self, moves: np.ndarray) -> np.ndarray:
+        """
+        Process one tick of every game that is being played.
+        1. Move both players.
+        2. Check for collisions.
+        3. Update the game boards.
+        4. With auto_reset, start the games that finished again.
+
+        :param moves: A (batch_size, 2) array with the move of each player in each game
+        :type moves: np.ndarray
+        :return: The outcome of the tick for every game: ONGOING, PLAYERS_COLLIDED,
+            BOTH_DEAD or the number of the winner. Games that were already over are ONGOING.
+        :rtype: np.ndarray
+        :raises InvalidMoveError: If a player's move is invalid and so was its previous one, then no game moves
+        """
+        moves = np.asarray(moves, dtype=np.int64)
+        if moves.shape != (self.__batch_size, 2):
+            raise ValueError(f"Expected moves of shape {(self.__batch_size, 2)}, got {moves.shape}")
+
+        result = np.full(self.__batch_size, ONGOING, dtype=np.int8)
+        games = np.flatnonzero(self.__outcomes == ONGOING)
+        if len(games) == 0:
+            return result
+
+        length = self.__length
+        trails = self.__trails
+        occupied = self.__occupied
+        moves = moves[games]
+        previous = self.__previous_moves[games]
+
+        # An invalid move repeats the previous one, or goes up if there is none, like Player.move
+        valid = (moves >= 1) & (moves <= 4)
+        previous_valid = (previous >= 1) & (previous <= 4)
+        if np.any(~valid & ~previous_valid & (previous != 0)):
+            raise InvalidMoveError("Invalid move after an invalid move")
+        effective = np.where(valid, moves, np.where(previous_valid, previous, MOVE_UP))
+        self.__previous_moves[games] = moves
+
+        # Move the heads, the new head takes the slot of the tail that is dropped
+        old_cursor = self.__cursor[games]
+        cursor = (old_cursor - 1) % length
+        old_heads = trails[games, :, old_cursor]
+        heads = old_heads.copy()
+        heads[..., 0] += MOVE_ROWS[effective]
+        heads[..., 1] += MOVE_COLS[effective]
+
+        tails = trails[games, :, cursor]
+        tails_occupied = occupied[games, :, cursor]
+
+        trails[games, :, cursor] = heads
+        occupied[games, :, cursor] = True
+        self.__cursor[games] = cursor
+
+        # Check for collisions, with the same precedence as GameState
+        game_trails = trails[games]
+        game_occupied = occupied[games]
+        head_1, head_2 = heads[:, 0], heads[:, 1]
+
+        same_cell = (head_1 == head_2).all(axis=1)
+        swapped = (old_heads[:, 0] == head_2).all(axis=1) & (head_1 == old_heads[:, 1]).all(axis=1)
+        collided = same_cell | swapped
+
+        wall_1 = self.__wall_mask[head_1[:, 0], head_1[:, 1]]
+        wall_2 = self.__wall_mask[head_2[:, 0], head_2[:, 1]]
+
+        on_cells_1 = (game_trails[:, 0] == head_2[:, None]).all(axis=2) & game_occupied[:, 0]
+        on_cells_2 = (game_trails[:, 1] == head_1[:, None]).all(axis=2) & game_occupied[:, 1]
+        hit_trail_2 = on_cells_2.any(axis=1)  # Player 1 ran into player 2
+        hit_trail_1 = on_cells_1.any(axis=1)  # Player 2 ran into player 1
+
+        # The head is always on its own cell, a suicide is a second segment there
+        suicided_1 = ((game_trails[:, 0] == head_1[:, None]).all(axis=2) & game_occupied[:, 0]).sum(axis=1) > 1
+        suicided_2 = ((game_trails[:, 1] == head_2[:, None]).all(axis=2) & game_occupied[:, 1]).sum(axis=1) > 1
+
+        outcomes = np.select(
+            [
+                collided,
+                wall_1 & wall_2,
+                hit_trail_2 | wall_1,
+                hit_trail_1 | wall_2,
+                suicided_1 & suicided_2,
+                suicided_1,
+                suicided_2,
+            ],
+            [PLAYERS_COLLIDED, BOTH_DEAD, PLAYER_2, PLAYER_1, BOTH_DEAD, PLAYER_2, PLAYER_1],
+            default=ONGOING,
+        ).astype(np.int8)
+
+        # Update the boards: free the tails and place the new heads. The trails can only
+        # overlap on the tick a game ends, so only then they are written again in the same
+        # order as GameState to give shared cells the same value.
+        boards = self.__boards
+        for player in (0, 1):
+            freed = np.flatnonzero(tails_occupied[:, player])
+            boards[games[freed], tails[freed, player, 0], tails[freed, player, 1]] = 0
+        boards[games, head_1[:, 0], head_1[:, 1]] = PLAYER_1
+        boards[games, head_2[:, 0], head_2[:, 1]] = PLAYER_2
+
+        ended = np.flatnonzero(outcomes != ONGOING)
+        if len(ended) and not self.__auto_reset:
+            ended_games, ended_cursor = games[ended], cursor[ended]
+            for segment in range(length):
+                slots = (ended_cursor + segment) % length
+                for player, value in ((0, PLAYER_1), (1, PLAYER_2)):
+                    placed = np.flatnonzero(occupied[ended_games, player, slots])
+                    cells = trails[ended_games[placed], player, slots[placed]]
+                    boards[ended_games[placed], cells[:, 0], cells[:, 1]] = value
+
+        self.__ticks[games] += 1
+        self.__outcomes[games] = outcomes
+        result[games] = outcomes
+
+        if self.__auto_reset:
+            self.reset(games[outcomes != ONGOING])
+
+        return result
@@ -1,5 +1,52 @@
-from src.backend.player import Player
-from src.backend.consts import PLAYER_1, PLAYER_2, WALL, PLAYERS_COLLIDED, BOTH_DEAD
+import json
+from random import Random
+
+import numpy as np
+
+from src.backend.analysis import BoardAnalysis
+from src.backend.player import Player, spawn_positions
+from src.backend.binary_protocol import BinaryStateEncoder
+from src.backend.serialization import StateEncoder
+from src.backend.consts import PLAYER_1, PLAYER_2, N_STELLA, WALL, PLAYERS_COLLIDED, BOTH_DEAD
+
+# Seed of the Zobrist keys, fixed so the hashes are the same in every process
+ZOBRIST_SEED = 0x7A0B_2157
+# Number of distinct previous moves in the hash: no move, the four moves and any invalid one
+ZOBRIST_MOVES = 6
+
+_zobrist_keys: dict[tuple[int, int], tuple[list[int], list[int]]] = {}
+
+
+def zobrist_keys(size: int, n_players: int) -> tuple[list[int], list[int]]:
+    """
+    Get the random 64-bit keys of the position hash of a board size and number of players.
+
+    A trail segment of player p (0 for player 1) on cell index i, placed on a tick t,
+    has the key cells[((p * (N_STELLA + 1)) + t % (N_STELLA + 1)) * size * size + i]:
+    a segment keeps its key while it's in the trail, so a tick only changes the keys
+    of the new heads and the dropped tails, and the same cells in another order have
+    another hash. The previous move m of player p has the key moves[p * ZOBRIST_MOVES + m].
+
+    :param size: The size of the board
+    :type size: int
+    :param n_players: The number of players
+    :type n_players: int
+    :return: The keys of the cells and of the previous moves
+    :rtype: tuple[list[int], list[int]]
+    """
+    keys = _zobrist_keys.get((size, n_players))
+    if keys is None:
+        rng = Random(ZOBRIST_SEED ^ (size << 8) ^ n_players)
+        cells = [rng.getrandbits(64) for _ in range(n_players * (N_STELLA + 1) * size * size)]
+        moves = [rng.getrandbits(64) for _ in range(n_players * ZOBRIST_MOVES)]
+        keys = _zobrist_keys[(size, n_players)] = (cells, moves)
+
+    return keys
+
+
+# Index of each previous move among the ZOBRIST_MOVES keys of a player, any other move is invalid
+MOVE_KEYS = {move: move for move in range(5)}
+INVALID_MOVE_KEY = ZOBRIST_MOVES - 1
 
 
 class GameState:
@@ -12,7 +59,10 @@ class GameState:
         size: int,
         player_1: Player | None = None,
         player_2: Player | None = None,
-        board: list[list[int]] | None = None
+        board: list[list[int]] | None = None,
+        rng: Random | None = None,
+        players: list[Player] | None = None,
+        n_players: int = 2
     ):
         """
         Initializes the game state with the given size, players, and board.
@@ -25,25 +75,76 @@ class GameState:
         :type player_2: Player | None
         :param board: The game board
         :type board: list[list[int]] | None
+        :param rng: The random number generator for the players' initial positions.
+            The same seed and the same moves always give the same game.
+        :type rng: Random | None
+        :param players: All the players of the game in number order, instead of player_1 and player_2
+        :type players: list[Player] | None
+        :param n_players: The number of players to create when they aren't given
+        :type n_players: int
         """
         self.__size: int = size
 
         # Save the players' info
-        self.__player_1: Player = player_1 or Player(PLAYER_1, size)
-        self.__player_2: Player = player_2 or Player(PLAYER_2, size)
+        if players is None and n_players == 2:
+            players = [player_1 or Player(PLAYER_1, size, rng=rng), player_2 or Player(PLAYER_2, size, rng=rng)]
+        elif players is None:
+            players = [
+                Player(number, size, initial_position=position)
+                for number, position in enumerate(spawn_positions(size, n_players, rng), start=1)
+            ]
+        if len(players) < 2:
+            raise ValueError("A game needs at least two players")
+
+        self.__players: list[Player] = players
+        self.__player_1: Player = players[0]
+        self.__player_2: Player = players[1]
+        # The players whose trails are on the board. Once the game is over it keeps the ones of the last tick.
+        self.__alive: list[Player] = list(players)
+        self.__eliminated: list[Player] = []
 
         # Initialize the board
         self.__board: list[list[int]] = board or [[0] * size for _ in range(size)]
         self.__walls: set[tuple[int, int]] = set()
+        self.__wall_cells: bytearray = bytearray(size * size)
         self.__init_walls()
 
+        # Number of trail segments of all the players on every cell, indexed by row * size + col
+        self.__occupancy: list[int] = [0] * (size * size)
+
+        # Number of cells with more than one segment, and whether there were any after the last tick
+        self.__shared_cells: int = 0
+        self.__overlapped: bool = False
+
         # Add the initial positions of the players to the board
-        self.__board[self.__player_1.position[0][0]][self.__player_1.position[0][1]] = PLAYER_1
-        self.__board[self.__player_2.position[0][0]][self.__player_2.position[0][1]] = PLAYER_2
+        for player in players:
+            row, col = player.head
+            self.__board[row][col] = player.board_value
+            self.__occupancy[row * size + col] += 1
+            if self.__occupancy[row * size + col] == 2:
+                self.__shared_cells += 1
 
         self.__game_over: bool = False
         self.__winner: Player | None = None
 
+        # Cells freed at the tail of each player's trail in the last tick
+        self.__freed: list[tuple[int, int] | None] = [None] * len(players)
+
+        self.__tick_count: int = 0
+        self.__version: int = 0
+        self.__encoder: StateEncoder | None = None
+        self.__binary_encoder: BinaryStateEncoder | None = None
+        # The analysis of the current tick and the version it was computed for
+        self.__analysis: tuple[int, BoardAnalysis] | None = None
+
+        # What make_move changed, one record per move that can be undone
+        self.__history: list[tuple] = []
+
+        # The position hash, only kept up to date once it's asked for
+        self.__hash: int | None = None
+        self.__zobrist_cells: list[int] | None = None
+        self.__zobrist_moves: list[int] | None = None
+
     @property
     def size(self) -> int:
         """
@@ -74,6 +175,37 @@ class GameState:
         """
         return self.__player_2
 
+    @property
+    def players(self) -> list[Player]:
+        """
+        Get all the players of the game, in number order.
+
+        :return: The players
+        :rtype: list[Player]
+        """
+        return self.__players
+
+    @property
+    def alive_players(self) -> list[Player]:
+        """
+        Get the players still in the game. Once the game is over,
+        it keeps the ones that were eliminated in the last tick.
+
+        :return: The players whose trails are on the board
+        :rtype: list[Player]
+        """
+        return self.__alive
+
+    @property
+    def eliminated(self) -> list[Player]:
+        """
+        Get the players eliminated in the last tick of a game of more than two players.
+
+        :return: The eliminated players
+        :rtype: list[Player]
+        """
+        return self.__eliminated
+
     @property
     def board(self) -> list[list[int]]:
         """
@@ -94,6 +226,45 @@ class GameState:
         """
         return self.__walls
 
+    @property
+    def tick_count(self) -> int:
+        """
+        Get the number of ticks played.
+
+        :return: The number of ticks
+        :rtype: int
+        """
+        return self.__tick_count
+
+    @property
+    def version(self) -> int:
+        """
+        Get a number that changes every time the state changes, by tick, make_move or unmake_move.
+
+        :rtype: int
+        """
+        return self.__version
+
+    @property
+    def position_hash(self) -> int:
+        """
+        Get a 64-bit Zobrist hash of the trails and previous moves of the players in the game,
+        e.g. for the transposition table of a search.
+
+        The same trails in the same order and the same previous moves on the same tick
+        (modulo N_STELLA + 1) always have the same hash, in every process. It's computed
+        the first time it's asked for, and from then on updated by every tick.
+
+        :rtype: int
+        """
+        if self.__hash is None:
+            self.__zobrist_cells, self.__zobrist_moves = zobrist_keys(self.__size, len(self.__players))
+            self.__hash = 0
+            for player in self.__alive:
+                self.__hash ^= self.__player_hash(player)
+
+        return self.__hash
+
     @property
     def game_over(self) -> bool:
         """
@@ -114,6 +285,80 @@ class GameState:
         """
         return self.__winner
 
+    def player(self, player_number: int) -> Player:
+        """
+        Get a player by its number.
+
+        :param player_number: The number of the player
+        :type player_number: int
+        :return: The player
+        :rtype: Player
+        """
+        if not 1 <= player_number <= len(self.__players):
+            raise ValueError("Número de jugador no válido")
+
+        return self.__players[player_number - 1]
+
+    def board_row(self, row: int) -> list[int]:
+        """
+        Get one row of the game board.
+
+        :param row: The index of the row
+        :type row: int
+        :return: The cells of the row
+        :rtype: list[int]
+        """
+        return self.__board[row]
+
+    def serialize_json_for_player(self, player_number: int) -> str:
+        """
+        Get the JSON of serialize_for_player for the given player.
+
+        The parts shared by both players and the board rows that didn't change
+        are only encoded once, see StateEncoder.
+
+        :param player_number: The number of the player (PLAYER_1 or PLAYER_2)
+        :type player_number: int
+
+        :return: The serialized game state for that player, as JSON.
+        :rtype: str
+        """
+        if len(self.__players) != 2:
+            return json.dumps(self.serialize_for_player(player_number))
+
+        if self.__encoder is None:
+            self.__encoder = StateEncoder(self)
+
+        return self.__encoder.encode_for_player(player_number)
+
+    def serialize_binary_for_player(self, player_number: int) -> bytes:
+        """
+        Get the frame of the "binary" protocol for the given player, see binary_protocol.
+
+        :param player_number: The number of the player
+        :type player_number: int
+
+        :return: The frame of the current tick for that player.
+        :rtype: bytes
+        """
+        if self.__binary_encoder is None:
+            self.__binary_encoder = BinaryStateEncoder(self)
+
+        return self.__binary_encoder.encode_for_player(player_number)
+
+    def analysis(self) -> BoardAnalysis:
+        """
+        Get the reachable area, territory and articulation points of the current tick, see BoardAnalysis.
+        It's computed the first time it's asked for in a tick, and shared by everyone who asks after.
+
+        :rtype: BoardAnalysis
+        """
+        if self.__analysis is None or self.__analysis[0] != self.__version:
+            heads = [player.head if player in self.__alive else None for player in self.__players]
+            self.__analysis = (self.__version, BoardAnalysis(np.array(self.__board, dtype=np.uint8), heads))
+
+        return self.__analysis[1]
+
     def serialize_for_player(self, player_number: int) -> dict:
         """
         Serializa el estado del juego desde la perspectiva
@@ -125,6 +370,18 @@ class GameState:
         :return: El estado del juego serializado para ese jugador.
         :rtype: dict
         """
+        if len(self.__players) != 2:
+            me_player = self.player(player_number)
+            return {
+                "board_size": self.size,
+                "me": {"number": me_player.number, **me_player.serialize()},
+                "opponents": [
+                    {"number": player.number, **player.serialize()}
+                    for player in self.__alive if player is not me_player
+                ],
+                "board": self.board,
+            }
+
         if player_number == PLAYER_1:
             me_player = self.player_1
             opponent_player = self.player_2
@@ -141,6 +398,69 @@ class GameState:
             "board": self.board,
         }
 
+    def serialize_delta_for_player(self, player_number: int) -> dict:
+        """
+        Serialize only what changed in the last tick from the perspective of the given player.
+
+        A bot that has the previous state can rebuild the current one by first freeing
+        the "freed" cells and then placing the new heads. In games of more than two players,
+        the players taken out of the game in the last tick are "eliminated" and the cells
+        their trails left are "cleared" with their new values, to write after the heads.
+
+        :param player_number: The number of the player (PLAYER_1 or PLAYER_2)
+        :type player_number: int
+
+        :return: The changes of the last tick for that player.
+        :rtype: dict
+        """
+        if len(self.__players) != 2:
+            me_player = self.player(player_number)
+            return {
+                "type": "delta",
+                "me": {"number": me_player.number, **me_player.serialize_delta(self.__freed[player_number - 1])},
+                "opponents": [
+                    {"number": player.number, **player.serialize_delta(self.__freed[player.number - 1])}
+                    for player in self.__alive if player is not me_player
+                ],
+                "eliminated": [player.number for player in self.__eliminated] if not self.__game_over else [],
+                "cleared": self.__cleared_cells(),
+            }
+
+        if player_number == PLAYER_1:
+            me = self.player_1.serialize_delta(self.__freed[0])
+            opponent = self.player_2.serialize_delta(self.__freed[1])
+        elif player_number == PLAYER_2:
+            me = self.player_2.serialize_delta(self.__freed[1])
+            opponent = self.player_1.serialize_delta(self.__freed[0])
+        else:
+            raise ValueError("Número de jugador no válido")
+
+        return {
+            "type": "delta",
+            "me": me,
+            "opponent": opponent,
+        }
+
+    def __cleared_cells(self) -> list[dict]:
+        """
+        Get the cells of the trails taken off the board in the last tick, see __eliminate,
+        with the value they have now: empty, a wall or a survivor's trail under them.
+        The tail each eliminated player freed in the tick is one of them.
+
+        :return: The cells as {"x", "y", "value"}, none once the game is over
+        :rtype: list[dict]
+        """
+        if self.__game_over:
+            return []
+
+        cells = {}
+        for player in self.__eliminated:
+            freed = self.__freed[player.number - 1]
+            for pos in (freed, *player.position):
+                if pos is not None:
+                    cells[pos] = self.__board[pos[0]][pos[1]]
+        return [{"x": row, "y": col, "value": value} for (row, col), value in cells.items()]
+
     def __init_walls(self) -> None:
         """
         Initialize the walls of the game board.
@@ -158,41 +478,119 @@ class GameState:
             self.__board[i][0] = WALL
             self.__board[i][n] = WALL
 
-    def __get_collision(self, player_1: Player, player_2: Player) -> int | None:
+        for row, col in self.__walls:
+            self.__wall_cells[row * self.__size + col] = 1
+
+    def __player_hash(self, player: Player) -> int:
+        """
+        Get the keys of a player's trail and previous move XORed together.
         """
-        Check if a collision happened
+        length = N_STELLA + 1
+        cells_per_slot = self.__size * self.__size
+        first_key = (player.number - 1) * length
 
-        :param player_1: The first player
-        :type player_1: Player
-        :param player_2: The second player
-        :type player_2: Player
+        move_key = MOVE_KEYS.get(player.previous_move, INVALID_MOVE_KEY)
+        value = self.__zobrist_moves[(player.number - 1) * ZOBRIST_MOVES + move_key]
+        for segment, pos in enumerate(player.position):
+            if pos is not None:
+                slot = (self.__tick_count - segment) % length
+                value ^= self.__zobrist_cells[(first_key + slot) * cells_per_slot + pos[0] * self.__size + pos[1]]
+
+        return value
+
+    def __crashes(self) -> list[tuple[bool, bool, bool]]:
+        """
+        Check what every player in the game ran into, in one pass over the occupancy grid.
+
+        :return: For each player in the game: whether its head is on a wall,
+            on another player's trail and on its own trail
+        :rtype: list[tuple[bool, bool, bool]]
+        """
+        size = self.__size
+        crashes = []
+        for player in self.__alive:
+            head = player.head
+            index = head[0] * size + head[1]
+            # A head alone on its cell only has to be checked against the walls
+            own = player.count(head) if self.__occupancy[index] > 1 else 1
+            crashes.append((self.__wall_cells[index] == 1, self.__occupancy[index] > own, own > 1))
+
+        return crashes
+
+    def __get_collision(self, crashes: list[tuple[bool, bool, bool]]) -> int | None:
+        """
+        Check if a collision happened in a game of two players
+
+        :param crashes: What each player ran into, see __crashes
+        :type crashes: list[tuple[bool, bool, bool]]
         :return: The type of collision that happened or None if no collision happened
         :rtype: Player | PLAYERS_COLLIDED | BOTH_WALLS | None
         """
+        player_1, player_2 = self.__player_1, self.__player_2
+        (wall_1, hit_2, suicided_1), (wall_2, hit_1, suicided_2) = crashes
+
         # Check if the players collided into each other diagonally or head-on
-        if player_1.position[0] == player_2.position[0] or \
-                (player_1.position[1] == player_2.position[0] and player_1.position[0] == player_2.position[1]):
+        head_1, head_2 = player_1.head, player_2.head
+        if head_1 == head_2 or (player_1.segment(1) == head_2 and head_1 == player_2.segment(1)):
             return PLAYERS_COLLIDED
 
-        elif player_1.position[0] in self.walls and player_2.position[0] in self.walls:
+        elif wall_1 and wall_2:
             return BOTH_DEAD
 
-        elif player_1.position[0] in player_2.position or player_1.position[0] in self.walls:
+        elif hit_2 or wall_1:
             return player_2
 
-        elif player_2.position[0] in player_1.position or player_2.position[0] in self.walls:
+        elif hit_1 or wall_2:
             return player_1
 
         # Check for suicides
-        elif player_1.player_suicided() and player_2.player_suicided():
+        elif suicided_1 and suicided_2:
             return BOTH_DEAD
-        elif player_1.player_suicided():
+        elif suicided_1:
             return player_2
-        elif player_2.player_suicided():
+        elif suicided_2:
             return player_1
 
         return None
 
+    def __eliminate(self, crashes: list[tuple[bool, bool, bool]]) -> int | None:
+        """
+        Take the players that crashed out of a game of more than two players.
+        The game is over when at most one player is left.
+
+        :param crashes: What each player ran into, see __crashes
+        :type crashes: list[tuple[bool, bool, bool]]
+        :return: The winner when one player is left, BOTH_DEAD when none is, or None if the game continues
+        :rtype: Player | BOTH_DEAD | None
+        """
+        survivors = [player for player, crash in zip(self.__alive, crashes) if not any(crash)]
+        self.__eliminated = [player for player, crash in zip(self.__alive, crashes) if any(crash)]
+
+        if len(survivors) > 1:
+            size = self.__size
+            for player in self.__eliminated:
+                if self.__hash is not None:
+                    self.__hash ^= self.__player_hash(player)
+                for pos in player.position:
+                    if pos is not None:
+                        index = pos[0] * size + pos[1]
+                        self.__occupancy[index] -= 1
+                        if self.__occupancy[index] == 1:
+                            self.__shared_cells -= 1
+                        self.__board[pos[0]][pos[1]] = WALL if pos in self.__walls else 0
+            self.__alive = survivors
+            # The cells of the survivors under the removed trails are written again
+            self.__overlapped = self.__overlapped or bool(self.__eliminated)
+            return None
+
+        self.__game_over = True
+        if survivors:
+            self.__winner = survivors[0]
+            return survivors[0]
+
+        self.__winner = None
+        return BOTH_DEAD
+
     def __handle_collisions(self) -> int | None:
         """
         Handle the collisions between the players and the walls.
@@ -200,7 +598,11 @@ class GameState:
         :return: The type of collision that happened or None if no collision happened
         :rtype: Player | PLAYERS_COLLIDED | BOTH_WALLS | None
         """
-        collision = self.__get_collision(self.player_1, self.player_2)
+        crashes = self.__crashes()
+        if len(self.__players) != 2:
+            return self.__eliminate(crashes)
+
+        collision = self.__get_collision(crashes)
 
         if collision is None:
             return None
@@ -216,56 +618,183 @@ class GameState:
 
         return collision
 
-    def __update_board(self, last_pos_1: tuple[int, int], last_pos_2: tuple[int, int]) -> None:
+    def __update_board(self, freed: list[tuple[int, int] | None]) -> None:
         """
         Update the game board with the players' new positions.
 
-        :param last_pos_1: The last position of player 1 to remove from the board.
-        :type last_pos_1: tuple[int, int]
-        :param last_pos_2: The last position of player 2 to remove from the board.
-        :type last_pos_2: tuple[int, int]
+        :param freed: The last positions of the players to remove from the board.
+        :type freed: list[tuple[int, int] | None]
         """
+        board = self.__board
+        for last_pos in freed:
+            if last_pos is not None:
+                board[last_pos[0]][last_pos[1]] = 0
+
+        players = self.__alive
+        if not self.__shared_cells and not self.__overlapped:
+            # Every cell has at most one segment, only the heads are new
+            for player in players:
+                head = player.head
+                board[head[0]][head[1]] = player.board_value
+            return
+
+        # Cells with many segments show the one written last, segment by segment in player order
+        values = [player.board_value for player in players]
+        for positions in zip(*(player.position for player in players)):
+            for value, pos in zip(values, positions):
+                if pos is not None:
+                    board[pos[0]][pos[1]] = value
+        self.__overlapped = self.__shared_cells > 0
+
+    def tick(self, *moves: int) -> None | int:
+        """
+        Process a game tick with the given moves for all the players.
+        1. Move the players.
+        2. Check for collisions.
+        3. Update the game board.
 
-        if last_pos_1 is not None:
-            self.__board[last_pos_1[0]][last_pos_1[1]] = 0
-        if last_pos_2 is not None:
-            self.__board[last_pos_2[0]][last_pos_2[1]] = 0
-
-        for pos_1, pos_2 in zip(self.__player_1.position, self.__player_2.position):
-            if pos_1 is not None:
-                self.__board[pos_1[0]][pos_1[1]] = PLAYER_1
+        :param moves: The move of every player, in number order. The moves of
+            players that are out of the game are ignored.
+        :type moves: int
 
-            if pos_2 is not None:
-                self.__board[pos_2[0]][pos_2[1]] = PLAYER_2
+        :return: None if the game continues, or the type of collision that happened.
+        :rtype: Player | PLAYERS_COLLIDED | BOTH_WALLS | None
+        """
+        return self.__advance(moves, False)
 
-    def tick(self, move_1: int, move_2: int) -> None | int:
+    def make_move(self, *moves: int) -> None | int:
         """
-        Process a game tick with the given moves for both players.
-        1. Move both players.
-        2. Check for collisions.
-        3. Update the game board.
+        Process a game tick like tick, keeping what it changed so unmake_move can undo it.
+        Searches can play and undo moves on the same GameState instead of copying it.
 
-        :param move_1: Move for player 1.
-        :type move_1: int
-        :param move_2: Move for player 2.
-        :type move_2: int
+        :param moves: The move of every player, in number order
+        :type moves: int
 
         :return: None if the game continues, or the type of collision that happened.
         :rtype: Player | PLAYERS_COLLIDED | BOTH_WALLS | None
         """
-        # Get the players' last positions to remove them from the board
-        last_pos_1 = self.player_1.position[-1]
-        last_pos_2 = self.player_2.position[-1]
+        return self.__advance(moves, True)
+
+    def unmake_move(self) -> None:
+        """
+        Undo the last make_move, restoring exactly the state before it:
+        the trails, previous moves, board, game_over, winner and position hash.
 
-        # Move the players
-        self.player_1.move(move_1)
-        self.player_2.move(move_2)
+        :raises IndexError: If there is no move to undo
+        """
+        (
+            alive, previous_moves, freed, eliminated, game_over, winner,
+            shared_cells, overlapped, position_hash, cells,
+        ) = self.__history.pop()
+
+        size = self.__size
+        occupancy = self.__occupancy
+        if self.__alive is not alive:
+            # The trails of the players eliminated in the move were taken off the grid
+            for player in self.__eliminated:
+                for pos in player.position:
+                    if pos is not None:
+                        occupancy[pos[0] * size + pos[1]] += 1
+
+        last_freed = self.__freed
+        for player, previous_move in zip(alive, previous_moves):
+            head = player.head
+            occupancy[head[0] * size + head[1]] -= 1
+            tail = last_freed[player.number - 1]
+            player.unmove(tail, previous_move)
+            if tail is not None:
+                occupancy[tail[0] * size + tail[1]] += 1
+
+        board = self.__board
+        for row, col, value in cells:
+            board[row][col] = value
+
+        self.__alive = alive
+        self.__freed = freed
+        self.__eliminated = eliminated
+        self.__game_over = game_over
+        self.__winner = winner
+        self.__shared_cells = shared_cells
+        self.__overlapped = overlapped
+        self.__hash = position_hash
+        self.__tick_count -= 1
+        self.__version += 1
+
+    def __advance(self, moves: tuple[int, ...], undoable: bool) -> None | int:
+        """
+        Process a game tick, see tick. If undoable, push what it changes to the history.
+        """
+        if len(moves) != len(self.__players):
+            raise ValueError(f"Expected {len(self.__players)} moves, got {len(moves)}")
+
+        size = self.__size
+        occupancy = self.__occupancy
+        alive = self.__alive
+        if undoable:
+            record = [
+                alive, [player.previous_move for player in alive], self.__freed, self.__eliminated,
+                self.__game_over, self.__winner, self.__shared_cells, self.__overlapped, self.__hash,
+            ]
+        self.__tick_count += 1
+        self.__version += 1
+
+        position_hash = self.__hash
+        if position_hash is not None:
+            cells_keys, moves_keys = self.__zobrist_cells, self.__zobrist_moves
+            # The new heads take the slot of the dropped tails
+            slot = self.__tick_count % (N_STELLA + 1)
+
+        # Move the players, moving their cells in the occupancy grid
+        freed = self.__freed = [None] * len(self.__players)
+        for player in alive:
+            number = player.number
+            last_pos = player.tail
+            freed[number - 1] = last_pos
+            previous_move = player.previous_move
+            move = moves[number - 1]
+            player.move(move)
+
+            if last_pos is not None:
+                last_index = last_pos[0] * size + last_pos[1]
+                occupancy[last_index] -= 1
+                if occupancy[last_index] == 1:
+                    self.__shared_cells -= 1
+            head = player.head
+            index = head[0] * size + head[1]
+            occupancy[index] += 1
+            if occupancy[index] == 2:
+                self.__shared_cells += 1
+
+            if position_hash is not None:
+                first_key = ((number - 1) * (N_STELLA + 1) + slot) * size * size
+                position_hash ^= cells_keys[first_key + index]
+                if last_pos is not None:
+                    position_hash ^= cells_keys[first_key + last_index]
+                if move != previous_move:
+                    first_move = (number - 1) * ZOBRIST_MOVES
+                    position_hash ^= moves_keys[first_move + MOVE_KEYS.get(previous_move, INVALID_MOVE_KEY)]
+                    position_hash ^= moves_keys[first_move + MOVE_KEYS.get(move, INVALID_MOVE_KEY)]
+        self.__hash = position_hash
+
+        if undoable:
+            # Keep the cells of the board the tick can write. Only the freed cells and the
+            # new heads, unless the trails are written again, see __update_board and __eliminate.
+            board = self.__board
+            if self.__shared_cells or self.__overlapped or len(self.__players) != 2:
+                written = {pos for player in alive for pos in player.position if pos is not None}
+            else:
+                written = [player.head for player in alive]
+            record.append(
+                [(pos[0], pos[1], board[pos[0]][pos[1]]) for pos in freed if pos is not None]
+                + [(row, col, board[row][col]) for row, col in written]
+            )
+            self.__history.append(tuple(record))
 
         # Check for collisions
         collision = self.__handle_collisions()
 
         # Update the board with the new positions
-        self.__update_board(last_pos_1, last_pos_2)
+        self.__update_board(freed)
 
         return collision
 
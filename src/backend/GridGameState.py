@@ -0,0 +1,489 @@
+from array import array
+from random import Random
+
+import numpy as np
+
+from src.backend.analysis import BoardAnalysis
+from src.backend.player import Player
+from src.backend.binary_protocol import BinaryStateEncoder
+from src.backend.serialization import StateEncoder
+from src.backend.consts import PLAYER_1, PLAYER_2, WALL, PLAYERS_COLLIDED, BOTH_DEAD
+
+
+class GridGameState:
+    """
+    Drop-in alternative to GameState backed by flat occupancy grids.
+
+    The board is a single bytearray of size * size cells indexed by row * size + col,
+    and every player keeps a per-cell count of how many of its trail segments are on
+    that cell. Collision checks, wall checks and board updates are index operations,
+    so the cost of a tick doesn't depend on the size of the board.
+
+    The results of tick() and the resulting board are the same as GameState's for the same moves.
+    """
+
+    def __init__(
+        self,
+        size: int,
+        player_1: Player | None = None,
+        player_2: Player | None = None,
+        board: list[list[int]] | None = None,
+        rng: Random | None = None
+    ):
+        """
+        Initializes the game state with the given size, players, and board.
+
+        :param size: The size of the game board
+        :type size: int
+        :param player_1: The first player
+        :type player_1: Player | None
+        :param player_2: The second player
+        :type player_2: Player | None
+        :param board: The game board
+        :type board: list[list[int]] | None
+        :param rng: The random number generator for the players' initial positions.
+            The same seed and the same moves always give the same game.
+        :type rng: Random | None
+        """
+        self.__size: int = size
+
+        # Save the players' info
+        self.__player_1: Player = player_1 or Player(PLAYER_1, size, rng=rng)
+        self.__player_2: Player = player_2 or Player(PLAYER_2, size, rng=rng)
+
+        # Initialize the board
+        self.__grid: bytearray = bytearray(size * size)
+        if board:
+            self.__grid[:] = bytes(cell for row in board for cell in row)
+        self.__wall_grid: bytearray = bytearray(size * size)
+        self.__walls: set[tuple[int, int]] = set()
+        self.__init_walls()
+
+        # Number of trail segments of each player on every cell, and of both players together
+        self.__count_1: array = array("H", bytes(2 * size * size))
+        self.__count_2: array = array("H", bytes(2 * size * size))
+        self.__count: array = array("H", bytes(2 * size * size))
+        # Number of cells taken by more than one trail segment
+        self.__shared_cells: int = 0
+        # Whether the board has to be fully rewritten because some trails overlapped
+        self.__overlapped: bool = False
+
+        # Add the initial positions of the players to the board
+        for pos in self.__player_1.position:
+            if pos is not None:
+                self.__occupy(self.__count_1, self.__index(pos))
+        for pos in self.__player_2.position:
+            if pos is not None:
+                self.__occupy(self.__count_2, self.__index(pos))
+        self.__grid[self.__index(self.__player_1.position[0])] = PLAYER_1
+        self.__grid[self.__index(self.__player_2.position[0])] = PLAYER_2
+
+        self.__game_over: bool = False
+        self.__winner: Player | None = None
+
+        # Cells freed at the tail of each player's trail in the last tick
+        self.__freed_1: tuple[int, int] | None = None
+        self.__freed_2: tuple[int, int] | None = None
+
+        self.__tick_count: int = 0
+        self.__encoder: StateEncoder | None = None
+        self.__binary_encoder: BinaryStateEncoder | None = None
+        # The analysis of the current tick and the version it was computed for
+        self.__analysis: tuple[int, BoardAnalysis] | None = None
+
+    @property
+    def size(self) -> int:
+        """
+        Get the size of the game board.
+
+        :return: The size of the board
+        :rtype: int
+        """
+        return self.__size
+
+    @property
+    def player_1(self) -> Player:
+        """
+        Get the player 1 object.
+
+        :return: The player 1
+        :rtype: Player
+        """
+        return self.__player_1
+
+    @property
+    def player_2(self) -> Player:
+        """
+        Get the player 2 object.
+
+        :return: The player 2
+        :rtype: Player
+        """
+        return self.__player_2
+
+    @property
+    def players(self) -> list[Player]:
+        """
+        Get both players of the game, in number order.
+
+        :return: The players
+        :rtype: list[Player]
+        """
+        return [self.__player_1, self.__player_2]
+
+    @property
+    def grid(self) -> memoryview:
+        """
+        Get a read-only view of the flat game board, indexed by row * size + col.
+
+        :return: The flat game board
+        :rtype: memoryview
+        """
+        return memoryview(self.__grid).toreadonly()
+
+    @property
+    def board(self) -> list[list[int]]:
+        """
+        Get a copy of the current game board as nested lists, like GameState.board.
+
+        :return: The game board
+        :rtype: list[list[int]]
+        """
+        size = self.__size
+        return [list(self.__grid[row:row + size]) for row in range(0, size * size, size)]
+
+    @property
+    def walls(self) -> set[tuple[int, int]]:
+        """
+        Get the walls of the game board.
+
+        :return: The walls
+        :rtype: set[tuple[int, int]]
+        """
+        return self.__walls
+
+    @property
+    def tick_count(self) -> int:
+        """
+        Get the number of ticks played.
+
+        :return: The number of ticks
+        :rtype: int
+        """
+        return self.__tick_count
+
+    @property
+    def version(self) -> int:
+        """
+        Get a number that changes every time the state changes.
+        Only tick changes it, so it's the number of ticks.
+
+        :rtype: int
+        """
+        return self.__tick_count
+
+    @property
+    def game_over(self) -> bool:
+        """
+        Check if the game is over.
+
+        :return: True if the game is over, False otherwise
+        :rtype: bool
+        """
+        return self.__game_over
+
+    @property
+    def winner(self) -> Player | None:
+        """
+        Get the winner of the game, if there is one.
+
+        :return: The winner player or None if there is no winner
+        :rtype: Player | None
+        """
+        return self.__winner
+
+    def board_bytes(self) -> bytes:
+        """
+        Export the game board as one byte per cell, row by row.
+
+        :return: The game board
+        :rtype: bytes
+        """
+        return bytes(self.__grid)
+
+    def board_row(self, row: int) -> list[int]:
+        """
+        Get one row of the game board.
+
+        :param row: The index of the row
+        :type row: int
+        :return: The cells of the row
+        :rtype: list[int]
+        """
+        return list(self.__grid[row * self.__size:(row + 1) * self.__size])
+
+    def serialize_json_for_player(self, player_number: int) -> str:
+        """
+        Get the JSON of serialize_for_player for the given player.
+
+        The parts shared by both players and the board rows that didn't change
+        are only encoded once, see StateEncoder.
+
+        :param player_number: The number of the player (PLAYER_1 or PLAYER_2)
+        :type player_number: int
+
+        :return: The serialized game state for that player, as JSON.
+        :rtype: str
+        """
+        if self.__encoder is None:
+            self.__encoder = StateEncoder(self)
+
+        return self.__encoder.encode_for_player(player_number)
+
+    def serialize_binary_for_player(self, player_number: int) -> bytes:
+        """
+        Get the frame of the "binary" protocol for the given player, see binary_protocol.
+
+        :param player_number: The number of the player
+        :type player_number: int
+
+        :return: The frame of the current tick for that player.
+        :rtype: bytes
+        """
+        if self.__binary_encoder is None:
+            self.__binary_encoder = BinaryStateEncoder(self)
+
+        return self.__binary_encoder.encode_for_player(player_number)
+
+    def analysis(self) -> BoardAnalysis:
+        """
+        Get the reachable area, territory and articulation points of the current tick,
+        as GameState.analysis.
+
+        :rtype: BoardAnalysis
+        """
+        if self.__analysis is None or self.__analysis[0] != self.version:
+            board = np.frombuffer(self.__grid, dtype=np.uint8).reshape(self.__size, self.__size)
+            heads = [player.head for player in self.players]
+            self.__analysis = (self.version, BoardAnalysis(board, heads))
+
+        return self.__analysis[1]
+
+    def serialize_for_player(self, player_number: int) -> dict:
+        """
+        Serialize the game state from the point of view of the given player,
+        in the same format as GameState.serialize_for_player.
+
+        :param player_number: The number of the player (PLAYER_1 or PLAYER_2)
+        :type player_number: int
+
+        :return: The serialized game state for that player.
+        :rtype: dict
+        """
+        if player_number == PLAYER_1:
+            me_player = self.player_1
+            opponent_player = self.player_2
+        elif player_number == PLAYER_2:
+            me_player = self.player_2
+            opponent_player = self.player_1
+        else:
+            raise ValueError("Número de jugador no válido")
+
+        return {
+            "board_size": self.size,
+            "me": me_player.serialize(),
+            "opponent": opponent_player.serialize(),
+            "board": self.board,
+        }
+
+    def serialize_delta_for_player(self, player_number: int) -> dict:
+        """
+        Serialize only what changed in the last tick from the perspective of the given player.
+
+        A bot that has the previous state can rebuild the current one by first freeing
+        the "freed" cells and then placing the new heads.
+
+        :param player_number: The number of the player (PLAYER_1 or PLAYER_2)
+        :type player_number: int
+
+        :return: The changes of the last tick for that player.
+        :rtype: dict
+        """
+        if player_number == PLAYER_1:
+            me = self.player_1.serialize_delta(self.__freed_1)
+            opponent = self.player_2.serialize_delta(self.__freed_2)
+        elif player_number == PLAYER_2:
+            me = self.player_2.serialize_delta(self.__freed_2)
+            opponent = self.player_1.serialize_delta(self.__freed_1)
+        else:
+            raise ValueError("Número de jugador no válido")
+
+        return {
+            "type": "delta",
+            "me": me,
+            "opponent": opponent,
+        }
+
+    def __index(self, position: tuple[int, int]) -> int:
+        return position[0] * self.__size + position[1]
+
+    def __init_walls(self) -> None:
+        """
+        Initialize the walls of the game board.
+        The walls are placed on the edges of the board.
+        """
+        n = self.__size - 1
+        for i in range(self.__size):
+            for wall in ((0, i), (n, i), (i, 0), (i, n)):
+                self.__walls.add(wall)
+                index = self.__index(wall)
+                self.__wall_grid[index] = 1
+                self.__grid[index] = WALL
+
+    def __occupy(self, counts: array, index: int) -> None:
+        counts[index] += 1
+        self.__count[index] += 1
+        if self.__count[index] == 2:
+            self.__shared_cells += 1
+
+    def __leave(self, counts: array, index: int) -> None:
+        counts[index] -= 1
+        self.__count[index] -= 1
+        if self.__count[index] == 1:
+            self.__shared_cells -= 1
+
+    def __get_collision(self) -> Player | int | None:
+        """
+        Check if a collision happened, with the same rules as GameState.
+
+        :return: The type of collision that happened or None if no collision happened
+        :rtype: Player | PLAYERS_COLLIDED | BOTH_DEAD | None
+        """
+        player_1, player_2 = self.__player_1, self.__player_2
+        head_1, head_2 = player_1.head, player_2.head
+
+        # Check if the players collided into each other diagonally or head-on
+        if head_1 == head_2 or (player_1.segment(1) == head_2 and head_1 == player_2.segment(1)):
+            return PLAYERS_COLLIDED
+
+        index_1, index_2 = self.__index(head_1), self.__index(head_2)
+        wall_1, wall_2 = self.__wall_grid[index_1], self.__wall_grid[index_2]
+
+        if wall_1 and wall_2:
+            return BOTH_DEAD
+        elif self.__count_2[index_1] or wall_1:
+            return player_2
+        elif self.__count_1[index_2] or wall_2:
+            return player_1
+
+        # Check for suicides, the head itself is one of the segments on the cell
+        suicided_1 = self.__count_1[index_1] > 1
+        suicided_2 = self.__count_2[index_2] > 1
+        if suicided_1 and suicided_2:
+            return BOTH_DEAD
+        elif suicided_1:
+            return player_2
+        elif suicided_2:
+            return player_1
+
+        return None
+
+    def __handle_collisions(self) -> Player | int | None:
+        """
+        Handle the collisions between the players and the walls.
+
+        :return: The type of collision that happened or None if no collision happened
+        :rtype: Player | PLAYERS_COLLIDED | BOTH_DEAD | None
+        """
+        collision = self.__get_collision()
+
+        if collision is None:
+            return None
+
+        if collision == PLAYERS_COLLIDED or collision == BOTH_DEAD:
+            self.__winner = None
+        else:
+            self.__winner = collision
+
+        self.__game_over = True
+
+        return collision
+
+    def __update_board(self, last_pos_1: tuple[int, int] | None, last_pos_2: tuple[int, int] | None) -> None:
+        """
+        Update the game board with the players' new positions.
+
+        While no cell is shared by two trail segments only the freed tails and the new heads change.
+        Otherwise the trails are rewritten in the same order as GameState does, so that shared
+        cells end up with the same value.
+
+        :param last_pos_1: The last position of player 1 to remove from the board.
+        :type last_pos_1: tuple[int, int] | None
+        :param last_pos_2: The last position of player 2 to remove from the board.
+        :type last_pos_2: tuple[int, int] | None
+        """
+        grid = self.__grid
+        if last_pos_1 is not None:
+            grid[self.__index(last_pos_1)] = 0
+        if last_pos_2 is not None:
+            grid[self.__index(last_pos_2)] = 0
+
+        if not self.__shared_cells and not self.__overlapped:
+            grid[self.__index(self.__player_1.head)] = PLAYER_1
+            grid[self.__index(self.__player_2.head)] = PLAYER_2
+            return
+
+        for pos_1, pos_2 in zip(self.__player_1.position, self.__player_2.position):
+            if pos_1 is not None:
+                grid[self.__index(pos_1)] = PLAYER_1
+            if pos_2 is not None:
+                grid[self.__index(pos_2)] = PLAYER_2
+
+        self.__overlapped = self.__shared_cells > 0
+
+    def tick(self, move_1: int, move_2: int) -> None | Player | int:
+        """
+        Process a game tick with the given moves for both players.
+        1. Move both players.
+        2. Check for collisions.
+        3. Update the game board.
+
+        :param move_1: Move for player 1.
+        :type move_1: int
+        :param move_2: Move for player 2.
+        :type move_2: int
+
+        :return: None if the game continues, or the type of collision that happened.
+        :rtype: Player | PLAYERS_COLLIDED | BOTH_DEAD | None
+        """
+        # Get the players' last positions to remove them from the board
+        last_pos_1 = self.__player_1.tail
+        last_pos_2 = self.__player_2.tail
+        self.__freed_1, self.__freed_2 = last_pos_1, last_pos_2
+        self.__tick_count += 1
+
+        # Move the players and keep the occupancy counts in sync with their trails
+        self.__player_1.move(move_1)
+        self.__player_2.move(move_2)
+
+        if last_pos_1 is not None:
+            self.__leave(self.__count_1, self.__index(last_pos_1))
+        if last_pos_2 is not None:
+            self.__leave(self.__count_2, self.__index(last_pos_2))
+        self.__occupy(self.__count_1, self.__index(self.__player_1.head))
+        self.__occupy(self.__count_2, self.__index(self.__player_2.head))
+
+        # Check for collisions
+        collision = self.__handle_collisions()
+
+        # Update the board with the new positions
+        self.__update_board(last_pos_1, last_pos_2)
+
+        return collision
+
+    def __str__(self) -> str:
+        res = ""
+        for row in self.board:
+            res += " ".join(str(cell) for cell in row) + "\n"
+
+        return res
@@ -0,0 +1,190 @@
+"""
+Territory and reachability of the players on the current board, computed once per tick
+and shared by every bot that asked for it and by the match analytics.
+
+The board is flattened to indices row * size + col. The border of the board is always
+wall, so the neighbours of an inside cell are index - 1, index + 1, index - size and
+index + size without wrapping around.
+"""
+
+import json
+
+import numpy as np
+
+# Distance of the cells a player can't reach
+UNREACHABLE = -1
+
+
+def flood_distances(free: np.ndarray, heads: list[int | None], size: int) -> np.ndarray:
+    """
+    Get the number of moves each player needs to get to every cell, through free cells only.
+    The players are searched in lockstep: every step of the loop grows all their frontiers at once.
+
+    :param free: Whether each cell of the flat board is empty
+    :type free: np.ndarray
+    :param heads: The flat index of each player's head, None for players out of the game
+    :type heads: list[int | None]
+    :param size: The size of the board
+    :type size: int
+    :return: The distances, shape (len(heads), size * size), UNREACHABLE where a player can't go.
+        A head is at distance 0.
+    :rtype: np.ndarray
+    """
+    cells = size * size
+    distances = np.full(len(heads) * cells, UNREACHABLE, dtype=np.int32)
+    # A cell of player p is p * cells + index, so one array holds every frontier
+    frontier = np.array([p * cells + head for p, head in enumerate(heads) if head is not None], dtype=np.int64)
+    distances[frontier] = 0
+    offsets = np.array([-size, -1, 1, size], dtype=np.int64)
+    free_cells = np.tile(free, len(heads))
+
+    distance = 0
+    while frontier.size:
+        distance += 1
+        neighbours = (frontier[:, None] + offsets).ravel()
+        neighbours = neighbours[free_cells[neighbours] & (distances[neighbours] == UNREACHABLE)]
+        frontier = np.unique(neighbours)
+        distances[frontier] = distance
+
+    return distances.reshape(len(heads), cells)
+
+
+def articulation_points(free: np.ndarray, region: np.ndarray, size: int) -> list[int]:
+    """
+    Get the cells of a region of free cells whose removal splits the part of the region
+    they are in, e.g. the mouths of pockets a player could seal.
+
+    This is Tarjan's algorithm with an explicit stack. It's a depth-first search, so
+    unlike the flood fill it visits the cells one by one.
+
+    :param free: Whether each cell of the flat board is empty
+    :type free: np.ndarray
+    :param region: The flat indices of the cells to search, e.g. all the reachable ones
+    :type region: np.ndarray
+    :param size: The size of the board
+    :type size: int
+    :return: The flat indices of the articulation points, sorted
+    :rtype: list[int]
+    """
+    free_list = free.tolist()
+    offsets = (-size, -1, 1, size)
+    cells = size * size
+    order = [0] * cells  # discovery order + 1, 0 for unvisited
+    low = [0] * cells
+    parent = [-1] * cells
+    next_offset = [0] * cells  # the next neighbour of each cell to try
+    points = set()
+    counter = 0
+
+    for root in region.tolist():
+        if order[root]:
+            continue
+        counter += 1
+        order[root] = low[root] = counter
+        root_children = 0
+        stack = [root]
+        while stack:
+            cell = stack[-1]
+            k = next_offset[cell]
+            child = -1
+            while k < 4:
+                neighbour = cell + offsets[k]
+                k += 1
+                if free_list[neighbour]:
+                    seen = order[neighbour]
+                    if not seen:
+                        child = neighbour
+                        break
+                    if seen < low[cell] and neighbour != parent[cell]:
+                        low[cell] = seen
+            next_offset[cell] = k
+
+            if child >= 0:
+                counter += 1
+                order[child] = low[child] = counter
+                parent[child] = cell
+                stack.append(child)
+                if cell == root:
+                    root_children += 1
+                continue
+
+            stack.pop()
+            up = parent[cell]
+            if up < 0:
+                continue
+            if low[cell] < low[up]:
+                low[up] = low[cell]
+            if up != root and low[cell] >= order[up]:
+                points.add(up)
+
+        if root_children > 1:
+            points.add(root)
+
+    return sorted(points)
+
+
+class BoardAnalysis:
+    """
+    The reachable area, Voronoi territory and articulation points of one state of a game.
+
+    For every player (by number - 1, players out of the game reach nothing):
+    - reachable: the number of empty cells it can get to.
+    - territory: the number of empty cells it gets to strictly before any other player.
+    The owner of an empty cell is the number of the player whose territory it's in,
+    0 if no one gets there first (a tie, or no one gets there at all) and for the cells
+    that aren't empty.
+    """
+
+    def __init__(self, board: np.ndarray, heads: list[tuple[int, int] | None]):
+        """
+        :param board: The game board, shape (size, size), 0 for the empty cells
+        :type board: np.ndarray
+        :param heads: The head of every player by number - 1, None for players out of the game
+        :type heads: list[tuple[int, int] | None]
+        """
+        size = board.shape[0]
+        free = (board == 0).ravel()
+        head_indices = [head[0] * size + head[1] if head is not None else None for head in heads]
+        self.size = size
+        self.distances: np.ndarray = flood_distances(free, head_indices, size)
+
+        reached = (self.distances > 0) & free
+        self.reachable: list[int] = reached.sum(axis=1).tolist()
+
+        # The cells each player reaches first, with no other player at the same distance
+        steps = np.where(reached, self.distances, np.iinfo(np.int32).max)
+        nearest = steps.min(axis=0)
+        first = reached & (steps == nearest)
+        owned = first.sum(axis=0) == 1
+        owner = np.where(owned, first.argmax(axis=0) + 1, 0)
+        self.owner: np.ndarray = owner.reshape(size, size).astype(np.uint8)
+        self.territory: list[int] = [int(np.count_nonzero(owner == number)) for number in range(1, len(heads) + 1)]
+
+        points = articulation_points(free, np.flatnonzero(reached.any(axis=0)), size)
+        self.articulation_points: list[tuple[int, int]] = [divmod(index, size) for index in points]
+        self.__json: str | None = None
+
+    def serialize(self) -> dict:
+        """
+        Serialize the analysis to a dictionary, the same for every player.
+
+        :return: "reachable" and "territory" by player number - 1, the "owner" of every cell
+            as rows like the board, and the "articulation_points"
+        :rtype: dict
+        """
+        return {
+            "reachable": self.reachable,
+            "territory": self.territory,
+            "owner": self.owner.tolist(),
+            "articulation_points": [{"x": row, "y": col} for row, col in self.articulation_points],
+        }
+
+    def to_json(self) -> str:
+        """
+        Get json.dumps(self.serialize()), encoded once.
+
+        :rtype: str
+        """
+        if self.__json is None:
+            self.__json = json.dumps(self.serialize())
+        return self.__json
@@ -1,5 +1,110 @@
 import argparse
 
+from src.backend.events import LEVELS
+
+# Defaults of the game, also used by play() in main.py
+DEFAULT_TICK_RATE = 10
+DEFAULT_FPS = 30
+
+
+def add_local_bot_args(parser: argparse.ArgumentParser) -> None:
+    """
+    Add the options to run the bots as local processes instead of Docker images.
+    """
+    parser.add_argument(
+        "--bot1-cmd",
+        type=str,
+        default=None,
+        help="Command that runs Bot 1 as a local process, instead of --bot1"
+    )
+    parser.add_argument(
+        "--bot2-cmd",
+        type=str,
+        default=None,
+        help="Command that runs Bot 2 as a local process, instead of --bot2"
+    )
+    parser.add_argument(
+        "--isolate-plugins",
+        action="store_true",
+        help="Run the bots given as py:<module>:<attribute> in a worker thread, so their move timeout applies"
+    )
+    parser.add_argument(
+        "--cpu-time",
+        type=int,
+        default=None,
+        help="Seconds of CPU time each local bot process can use (no limit by default)"
+    )
+    parser.add_argument(
+        "--memory",
+        type=int,
+        default=None,
+        help="Megabytes of memory each local bot process can use (no limit by default)"
+    )
+
+
+def add_protocol_args(parser: argparse.ArgumentParser) -> None:
+    """
+    Add the options of what is offered to the bots and how long they have to answer.
+    """
+    parser.add_argument(
+        "--offer-delta",
+        action="store_true",
+        help="Offer the bots to receive only the changes of each tick after a first full snapshot"
+    )
+    parser.add_argument(
+        "--offer-binary",
+        action="store_true",
+        help="Offer the bots to receive the state in binary frames instead of JSON, see binary_protocol.py"
+    )
+    parser.add_argument(
+        "--offer-analysis",
+        action="store_true",
+        help="Offer the bots the reachable area, territory and articulation points of every tick, and log them"
+    )
+    parser.add_argument(
+        "--move-timeout",
+        type=float,
+        default=None,
+        help="Seconds a bot has to answer each move, a late answer counts as an invalid move (no limit by default)"
+    )
+    parser.add_argument(
+        "--time-bank",
+        type=float,
+        default=None,
+        help="Seconds a bot has to answer all its moves in a game (no limit by default)"
+    )
+
+
+def add_log_args(parser: argparse.ArgumentParser) -> None:
+    """
+    Add the options of the event log, the metrics and the results database.
+    """
+    parser.add_argument(
+        "--log-level",
+        type=str,
+        choices=list(LEVELS),
+        default="info",
+        help="Lowest level of the events that are logged"
+    )
+    parser.add_argument(
+        "--log-file",
+        type=str,
+        default=None,
+        help="File to append every logged event to as one line of JSON"
+    )
+    parser.add_argument(
+        "--metrics-file",
+        type=str,
+        default=None,
+        help="File to write the time spent in each phase of the ticks to, in the Prometheus text format"
+    )
+    parser.add_argument(
+        "--results-db",
+        type=str,
+        default=None,
+        help="SQLite database to add the result of every match to, created if it doesn't exist"
+    )
+
 
 def get_args():
     parser = argparse.ArgumentParser(description="Run the game with specified bot Docker images.")
@@ -7,19 +112,45 @@ def get_args():
         "--bot1",
         type=str,
         default="jokkess/hackatron-random-bot",
-        help="Docker image for Bot 1"
+        help="Docker image for Bot 1, or py:<module>:<attribute> for a Python plugin"
     )
     parser.add_argument(
         "--bot2",
         type=str,
         default="jokkess/hackatron-random-bot",
-        help="Docker image for Bot 2"
+        help="Docker image for Bot 2, or py:<module>:<attribute> for a Python plugin"
+    )
+    add_local_bot_args(parser)
+    parser.add_argument(
+        "--bots",
+        type=str,
+        nargs="+",
+        default=None,
+        help="Docker images for a free-for-all game of any number of bots, instead of --bot1 and --bot2"
+    )
+    parser.add_argument(
+        "--size",
+        type=int,
+        default=16,
+        help="Size of the game board"
     )
     parser.add_argument(
         "--auto",
         action="store_true",
         help="Run the game in automatic mode without waiting for keypresses"
     )
+    parser.add_argument(
+        "--tick-rate",
+        type=float,
+        default=DEFAULT_TICK_RATE,
+        help="Maximum ticks per second in automatic mode, 0 plays the next tick as soon as both moves arrive"
+    )
+    parser.add_argument(
+        "--fps",
+        type=float,
+        default=DEFAULT_FPS,
+        help="Frames per second of the game window, independent of the tick rate"
+    )
     parser.add_argument(
         "--manual1",
         action="store_true",
@@ -30,5 +161,199 @@ def get_args():
         action="store_true",
         help="Run Bot 2 in manual mode"
     )
+    add_protocol_args(parser)
+    parser.add_argument(
+        "--replay",
+        type=str,
+        default=None,
+        help="File to record a replay of the game to"
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help="Seed for the initial positions, the same seed and moves always give the same game"
+    )
+    add_log_args(parser)
     args = parser.parse_args()
-    return args.bot1, args.bot2, args.auto, args.manual1, args.manual2
+    return args
+
+
+def get_batch_args():
+    parser = argparse.ArgumentParser(description="Run many headless games between two bot Docker images.")
+    parser.add_argument(
+        "--bot1",
+        type=str,
+        default="jokkess/hackatron-random-bot",
+        help="Docker image for Bot 1, or py:<module>:<attribute> for a Python plugin"
+    )
+    parser.add_argument(
+        "--bot2",
+        type=str,
+        default="jokkess/hackatron-random-bot",
+        help="Docker image for Bot 2, or py:<module>:<attribute> for a Python plugin"
+    )
+    add_local_bot_args(parser)
+    parser.add_argument(
+        "--games",
+        type=int,
+        default=100,
+        help="Number of games to play"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Number of worker processes (defaults to the number of CPU cores)"
+    )
+    parser.add_argument(
+        "--size",
+        type=int,
+        default=16,
+        help="Size of the game board"
+    )
+    parser.add_argument(
+        "--warm-pool",
+        type=int,
+        default=0,
+        help="Number of pre-started containers to keep ready per image and worker (0 launches one per game)"
+    )
+    parser.add_argument(
+        "--max-uses",
+        type=int,
+        default=50,
+        help="Number of games after which a warm container is replaced"
+    )
+    parser.add_argument(
+        "--replay-dir",
+        type=str,
+        default=None,
+        help="Directory to record a replay of every game to"
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help="Seed of the first game, game N uses seed + N"
+    )
+    add_protocol_args(parser)
+    add_log_args(parser)
+    return parser.parse_args()
+
+
+def get_league_args():
+    parser = argparse.ArgumentParser(description="Run a round robin league between many bot Docker images.")
+    parser.add_argument(
+        "bots",
+        type=str,
+        nargs="+",
+        help="Docker images of the bots, or py:<module>:<attribute> for Python plugins"
+    )
+    parser.add_argument(
+        "--games",
+        type=int,
+        default=2,
+        help="Number of games of every pair of bots, they switch sides after every game"
+    )
+    parser.add_argument(
+        "--size",
+        type=int,
+        default=16,
+        help="Size of the game board"
+    )
+    parser.add_argument(
+        "--cpus",
+        type=float,
+        default=None,
+        help="CPUs the bot containers can use in total (defaults to the number of CPU cores)"
+    )
+    parser.add_argument(
+        "--memory",
+        type=int,
+        default=None,
+        help="Megabytes of memory the bot containers can use in total (defaults to the physical memory)"
+    )
+    parser.add_argument(
+        "--checkpoint",
+        type=str,
+        default="league.jsonl",
+        help="File the finished matches are appended to, the matches already in it are not played again"
+    )
+    parser.add_argument(
+        "--replay-dir",
+        type=str,
+        default=None,
+        help="Directory to record a replay of every match to"
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help="Seed of the league, the seed of every match is derived from it and the id of the match"
+    )
+    add_protocol_args(parser)
+    add_log_args(parser)
+    return parser.parse_args()
+
+
+def get_results_args():
+    parser = argparse.ArgumentParser(description="Show the win rates stored in a results database.")
+    parser.add_argument(
+        "database",
+        type=str,
+        help="SQLite database written with --results-db"
+    )
+    parser.add_argument(
+        "--bot",
+        type=str,
+        default=None,
+        help="Show the results of this bot against each of its opponents instead of the totals of every bot"
+    )
+    parser.add_argument(
+        "--opponent",
+        type=str,
+        default=None,
+        help="With --bot, show the latest matches between the two bots too"
+    )
+    parser.add_argument(
+        "--limit",
+        type=int,
+        default=20,
+        help="Number of matches shown with --opponent"
+    )
+    return parser.parse_args()
+
+
+def get_render_args():
+    parser = argparse.ArgumentParser(description="Render replays to PNG frames without a display.")
+    parser.add_argument(
+        "replays",
+        nargs="+",
+        help="Replay files to render"
+    )
+    parser.add_argument(
+        "--out-dir",
+        type=str,
+        default="frames",
+        help="Directory to save the frames to, each replay of many gets its own subdirectory"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Number of worker processes (defaults to the number of CPU cores)"
+    )
+    parser.add_argument(
+        "--cell-size",
+        type=int,
+        default=30,
+        help="Size of each cell in pixels"
+    )
+    parser.add_argument(
+        "--log-level",
+        type=str,
+        choices=list(LEVELS),
+        default="error",
+        help="Lowest level of the events that are logged, the invalid moves of a replay are warnings"
+    )
+    return parser.parse_args()
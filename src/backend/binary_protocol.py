@@ -0,0 +1,195 @@
+"""
+Binary framing of the game state, sent to the bots that agree to the "binary" protocol.
+All integers little-endian:
+
+    frame    kind (u8, FRAME_STATE), payload length (u32), payload
+    payload  board size (u16), number of players of the game (u8), number of players sent (u8),
+             then every player sent, the receiving one first:
+                 number (u8), previous move (u8, 0 if it wasn't a valid move),
+                 trail length (u16), then the trail from the head to the tail
+                 as row, col (u16 each)
+             then the board, one byte per cell row by row, with the values of GameState.board
+
+The players after the first one are "opponent" in a game of two players, and the
+opponents still alive otherwise, as in GameState.serialize_for_player.
+
+The bots answer every frame with their move on one line, as with the other protocols.
+A container reused by a ContainerPool still gets the {"type": "new_game"} and "hello"
+messages between games as JSON lines; a line starts with "{", which is never the kind
+of a frame.
+
+This module only uses the standard library, so a bot written in Python can copy it and
+read the frames with read_message.
+"""
+
+import json
+import struct
+
+FRAME_STATE = 0x01
+
+FRAME_HEADER = struct.Struct("<BI")
+STATE_HEADER = struct.Struct("<HBB")
+PLAYER_HEADER = struct.Struct("<BBH")
+
+# The first byte of a JSON line
+JSON_START = b"{"[0]
+
+
+def encode_player(player) -> bytes:
+    """
+    Encode the number, previous move and trail of a player.
+
+    :param player: The player
+    :type player: Player
+    :rtype: bytes
+    """
+    trail = [pos for pos in player.position if pos is not None]
+    previous_move = player.previous_move
+    if not isinstance(previous_move, int) or not 0 <= previous_move <= 4:
+        previous_move = 0
+
+    cells = [coordinate for pos in trail for coordinate in pos]
+    return PLAYER_HEADER.pack(player.number, previous_move, len(trail)) + struct.pack(f"<{len(cells)}H", *cells)
+
+
+class BinaryStateEncoder:
+    """
+    Builds the frames of the "binary" protocol for every player of a game.
+
+    Like StateEncoder, each player is encoded once per tick and the board is kept
+    between ticks: only the rows of the cells of the trails before and after the
+    tick are copied again.
+    """
+
+    def __init__(self, game):
+        """
+        :param game: The game to encode
+        :type game: GameState | GridGameState
+        """
+        self.__game = game
+        self.__size: int = game.size
+        self.__board = bytearray(game.size * game.size)
+
+        self.__version: int | None = None
+        self.__players: dict[int, bytes] = {}
+        # The trails at the last encoding, the cells whose rows may change in the next tick
+        self.__positions: list[tuple[int, int] | None] = []
+
+    def __current_positions(self) -> list[tuple[int, int] | None]:
+        return [pos for player in self.__game.players for pos in player.position]
+
+    def __copy_row(self, row: int) -> None:
+        start = row * self.__size
+        self.__board[start:start + self.__size] = bytes(self.__game.board_row(row))
+
+    def __update(self) -> None:
+        """
+        Encode again the parts that changed since the last encoded tick.
+        """
+        game = self.__game
+        version = game.version
+        positions = self.__current_positions()
+
+        if self.__version is None or version != self.__version + 1:
+            # First encoding, or more than one change was missed: copy the whole board
+            for row in range(self.__size):
+                self.__copy_row(row)
+        else:
+            for row in {pos[0] for pos in self.__positions + positions if pos is not None}:
+                self.__copy_row(row)
+
+        self.__players = {player.number: encode_player(player) for player in game.players}
+        self.__positions = positions
+        self.__version = version
+
+    def encode_for_player(self, player_number: int) -> bytes:
+        """
+        Get the frame of the current tick for a player.
+
+        :param player_number: The number of the player
+        :type player_number: int
+        :return: The frame, header included
+        :rtype: bytes
+        """
+        if self.__version != self.__game.version:
+            self.__update()
+
+        if player_number not in self.__players:
+            raise ValueError("Número de jugador no válido")
+
+        players = self.__game.players
+        if len(players) == 2:
+            others = [player.number for player in players if player.number != player_number]
+        else:
+            others = [player.number for player in self.__game.alive_players if player.number != player_number]
+
+        payload = b"".join((
+            STATE_HEADER.pack(self.__size, len(players), 1 + len(others)),
+            self.__players[player_number],
+            *(self.__players[number] for number in others),
+            self.__board,
+        ))
+        return FRAME_HEADER.pack(FRAME_STATE, len(payload)) + payload
+
+
+def decode_state(payload: bytes) -> dict:
+    """
+    Decode the payload of a state frame into the dictionary of the "full" protocol,
+    as GameState.serialize_for_player would give it. The players also have their "number".
+
+    :param payload: The payload, without the frame header
+    :type payload: bytes
+    :rtype: dict
+    """
+    view = memoryview(payload)
+    size, n_players, count = STATE_HEADER.unpack_from(view, 0)
+    offset = STATE_HEADER.size
+
+    players = []
+    for _ in range(count):
+        number, previous_move, length = PLAYER_HEADER.unpack_from(view, offset)
+        offset += PLAYER_HEADER.size
+        cells = struct.unpack_from(f"<{2 * length}H", view, offset)
+        offset += 4 * length
+        trail = [{"x": cells[i], "y": cells[i + 1]} for i in range(0, 2 * length, 2)]
+        players.append({
+            "number": number,
+            "head": trail[0] if trail else None,
+            "trail": trail,
+            "previous_move": previous_move,
+        })
+
+    board = [list(view[start:start + size]) for start in range(offset, offset + size * size, size)]
+
+    state = {"board_size": size, "me": players[0], "board": board}
+    if n_players == 2:
+        state["opponent"] = players[1]
+    else:
+        state["opponents"] = players[1:]
+    return state
+
+
+def read_message(stream) -> dict | None:
+    """
+    Read the next message from the server: a state frame, decoded with decode_state,
+    or a JSON line like the "new_game" message of a reused container.
+
+    :param stream: The binary stream the server writes to, e.g. sys.stdin.buffer
+    :return: The message, None at the end of the stream
+    :rtype: dict | None
+    """
+    first = stream.read(1)
+    if not first:
+        return None
+
+    if first[0] == JSON_START:
+        return json.loads(first + stream.readline())
+
+    header = first + stream.read(FRAME_HEADER.size - 1)
+    kind, length = FRAME_HEADER.unpack(header)
+    if kind != FRAME_STATE:
+        raise ValueError(f"Unknown frame kind {kind}")
+    payload = stream.read(length)
+    if len(payload) != length:
+        return None
+    return decode_state(payload)
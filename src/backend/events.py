@@ -0,0 +1,199 @@
+"""
+Structured event log.
+
+Every event is a dict with the time, the level, the name of the event, the fields of
+the current context (e.g. the match and the tick) and its own fields. Events below
+the level of the log are dropped before anything is built, so disabled levels cost
+one comparison.
+
+The context is kept in a ContextVar, so each asyncio task sees the context it was
+created in: set_context(tick=...) before gathering the moves reaches every bot.
+"""
+
+import contextvars
+import json
+import sys
+import time
+from collections import deque
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+
+LEVELS = {"debug": DEBUG, "info": INFO, "warning": WARNING, "error": ERROR}
+LEVEL_NAMES = {level: name for name, level in LEVELS.items()}
+
+_context: contextvars.ContextVar[dict | None] = contextvars.ContextVar("event_context", default=None)
+
+
+class MemorySink:
+    """
+    Keeps the events in memory, the last `maxlen` of them if given.
+    """
+
+    def __init__(self, maxlen: int | None = None):
+        self.events: deque[dict] = deque(maxlen=maxlen)
+
+    def write(self, event: dict) -> None:
+        self.events.append(event)
+
+    def close(self) -> None:
+        pass
+
+
+class JsonLinesSink:
+    """
+    Appends every event to a file as one line of JSON.
+
+    The file is line buffered and opened for appending, so many processes can
+    write to the same file without mixing their lines.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.__file = open(path, "a", encoding="utf-8", buffering=1)
+
+    def write(self, event: dict) -> None:
+        self.__file.write(json.dumps(event, default=str) + "\n")
+
+    def close(self) -> None:
+        self.__file.close()
+
+
+class ConsoleSink:
+    """
+    Prints every event as one readable line, e.g. "[warning] move_timeout tick=3 bot=...".
+    """
+
+    def __init__(self, stream=None):
+        """
+        :param stream: Where to print, sys.stdout at the time of each event if not given
+        """
+        self.stream = stream
+
+    def write(self, event: dict) -> None:
+        fields = " ".join(
+            f"{key}={value}" for key, value in event.items()
+            if key not in ("time", "level", "event", "text")
+        )
+        line = f"[{event['level']}] {event['event']}" + (f" {fields}" if fields else "")
+        if "text" in event:
+            line += "\n" + str(event["text"])
+        print(line, file=self.stream or sys.stdout)
+
+    def close(self) -> None:
+        pass
+
+
+class EventLog:
+    """
+    Sends the events at or above `level` to every sink.
+    """
+
+    def __init__(self, level: int = INFO, sinks: list | None = None):
+        """
+        :param level: The lowest level that is logged
+        :type level: int
+        :param sinks: Where the events go, each one with write(event) and close()
+        :type sinks: list | None
+        """
+        self.level = level
+        self.sinks = sinks if sinks is not None else []
+
+    def enabled(self, level: int) -> bool:
+        """
+        Check if events of the given level are logged, to skip building costly fields.
+
+        :rtype: bool
+        """
+        return level >= self.level
+
+    def emit(self, level: int, event: str, **fields) -> None:
+        """
+        Log an event.
+
+        :param level: The level of the event
+        :type level: int
+        :param event: The name of the event
+        :type event: str
+        :param fields: The data of the event
+        """
+        if level < self.level:
+            return
+
+        record = {"time": time.time(), "level": LEVEL_NAMES.get(level, level), "event": event}
+        context = _context.get()
+        if context:
+            record.update(context)
+        record.update(fields)
+        for sink in self.sinks:
+            sink.write(record)
+
+    def debug(self, event: str, **fields) -> None:
+        if DEBUG >= self.level:
+            self.emit(DEBUG, event, **fields)
+
+    def info(self, event: str, **fields) -> None:
+        if INFO >= self.level:
+            self.emit(INFO, event, **fields)
+
+    def warning(self, event: str, **fields) -> None:
+        if WARNING >= self.level:
+            self.emit(WARNING, event, **fields)
+
+    def error(self, event: str, **fields) -> None:
+        if ERROR >= self.level:
+            self.emit(ERROR, event, **fields)
+
+    def close(self) -> None:
+        for sink in self.sinks:
+            sink.close()
+
+
+# The log used by the server, printing to the console until configure is called
+log = EventLog(INFO, [ConsoleSink()])
+
+
+def configure(level: int = INFO, log_file: str | None = None, console: bool = True) -> EventLog:
+    """
+    Set the level and the sinks of the server's log.
+
+    :param level: The lowest level that is logged
+    :type level: int
+    :param log_file: A file to append the events to as JSON lines, if any
+    :type log_file: str | None
+    :param console: Whether to print the events too
+    :type console: bool
+    :return: The server's log
+    :rtype: EventLog
+    """
+    log.close()
+    log.level = level
+    log.sinks = []
+    if console:
+        log.sinks.append(ConsoleSink())
+    if log_file:
+        log.sinks.append(JsonLinesSink(log_file))
+    return log
+
+
+def set_context(**fields) -> None:
+    """
+    Add fields to the context of the events logged from now on in this task
+    and the tasks it creates. A field set to None is removed.
+    """
+    context = dict(_context.get() or {})
+    for key, value in fields.items():
+        if value is None:
+            context.pop(key, None)
+        else:
+            context[key] = value
+    _context.set(context)
+
+
+def clear_context() -> None:
+    """
+    Remove every field from the context of this task.
+    """
+    _context.set(None)
@@ -0,0 +1,283 @@
+import asyncio
+import time
+from random import Random
+
+from src.backend.consts import PLAYERS_COLLIDED, BOTH_DEAD
+from src.backend.events import log, set_context
+from src.backend.analysis import BoardAnalysis
+from src.backend.metrics import (
+    Metrics, PHASE_SERIALIZE, PHASE_ROUND_TRIP, PHASE_TICK, PHASE_ANALYSIS, TICKS, INVALID_MOVES,
+)
+from src.backend.GameState import GameState
+from src.backend.player import Player
+from src.backend.replay import ReplayWriter
+
+from src.backend.players.player_input import IPlayerType
+from src.backend.players.bot_player import BotPlayer, FEATURE_ANALYSIS
+from src.backend.players.container_pool import ContainerPools
+from src.backend.players.human_player import HumanPlayer
+from src.backend.players.local_process_player import LocalProcessPlayer, ResourceLimits
+from src.backend.players.plugin_player import PluginPlayer, is_plugin
+
+
+def create_player(
+    bot_image: str | None,
+    is_manual: bool,
+    bot_command: str | None = None,
+    resource_limits: ResourceLimits | None = None,
+    **bot_options
+) -> IPlayerType:
+    """
+    Create a player instance based on whether it's manual, a local bot, a Python plugin or a Docker bot.
+
+    :param bot_image: The Docker image for the bot player, or "py:<module>:<attribute>" for a plugin.
+    :type bot_image: str | None
+    :param is_manual: Flag indicating if the player is manual.
+    :type is_manual: bool
+    :param bot_command: A command that runs the bot as a local process, used instead of the image.
+    :type bot_command: str | None
+    :param resource_limits: The limits of a local bot process, if any.
+    :type resource_limits: ResourceLimits | None
+    :param bot_options: Keyword arguments for BotPlayer (offered_protocols, pool, move_timeout...),
+        and isolated for PluginPlayer.
+    :return: An instance of IPlayerType (HumanPlayer, LocalProcessPlayer, PluginPlayer or BotPlayer).
+    :rtype: IPlayerType
+    """
+    isolated = bot_options.pop("isolated", False)
+    if is_manual:
+        return HumanPlayer()
+
+    if is_plugin(bot_image) and not bot_command:
+        return PluginPlayer(bot_image, isolated, **bot_options)
+
+    if bot_command:
+        bot_options.pop("pool", None)
+        return LocalProcessPlayer(bot_command, resource_limits, **bot_options)
+
+    return BotPlayer(bot_image, **bot_options)
+
+
+async def timed_move(player_input: IPlayerType, state: str, metrics: Metrics) -> int:
+    """
+    Get a move from a player and record the time it took as its PHASE_ROUND_TRIP.
+    """
+    start = time.perf_counter()
+    move = await player_input.get_move(state)
+    metrics.histogram(PHASE_ROUND_TRIP, bot=player_input.name).observe(time.perf_counter() - start)
+    return move
+
+
+async def get_moves(game: GameState, *player_inputs: IPlayerType, metrics: Metrics | None = None) -> tuple[int, ...]:
+    """
+    Get moves from all the players still in the game concurrently.
+
+    :param game: The current game state.
+    :type game: GameState
+    :param player_inputs: The input of every player of the game, in number order
+    :type player_inputs: IPlayerType
+    :param metrics: Where to record the time spent encoding the states and waiting for each bot, if anywhere
+    :type metrics: Metrics | None
+    :return: A tuple containing the move of every player. Players out of the game,
+        and the ones that gave an invalid move, repeat their previous move.
+    :rtype: tuple[int, ...]
+    """
+    players = game.alive_players
+
+    if metrics is None:
+        states = [player_inputs[player.number - 1].encode_state(game, player.number) for player in players]
+        replies = await asyncio.gather(*(
+            player_inputs[player.number - 1].get_move(state)
+            for player, state in zip(players, states)
+        ))
+    else:
+        states = []
+        for player in players:
+            player_input = player_inputs[player.number - 1]
+            start = time.perf_counter()
+            states.append(player_input.encode_state(game, player.number))
+            metrics.histogram(PHASE_SERIALIZE, bot=player_input.name).observe(time.perf_counter() - start)
+        replies = await asyncio.gather(*(
+            timed_move(player_inputs[player.number - 1], state, metrics)
+            for player, state in zip(players, states)
+        ))
+
+    moves = [player.previous_move for player in game.players]
+    for player, move in zip(players, replies):
+        if Player.is_valid_move(move):
+            moves[player.number - 1] = move
+        elif metrics is not None:
+            metrics.counter(INVALID_MOVES, bot=player_inputs[player.number - 1].name).inc()
+
+    return tuple(moves)
+
+
+def analyze_tick(game: GameState, metrics: Metrics | None = None) -> BoardAnalysis:
+    """
+    Compute the analysis of the current tick before the states are encoded, so every bot
+    that asked for it gets the same one, and log it.
+
+    :param game: The current game state.
+    :type game: GameState
+    :param metrics: Where to record the time it took as PHASE_ANALYSIS, if anywhere
+    :type metrics: Metrics | None
+    :rtype: BoardAnalysis
+    """
+    start = time.perf_counter()
+    analysis = game.analysis()
+    if metrics is not None:
+        metrics.histogram(PHASE_ANALYSIS).observe(time.perf_counter() - start)
+    log.debug(
+        "tick_analysis",
+        reachable=analysis.reachable,
+        territory=analysis.territory,
+        articulation_points=len(analysis.articulation_points),
+    )
+    return analysis
+
+
+def log_metrics(metrics: Metrics) -> None:
+    """
+    Log the summary of the metrics of a match.
+    """
+    log.info("match_metrics", **metrics.summary())
+
+
+def describe_outcome(collision: Player | int | None) -> str | None:
+    """
+    Get a printable name for the value returned by the last GameState.tick.
+
+    :param collision: The value returned by GameState.tick
+    :type collision: Player | int | None
+    :return: "player", "players_collided", "both_dead" or None if the game did not end
+    :rtype: str | None
+    """
+    if collision is None:
+        return None
+    if isinstance(collision, Player):
+        return "player"
+    if collision == PLAYERS_COLLIDED:
+        return "players_collided"
+    if collision == BOTH_DEAD:
+        return "both_dead"
+
+    raise ValueError(f"Unknown collision type: {collision}")
+
+
+async def run_match(
+    bot_1_image: str,
+    bot_2_image: str,
+    size: int = 16,
+    pools: ContainerPools | None = None,
+    bot_options: dict | None = None,
+    replay_path: str | None = None,
+    seed: int | None = None,
+    bot_commands: tuple[str | None, str | None] = (None, None),
+    resource_limits: ResourceLimits | None = None,
+    match_id: str | None = None
+) -> dict:
+    """
+    Launch both bots, play a full headless match between them and clean up.
+
+    The result has the following keys:
+    - "bot_1", "bot_2": the images (or local commands) that played.
+    - "winner": PLAYER_1, PLAYER_2 or None on a draw.
+    - "outcome": see describe_outcome.
+    - "ticks": the number of ticks played.
+    - "duration": wall clock seconds spent playing (initialization excluded).
+    - "seed": the seed of the initial positions, None if they were random.
+    - "territory": the mean territory of each player per tick (see BoardAnalysis) if the
+      bots were offered FEATURE_ANALYSIS, None otherwise.
+    - "metrics": the Metrics of the match, see get_moves.
+
+    :param bot_1_image: The Docker image for Bot 1
+    :type bot_1_image: str
+    :param bot_2_image: The Docker image for Bot 2
+    :type bot_2_image: str
+    :param size: The size of the game board
+    :type size: int
+    :param pools: Warm containers to play with instead of launching new ones.
+    :type pools: ContainerPools | None
+    :param bot_options: Keyword arguments for both BotPlayers, see create_player.
+    :type bot_options: dict | None
+    :param replay_path: The file to record a replay of the match to, if any.
+    :type replay_path: str | None
+    :param seed: The seed for the initial positions, random if not given.
+    :type seed: int | None
+    :param bot_commands: Commands that run each bot as a local process instead of its image.
+    :type bot_commands: tuple[str | None, str | None]
+    :param resource_limits: The limits of the local bot processes, if any.
+    :type resource_limits: ResourceLimits | None
+    :param match_id: The id of the match in the events logged while it's played.
+    :type match_id: str | None
+    :return: The result of the match
+    :rtype: dict
+    :raises RuntimeError: If any of the bots could not be initialized
+    """
+    bot_options = bot_options or {}
+    set_context(match=match_id, tick=None)
+    metrics = Metrics(match=match_id)
+    tick_time = metrics.histogram(PHASE_TICK)
+    command_1, command_2 = bot_commands
+    pool_1 = await pools.get(bot_1_image) if pools and not command_1 and not is_plugin(bot_1_image) else None
+    pool_2 = await pools.get(bot_2_image) if pools and not command_2 and not is_plugin(bot_2_image) else None
+
+    player_1_input: IPlayerType = create_player(
+        bot_1_image, False, command_1, resource_limits, pool=pool_1, **bot_options
+    )
+    player_2_input: IPlayerType = create_player(
+        bot_2_image, False, command_2, resource_limits, pool=pool_2, **bot_options
+    )
+    bot_1_name, bot_2_name = command_1 or bot_1_image, command_2 or bot_2_image
+
+    replay = None
+    try:
+        init_results = await asyncio.gather(
+            player_1_input.initialize(),
+            player_2_input.initialize()
+        )
+        if not all(init_results):
+            raise RuntimeError(f"Failed to initialize players {bot_1_name} and {bot_2_name}")
+
+        game = GameState(size, rng=Random(seed) if seed is not None else None)
+        if replay_path is not None:
+            replay = ReplayWriter(replay_path, game, (bot_1_name, bot_2_name))
+
+        analyze = FEATURE_ANALYSIS in (bot_options.get("offered_features") or ())
+        territory = [0, 0]
+        ticks = 0
+        start = time.perf_counter()
+        collision = None
+        while not game.game_over:
+            set_context(tick=game.tick_count)
+            if analyze:
+                territory = [total + cells for total, cells in zip(territory, analyze_tick(game, metrics).territory)]
+            move_1, move_2 = await get_moves(game, player_1_input, player_2_input, metrics=metrics)
+            tick_start = time.perf_counter()
+            collision = game.tick(move_1, move_2)
+            tick_time.observe(time.perf_counter() - tick_start)
+            if replay is not None:
+                replay.record(move_1, move_2, collision)
+            ticks += 1
+        duration = time.perf_counter() - start
+        set_context(tick=None)
+        metrics.counter(TICKS).inc(ticks)
+        log_metrics(metrics)
+    finally:
+        if replay is not None:
+            replay.close()
+        await asyncio.gather(
+            player_1_input.cleanup(),
+            player_2_input.cleanup()
+        )
+
+    return {
+        "bot_1": bot_1_name,
+        "bot_2": bot_2_name,
+        "winner": game.winner.number if game.winner else None,
+        "outcome": describe_outcome(collision),
+        "ticks": ticks,
+        "duration": duration,
+        "seed": seed,
+        "territory": [total / ticks for total in territory] if analyze and ticks else None,
+        "metrics": metrics,
+    }
@@ -0,0 +1,249 @@
+"""
+Histograms and counters of where the time of each tick goes, exported in the
+Prometheus text format.
+
+Observing a value is a bisect and three additions, so the metrics are cheap enough
+to be always collected. Every series has a name and labels, e.g. the bot of the
+player for PHASE_ROUND_TRIP; the constant labels of a Metrics (e.g. the match) are
+added to all its series when exported, and dropped when it's merged into another one,
+so merging the metrics of many matches gives the totals per bot.
+"""
+
+import math
+import os
+from bisect import bisect_left
+
+# Seconds spent in each phase of a tick
+PHASE_SERIALIZE = "serialize_seconds"    # encoding the state for one player, label bot
+PHASE_ROUND_TRIP = "round_trip_seconds"  # sending the state to one bot and reading its move, label bot
+PHASE_TICK = "tick_seconds"              # GameState.tick
+PHASE_ANALYSIS = "analysis_seconds"      # GameState.analysis, when the bots are offered it
+PHASE_RENDER = "render_seconds"          # drawing one frame
+
+TICKS = "ticks_total"
+INVALID_MOVES = "invalid_moves_total"  # label bot
+
+PHASES = (PHASE_SERIALIZE, PHASE_ROUND_TRIP, PHASE_TICK, PHASE_ANALYSIS, PHASE_RENDER)
+
+# Upper bounds in seconds, from the microseconds of the engine to the timeouts of the bots
+DEFAULT_BUCKETS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5,
+)
+
+PREFIX = "hackatron_"
+
+
+class Histogram:
+    """
+    Counts the observed values in buckets, like a Prometheus histogram.
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        """
+        :param buckets: The sorted upper bounds of the buckets, +Inf is added after the last one
+        :type buckets: tuple[float, ...]
+        """
+        self.buckets = buckets
+        self.counts: list[int] = [0] * (len(buckets) + 1)
+        self.sum: float = 0.0
+        self.count: int = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def merge(self, other: "Histogram") -> None:
+        if other.buckets != self.buckets:
+            raise ValueError("Can't merge histograms with different buckets")
+        for index, count in enumerate(other.counts):
+            self.counts[index] += count
+        self.sum += other.sum
+        self.count += other.count
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimate a quantile as the upper bound of the bucket it falls in.
+
+        :param q: The quantile, between 0 and 1
+        :type q: float
+        :return: The estimate, +Inf if it's past the last bucket and NaN if nothing was observed
+        :rtype: float
+        """
+        if not self.count:
+            return math.nan
+
+        rank = max(1, math.ceil(q * self.count))
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return math.inf
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "mean": self.sum / self.count if self.count else math.nan,
+            "p50": self.quantile(0.5),
+            "p99": self.quantile(0.99),
+        }
+
+
+class Counter:
+    def __init__(self):
+        self.value: float = 0
+
+    def inc(self, amount: float = 1) -> None:
+        self.value += amount
+
+    def merge(self, other: "Counter") -> None:
+        self.value += other.value
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        f'{key}="' + str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+        for key, value in labels.items()
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metrics:
+    """
+    The histograms and counters of a match, or of many merged together.
+    """
+
+    def __init__(self, **labels):
+        """
+        :param labels: Labels of every series, e.g. match="..."
+        """
+        self.labels = {key: value for key, value in labels.items() if value is not None}
+        self.__histograms: dict[tuple[str, tuple], Histogram] = {}
+        self.__counters: dict[tuple[str, tuple], Counter] = {}
+
+    def histogram(self, name: str, **labels) -> Histogram:
+        """
+        Get the histogram of a series, creating it if needed.
+        Keep it to observe many values without looking it up again.
+
+        :param name: The name of the series, e.g. PHASE_TICK
+        :type name: str
+        :param labels: The labels of the series
+        :rtype: Histogram
+        """
+        key = (name, tuple(sorted(labels.items())))
+        histogram = self.__histograms.get(key)
+        if histogram is None:
+            histogram = self.__histograms[key] = Histogram()
+        return histogram
+
+    def counter(self, name: str, **labels) -> Counter:
+        """
+        Get the counter of a series, creating it if needed.
+
+        :param name: The name of the series, e.g. TICKS
+        :type name: str
+        :param labels: The labels of the series
+        :rtype: Counter
+        """
+        key = (name, tuple(sorted(labels.items())))
+        counter = self.__counters.get(key)
+        if counter is None:
+            counter = self.__counters[key] = Counter()
+        return counter
+
+    def merge(self, other: "Metrics") -> None:
+        """
+        Add the series of another Metrics to these, without its constant labels.
+
+        :param other: The metrics to add
+        :type other: Metrics
+        """
+        for (name, labels), histogram in other.__histograms.items():
+            self.histogram(name, **dict(labels)).merge(histogram)
+        for (name, labels), counter in other.__counters.items():
+            self.counter(name, **dict(labels)).merge(counter)
+
+    def combined(self, name: str) -> Histogram:
+        """
+        Get all the series of a histogram merged into one, whatever their labels.
+
+        :param name: The name of the series, e.g. PHASE_ROUND_TRIP
+        :type name: str
+        :rtype: Histogram
+        """
+        combined = Histogram()
+        for (series_name, _), histogram in self.__histograms.items():
+            if series_name == name:
+                combined.merge(histogram)
+        return combined
+
+    def summary(self) -> dict:
+        """
+        Get the count, mean and estimated p50 and p99 of every histogram and the value of every counter.
+
+        :return: The summaries by series, e.g. "round_trip_seconds{bot=...}"
+        :rtype: dict
+        """
+        summary = {}
+        for (name, labels), histogram in sorted(self.__histograms.items()):
+            summary[name + _format_labels(dict(labels))] = histogram.summary()
+        for (name, labels), counter in sorted(self.__counters.items()):
+            summary[name + _format_labels(dict(labels))] = counter.value
+        return summary
+
+    def to_prometheus(self) -> str:
+        """
+        Export every series in the Prometheus text format.
+
+        :rtype: str
+        """
+        lines = []
+        by_name: dict[str, list] = {}
+        for (name, labels), histogram in sorted(self.__histograms.items()):
+            by_name.setdefault(name, []).append((labels, histogram))
+        for name, series in by_name.items():
+            lines.append(f"# TYPE {PREFIX}{name} histogram")
+            for labels, histogram in series:
+                labels = {**self.labels, **dict(labels)}
+                cumulative = 0
+                for bound, count in zip(histogram.buckets + (math.inf,), histogram.counts):
+                    cumulative += count
+                    bucket_labels = _format_labels({**labels, "le": _format_value(bound)})
+                    lines.append(f"{PREFIX}{name}_bucket{bucket_labels} {cumulative}")
+                lines.append(f"{PREFIX}{name}_sum{_format_labels(labels)} {_format_value(histogram.sum)}")
+                lines.append(f"{PREFIX}{name}_count{_format_labels(labels)} {histogram.count}")
+
+        by_name = {}
+        for (name, labels), counter in sorted(self.__counters.items()):
+            by_name.setdefault(name, []).append((labels, counter))
+        for name, series in by_name.items():
+            lines.append(f"# TYPE {PREFIX}{name} counter")
+            for labels, counter in series:
+                labels = {**self.labels, **dict(labels)}
+                lines.append(f"{PREFIX}{name}{_format_labels(labels)} {_format_value(counter.value)}")
+
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str) -> None:
+        """
+        Write the metrics to a file in the Prometheus text format, e.g. for the textfile
+        collector of node_exporter. The file is replaced at once, so it's never read half written.
+
+        :param path: The path of the file
+        :type path: str
+        """
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "w", encoding="utf-8") as file:
+            file.write(self.to_prometheus())
+        os.replace(temporary, path)
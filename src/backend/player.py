@@ -1,14 +1,33 @@
-from random import randint
+import math
+from array import array
+from random import Random, randint, shuffle
 
-from .consts import PLAYER_1, PLAYER_2, N_STELLA, MOVE_DOWN, MOVE_LEFT, MOVE_RIGHT, MOVE_UP
+from .events import log
+from .consts import PLAYER_1, PLAYER_2, N_STELLA, WALL, MOVE_DOWN, MOVE_LEFT, MOVE_RIGHT, MOVE_UP
+
+# (row, col) offset of each move
+MOVE_OFFSETS = {MOVE_LEFT: (0, -1), MOVE_UP: (-1, 0), MOVE_RIGHT: (0, 1), MOVE_DOWN: (1, 0)}
 
 
 class Player:
     """
     Class representing a player in the game.
+
+    The trail is kept in a ring of N_STELLA + 1 cells: a move writes the new head over
+    the oldest cell instead of building a new list. How many segments of the trail are on
+    each cell of the board is counted as the trail moves, so the checks of whether a cell
+    is on the trail (e.g. a suicide) don't scan it.
     """
 
-    def __init__(self, number: int, size: int):
+    __slots__ = ("__number", "__size", "__cells", "__head", "__counts", "__previous_move")
+
+    def __init__(
+        self,
+        number: int,
+        size: int,
+        initial_position: tuple[int, int] | None = None,
+        rng: Random | None = None
+    ):
         """
         Initializes the player with a number and an initial position.
 
@@ -16,9 +35,21 @@ class Player:
         :type number: int
         :param size: The size of the board
         :type size: int
+        :param initial_position: The initial position, a random one in the player's zone if not given
+        :type initial_position: tuple[int, int] | None
+        :param rng: The random number generator for the initial position, the global one if not given
+        :type rng: Random | None
         """
         self.__number: int = number
-        self.__position: list[tuple[int, int]] = [self.__generate_initial_position(size)] + [None] * N_STELLA
+        self.__size: int = size
+        if initial_position is None:
+            initial_position = self.__generate_initial_position(size, rng)
+        # The ring of the trail, the head is at __head and the older segments follow it
+        self.__cells: list[tuple[int, int] | None] = [initial_position] + [None] * N_STELLA
+        self.__head: int = 0
+        # Segments of the trail on each cell, indexed by row * size + col
+        self.__counts: array = array("H", bytes(2 * size * size))
+        self.__counts[initial_position[0] * size + initial_position[1]] = 1
         self.__previous_move: int = 0  # 0 means no previous move
 
     @property
@@ -30,6 +61,17 @@ class Player:
         """
         return self.__number
 
+    @property
+    def board_value(self) -> int:
+        """
+        Get the value of the player's cells on the game board.
+        It's the player number, skipping WALL for games of more than two players.
+
+        :return: The value of the player's cells
+        :rtype: int
+        """
+        return self.__number if self.__number < WALL else self.__number + 1
+
     @property
     def previous_move(self) -> int:
         """
@@ -42,11 +84,54 @@ class Player:
     @property
     def position(self) -> list[tuple[int, int]]:
         """
-        Get the current position of the player.
+        Get the current position of the player: the trail from the head to the tail,
+        with None for the segments not placed yet.
+
+        It's a new list every time, use head, tail, segment and count where they do.
+
         :return: The current position
         :rtype: list[tuple[int, int]]
         """
-        return self.__position
+        return self.__cells[self.__head:] + self.__cells[:self.__head]
+
+    @property
+    def head(self) -> tuple[int, int]:
+        """
+        Get the position of the head, position[0].
+
+        :rtype: tuple[int, int]
+        """
+        return self.__cells[self.__head]
+
+    @property
+    def tail(self) -> tuple[int, int] | None:
+        """
+        Get the last segment of the trail, position[-1], the one the next move drops.
+
+        :return: The position of the last segment, None while the trail is still growing
+        :rtype: tuple[int, int] | None
+        """
+        return self.__cells[self.__head - 1]
+
+    def segment(self, index: int) -> tuple[int, int] | None:
+        """
+        Get one segment of the trail, position[index].
+
+        :param index: The index of the segment from the head, 0 to N_STELLA
+        :type index: int
+        :rtype: tuple[int, int] | None
+        """
+        return self.__cells[(self.__head + index) % (N_STELLA + 1)]
+
+    def count(self, pos: tuple[int, int]) -> int:
+        """
+        Get how many segments of the trail are on a cell, position.count(pos).
+
+        :param pos: The (row, col) of the cell
+        :type pos: tuple[int, int]
+        :rtype: int
+        """
+        return self.__counts[pos[0] * self.__size + pos[1]]
 
     def serialize(self) -> dict:
         """
@@ -68,28 +153,23 @@ class Player:
             "previous_move": self.__previous_move,
         }
 
-    def __get_new_position(self, move: int) -> tuple[int, int]:
+    def serialize_delta(self, freed: tuple[int, int] | None) -> dict:
         """
-        Calculate the new position of the player based on the move
-        PRE: The move is valid (1 <= move <= 4)
+        Serialize the changes of the player's trail in the last tick.
 
-        :param move: The move to make
-        :type move: int
+        :param freed: The cell freed at the tail of the trail in the last tick, if any
+        :type freed: tuple[int, int] | None
 
-        :return: The new position of the player
-        :rtype: tuple[int, int]
+        :return: The serialized changes
+        :rtype: dict
         """
-        match move:
-            case 1:  # Move left
-                new_pos = (self.position[0][0], self.position[0][1] - 1)
-            case 2:  # Move up
-                new_pos = (self.position[0][0] - 1, self.position[0][1])
-            case 3:  # Move right
-                new_pos = (self.position[0][0], self.position[0][1] + 1)
-            case 4:  # Move down
-                new_pos = (self.position[0][0] + 1, self.position[0][1])
+        head = self.head
 
-        return new_pos
+        return {
+            "head": {"x": head[0], "y": head[1]},
+            "freed": {"x": freed[0], "y": freed[1]} if freed is not None else None,
+            "previous_move": self.__previous_move,
+        }
 
     @staticmethod
     def is_valid_move(move: int) -> bool:
@@ -108,25 +188,68 @@ class Player:
     def move(self, move: int) -> None:
         """
         Move the player in the given direction.
-        If the move is invalid, the player will use the previous move instead.
+        If the move is invalid, the player will use the previous move instead, MOVE_UP if there is none.
 
         :param move: The move to make
         :type move: int
+        :raises InvalidMoveError: If the move is invalid and so was the previous one
         """
-        try:
-            new_position = self.__get_new_position(move)
-        except Exception as e:
-            if self.__previous_move == 0:
-                new_position = self.__get_new_position(MOVE_UP)
-                print(f"Invalid move {move} for player {self.__number}. No previous move available, using MOVE_UP instead. Error: {e}")
-            else:
-                new_position = self.__get_new_position(self.__previous_move)
-                print(f"Invalid move {move} for player {self.__number}. Using previous move instead: {self.__previous_move}. Error: {e}")
-
-        self.__position = [new_position] + self.__position[:-1]
+        offset = self.__offset(move)
+        if offset is None:
+            used = MOVE_UP if self.__previous_move == 0 else self.__previous_move
+            offset = self.__offset(used)
+            if offset is None:
+                raise InvalidMoveError(f"Invalid move {move} after the invalid move {used} for player {self.__number}")
+            log.warning("invalid_move", player=self.__number, move=move, used=used)
+
+        cells, counts, size = self.__cells, self.__counts, self.__size
+        head = cells[self.__head]
+        new_position = (head[0] + offset[0], head[1] + offset[1])
+
+        # The new head takes the place of the tail
+        self.__head = index = self.__head - 1 if self.__head else N_STELLA
+        tail = cells[index]
+        if tail is not None:
+            counts[tail[0] * size + tail[1]] -= 1
+        cells[index] = new_position
+        counts[new_position[0] * size + new_position[1]] += 1
         self.__previous_move = move
 
-    def __generate_initial_position(self, size: int) -> tuple[int, int]:
+    @staticmethod
+    def __offset(move: int) -> tuple[int, int] | None:
+        """
+        Get the (row, col) offset of a move.
+
+        :param move: The move
+        :type move: int
+        :return: The offset, None if the move is invalid
+        :rtype: tuple[int, int] | None
+        """
+        try:
+            return MOVE_OFFSETS.get(move)
+        except TypeError:  # Not even hashable
+            return None
+
+    def unmove(self, tail: tuple[int, int] | None, previous_move: int) -> None:
+        """
+        Undo the last move, e.g. when a search goes back up its tree.
+
+        :param tail: The last position of the trail before the move, the one the move dropped
+        :type tail: tuple[int, int] | None
+        :param previous_move: The previous move before the move
+        :type previous_move: int
+        """
+        cells, counts, size = self.__cells, self.__counts, self.__size
+        index = self.__head
+        head = cells[index]
+        counts[head[0] * size + head[1]] -= 1
+        cells[index] = tail
+        if tail is not None:
+            counts[tail[0] * size + tail[1]] += 1
+        self.__head = index + 1 if index < N_STELLA else 0
+        self.__previous_move = previous_move
+
+    def __generate_initial_position(self, size: int, rng: Random | None = None) -> tuple[int, int]:
         """
         Generate the random initial position for the player
 
@@ -149,16 +272,20 @@ class Player:
 
         :param size: The size of the board
         :type size: int
+        :param rng: The random number generator to use, the global one if not given
+        :type rng: Random | None
         :return: The initial position of the player
         :rtype: tuple[int, int]
         """
+        random_int = rng.randint if rng is not None else randint
+
         if self.__number == PLAYER_1:
-            col = randint(2, size - 2)
-            row = randint(1, col - 1)
+            col = random_int(2, size - 2)
+            row = random_int(1, col - 1)
 
         elif self.__number == PLAYER_2:
-            row = randint(2, size - 2)
-            col = randint(1, row - 1)
+            row = random_int(2, size - 2)
+            col = random_int(1, row - 1)
 
         else:
             raise InvalidPlayerNumberError(f"Invalid player number: {self.__number}")
@@ -172,8 +299,54 @@ class Player:
         :return: True if the player suicided, False otherwise
         :rtype: bool
         """
-        return self.position[0] in self.position[1:]
+        return self.__counts[self.head[0] * self.__size + self.head[1]] > 1
+
+
+def spawn_positions(size: int, count: int, rng: Random | None = None) -> list[tuple[int, int]]:
+    """
+    Generate random initial positions for the players of a game of more than two players.
+
+    The inside of the board is split in a grid of blocks with at least one block per
+    player, and each player starts in a different random block, away from its edges
+    when the block is big enough.
+
+    :param size: The size of the board
+    :type size: int
+    :param count: The number of players
+    :type count: int
+    :param rng: The random number generator to use, the global one if not given
+    :type rng: Random | None
+    :return: The initial position of each player, in player number order
+    :rtype: list[tuple[int, int]]
+    """
+    random_int = rng.randint if rng is not None else randint
+    random_shuffle = rng.shuffle if rng is not None else shuffle
+
+    blocks = math.ceil(math.sqrt(count))
+    inner = size - 2
+    if inner < blocks:
+        raise ValueError(f"A {size}x{size} board is too small for {count} players")
+
+    edges = [1 + inner * i // blocks for i in range(blocks + 1)]
+    cells = [(row, col) for row in range(blocks) for col in range(blocks)]
+    random_shuffle(cells)
+
+    positions = []
+    for block_row, block_col in cells[:count]:
+        top, bottom = edges[block_row], edges[block_row + 1] - 1
+        left, right = edges[block_col], edges[block_col + 1] - 1
+        if bottom - top >= 2:
+            top, bottom = top + 1, bottom - 1
+        if right - left >= 2:
+            left, right = left + 1, right - 1
+        positions.append((random_int(top, bottom), random_int(left, right)))
+
+    return positions
 
 
 class InvalidPlayerNumberError(Exception):
     pass
+
+
+class InvalidMoveError(Exception):
+    pass
@@ -1,6 +1,12 @@
 import asyncio
+import json
+import time
 
+from src.backend.GameState import GameState
+from src.backend.events import log
 from src.backend.players.player_input import IPlayerType
+from src.backend.players.move_clock import MoveClock
+from src.backend.players.stderr_buffer import StderrBuffer
 
 
 DOCKER_BASE_COMMAND = [
@@ -12,6 +18,51 @@ DOCKER_BASE_COMMAND = [
     "--cpus", "1",
 ]
 
+# Protocols a bot can agree to during initialization
+PROTOCOL_FULL = "full"    # The full game state as JSON every tick
+PROTOCOL_DELTA = "delta"  # A full snapshot on the first tick and only the changes afterwards
+PROTOCOL_BINARY = "binary"  # The full game state in binary frames every tick, see binary_protocol
+
+# Extras a bot can ask for during initialization, with PROTOCOL_FULL or PROTOCOL_DELTA
+FEATURE_ANALYSIS = "analysis"  # An "analysis" section in every state, see BoardAnalysis
+
+HANDSHAKE_TIMEOUT = 10  # seconds
+STARTUP_TIMEOUT = 30  # seconds the bot has for its first answer
+EXIT_TIMEOUT = 2  # seconds the bot has to exit after its stdin is closed
+
+STDERR_LIMIT = 64 * 1024  # bytes of stderr kept per bot
+
+
+def offered_protocols(delta: bool = False, binary: bool = False) -> list[str] | None:
+    """
+    Get the protocols to offer the bots besides PROTOCOL_FULL, e.g. from the command line options.
+
+    :param delta: Whether to offer PROTOCOL_DELTA
+    :type delta: bool
+    :param binary: Whether to offer PROTOCOL_BINARY
+    :type binary: bool
+    :return: The protocols, None if there are none
+    :rtype: list[str] | None
+    """
+    protocols = []
+    if delta:
+        protocols.append(PROTOCOL_DELTA)
+    if binary:
+        protocols.append(PROTOCOL_BINARY)
+    return protocols or None
+
+
+def offered_features(analysis: bool = False) -> list[str] | None:
+    """
+    Get the features to offer the bots, e.g. from the command line options.
+
+    :param analysis: Whether to offer FEATURE_ANALYSIS
+    :type analysis: bool
+    :return: The features, None if there are none
+    :rtype: list[str] | None
+    """
+    return [FEATURE_ANALYSIS] if analysis else None
+
 
 class BotPlayer(IPlayerType):
     """
@@ -19,82 +70,305 @@ class BotPlayer(IPlayerType):
     with a Docker-based bot.
     """
 
-    def __init__(self, bot_image: str):
+    def __init__(
+        self,
+        bot_image: str,
+        offered_protocols: list[str] | None = None,
+        offered_features: list[str] | None = None,
+        pool=None,
+        base_command: list[str] | None = None,
+        move_timeout: float | None = None,
+        time_bank: float | None = None,
+        startup_timeout: float | None = STARTUP_TIMEOUT,
+        stderr_limit: int = STDERR_LIMIT
+    ):
+        """
+        :param bot_image: The Docker image of the bot
+        :type bot_image: str
+        :param offered_protocols: The protocols offered to the bot besides PROTOCOL_FULL.
+            If any is given, the bot is asked during initialization which one it wants.
+        :type offered_protocols: list[str] | None
+        :param offered_features: The features offered to the bot, e.g. FEATURE_ANALYSIS.
+            If any is given, the bot is asked during initialization which ones it wants.
+        :type offered_features: list[str] | None
+        :param pool: If given, the container is taken from this pool instead of launched,
+            and given back to it on cleanup.
+        :type pool: ContainerPool | None
+        :param base_command: The command the image is appended to, DOCKER_BASE_COMMAND by default.
+        :type base_command: list[str] | None
+        :param move_timeout: Seconds the bot has to answer each move, None for no limit.
+        :type move_timeout: float | None
+        :param time_bank: Seconds the bot has for all its moves in the match, None for no limit.
+        :type time_bank: float | None
+        :param startup_timeout: Seconds the bot has for its first answer, which isn't charged to the bank.
+        :type startup_timeout: float | None
+        :param stderr_limit: Bytes of the bot's stderr to keep, the oldest ones are dropped.
+        :type stderr_limit: int
+        """
         self.bot_image = bot_image
         self.process: asyncio.subprocess.Process | None = None
+        self.pool = pool
+        self.base_command = base_command or DOCKER_BASE_COMMAND
+        self._container = None
+        self._healthy = True
+        self.offered_protocols = [PROTOCOL_FULL] + [
+            protocol for protocol in offered_protocols or [] if protocol != PROTOCOL_FULL
+        ]
+        self.protocol = PROTOCOL_FULL
+        self.offered_features = list(offered_features or [])
+        self.features: set[str] = set()
+        self._snapshot_sent = False
+        self.clock = MoveClock(move_timeout, time_bank, startup_timeout)
+        # Answers still owed for messages whose deadline passed, dropped when they arrive
+        self._stale_replies = 0
+        # stderr is read all the time, a bot that logs a lot would block on a full pipe otherwise
+        self.stderr = StderrBuffer(stderr_limit)
+        self._stderr_task: asyncio.Task | None = None
+
+    @property
+    def name(self) -> str:
+        return self.bot_image
 
     async def initialize(self) -> bool:
-        """Launches the Docker container for the bot."""
+        """
+        Launches the Docker container for the bot and, if other protocols
+        than PROTOCOL_FULL or any features are offered, agrees with the bot on them.
+        """
         if not self.bot_image:
             return False
+        start = time.perf_counter()
         try:
-            self.process = await asyncio.create_subprocess_exec(
-                *DOCKER_BASE_COMMAND, self.bot_image,
-                stdin=asyncio.subprocess.PIPE,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-            )
-            print(f"Bot {self.bot_image} launched successfully.")
+            if self.pool is not None:
+                self._container = await self.pool.acquire()
+                self.process = self._container.process
+                # The pool reads the container's stderr, this match's part is logged on cleanup
+                self.stderr = self._container.stderr
+            else:
+                self.process = await self._launch()
+                if self.process.stderr is not None:
+                    self._stderr_task = asyncio.create_task(self.stderr.drain(self.process.stderr))
+            self.clock.record_launch(time.perf_counter() - start)
+            log.info("bot_launched", bot=self.bot_image, seconds=self.clock.launch_time)
+        except Exception as e:
+            log.error("bot_launch_failed", bot=self.bot_image, error=str(e))
+            return False
+
+        if len(self.offered_protocols) == 1 and not self.offered_features:
             return True
+
+        try:
+            self.protocol, self.features = await self._negotiate_protocol()
         except Exception as e:
-            print(f"Error launching bot {self.bot_image}: {e}")
+            log.error("bot_handshake_failed", bot=self.bot_image, error=str(e))
+            self._healthy = False
             return False
 
-    async def get_move(self, game_state_json: str) -> int:
+        log.info("bot_protocol", bot=self.bot_image, protocol=self.protocol, features=sorted(self.features))
+        return True
+
+    async def _launch(self) -> asyncio.subprocess.Process:
+        """
+        Start the bot process with pipes for the protocol and its error output.
+
+        :return: The running process
+        :rtype: asyncio.subprocess.Process
+        """
+        return await asyncio.create_subprocess_exec(
+            *self.base_command, self.bot_image,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+
+    async def _negotiate_protocol(self) -> tuple[str, set[str]]:
+        """
+        Offer the protocols and features to the bot and read which ones it wants.
+
+        The server sends {"type": "hello", "protocols": [...], "features": [...]} and the bot
+        answers with one line like {"protocol": "delta", "features": ["analysis"]}. Any other
+        answer (e.g. a move from a bot that doesn't know about the handshake) means
+        PROTOCOL_FULL and no features, so the stream stays in sync either way.
+        The features only come with the JSON protocols, so they are dropped with PROTOCOL_BINARY.
+
+        :return: The agreed protocol and features
+        :rtype: tuple[str, set[str]]
+        """
+        hello = {"type": "hello", "protocols": self.offered_protocols}
+        if self.offered_features:
+            hello["features"] = self.offered_features
+        self.process.stdin.write((json.dumps(hello) + "\n").encode("utf-8"))
+        await self.process.stdin.drain()
+
+        output = await self._read_reply()
+        if output is None:
+            raise TimeoutError("No answer to the handshake in time")
+        if not output:
+            raise ConnectionError("No answer to the handshake")
+
+        try:
+            answer = json.loads(output)
+        except ValueError:
+            return PROTOCOL_FULL, set()
+
+        if not isinstance(answer, dict):
+            return PROTOCOL_FULL, set()
+
+        protocol = answer.get("protocol")
+        if protocol not in self.offered_protocols:
+            protocol = PROTOCOL_FULL
+
+        features = answer.get("features")
+        if protocol == PROTOCOL_BINARY or not isinstance(features, list):
+            return protocol, set()
+
+        return protocol, {feature for feature in self.offered_features if feature in features}
+
+    async def _next_line(self) -> bytes:
+        """
+        Read the next line from the bot, dropping the late answers to earlier messages.
+        """
+        while True:
+            output = await self.process.stdout.readline()
+            if output and self._stale_replies:
+                self._stale_replies -= 1
+                continue
+            return output
+
+    async def _read_reply(self) -> bytes | None:
+        """
+        Read the answer to the last message within the time the clock gives the bot.
+
+        If the deadline passes the answer is owed and dropped when it arrives, so it
+        can't be taken as the answer to a later message.
+
+        :return: The answer (empty at EOF), or None if it didn't arrive in time
+        :rtype: bytes | None
+        """
+        start = time.perf_counter()
+        try:
+            output = await asyncio.wait_for(self._next_line(), self.clock.budget())
+        except asyncio.TimeoutError:
+            self._stale_replies += 1
+            self.clock.record(time.perf_counter() - start, in_time=False)
+            return None
+
+        self.clock.record(time.perf_counter() - start)
+        return output
+
+    def encode_state(self, game: GameState, player_number: int) -> str | bytes:
+        """
+        Encode the game state in the agreed protocol.
+        With PROTOCOL_DELTA the first state is a full snapshot and the rest are deltas,
+        and with PROTOCOL_BINARY it's a binary frame.
+        With FEATURE_ANALYSIS the JSON states also have the "analysis" of the tick.
+        """
+        if self.protocol == PROTOCOL_BINARY:
+            return game.serialize_binary_for_player(player_number)
+
+        if self.protocol != PROTOCOL_DELTA:
+            state = super().encode_state(game, player_number)
+        elif not self._snapshot_sent:
+            self._snapshot_sent = True
+            state = json.dumps({"type": "snapshot", **game.serialize_for_player(player_number)})
+        else:
+            state = json.dumps(game.serialize_delta_for_player(player_number))
+
+        if FEATURE_ANALYSIS in self.features:
+            # The analysis is the same for every player, so its JSON is only encoded once per tick
+            state = state[:-1] + ', "analysis": ' + game.analysis().to_json() + "}"
+        return state
+
+    async def get_move(self, game_state_json: str | bytes) -> int:
         """Sends game state to the bot and reads its move."""
         if self.process is None or self.process.stdin is None or self.process.stdout is None:
-            print(f"Bot {self.bot_image} process is not running or pipes are missing.")
+            log.error("bot_not_running", bot=self.bot_image)
             return -1  # Return invalid move
 
+        if self.clock.exhausted:
+            log.warning("bot_time_bank_exhausted", bot=self.bot_image)
+            return -1
+
         try:
-            self.process.stdin.write((game_state_json + "\n").encode("utf-8"))
+            if isinstance(game_state_json, bytes):
+                # A binary frame carries its own length
+                self.process.stdin.write(game_state_json)
+            else:
+                self.process.stdin.write((game_state_json + "\n").encode("utf-8"))
             await self.process.stdin.drain()
 
-            output = await self.process.stdout.readline()
+            output = await self._read_reply()
+
+            if output is None:
+                log.warning("bot_move_timeout", bot=self.bot_image, budget=self.clock.budget())
+                return -1
 
             if not output:
-                print(f"No output received from bot {self.bot_image}")
+                log.error("bot_closed_stdout", bot=self.bot_image)
+                self._healthy = False
                 return -1
 
             move_str = output.strip().decode('utf-8')
-            print(f"Received output from bot {self.bot_image}: {move_str}")
+            log.debug("bot_move", bot=self.bot_image, move=move_str)
             return int(move_str)
 
         except Exception as e:
-            print(f"Error getting input from bot {self.bot_image}: {e}")
+            log.error("bot_move_failed", bot=self.bot_image, error=str(e))
+            self._healthy = False
             return -1
-        finally:
-            print(f"Finished get_move for bot {self.bot_image}")
-            print()
+
+    def log_stderr(self) -> None:
+        """
+        Log what the bot wrote to stderr, if anything.
+        """
+        if self.stderr.total:
+            log.warning("bot_stderr", bot=self.bot_image, dropped=self.stderr.dropped, text=self.stderr.text())
 
     async def cleanup(self) -> None:
-        """Terminates the bot and prints any error output."""
+        """
+        Terminates the bot and logs any error output.
+        A pooled container is given back to its pool instead.
+        """
+        if self.process is not None:
+            self.clock.log_response_times(self.bot_image)
+
+        if self._container is not None:
+            container, self._container, self.process = self._container, None, None
+            self.log_stderr()
+            container.stderr.clear()
+            # A late answer still on its way would be taken as the answer to the reset
+            await self.pool.release(container, self._healthy and not self._stale_replies)
+            log.debug("bot_returned_to_pool", bot=self.bot_image)
+            return
+
         if self.process is None:
             return
 
-        print(f"Terminating bot {self.bot_image}...")
+        log.debug("bot_terminating", bot=self.bot_image)
         try:
             # Send EOF to stdin
             if self.process.stdin:
                 self.process.stdin.close()
                 await self.process.stdin.wait_closed()
-
-            # Read stderr
-            if self.process.stderr:
-                errors = await self.process.stderr.read()
-                if errors:
-                    print(f"--- Errores del Bot {self.bot_image} ---")
-                    print(errors.decode('utf-8'))
-                    print("---------------------------------")
-
         except ProcessLookupError:
-            print("ProcessLookupError; bot probably never launched.")
+            log.warning("bot_never_launched", bot=self.bot_image)
         except Exception as e:
-            print(f"Error reading stderr from bot: {e}")
+            log.error("bot_close_failed", bot=self.bot_image, error=str(e))
 
-        # Terminate if still running
+        # Give the bot some time to exit and write its last errors, then terminate it
+        try:
+            await asyncio.wait_for(self.process.wait(), EXIT_TIMEOUT)
+        except asyncio.TimeoutError:
+            pass
         if self.process.returncode is None:
             self.process.terminate()
             await self.process.wait()
 
-        print(f"Bot {self.bot_image} cleanup complete.")
+        if self._stderr_task is not None:
+            try:
+                await asyncio.wait_for(self._stderr_task, EXIT_TIMEOUT)
+            except Exception as e:
+                log.error("bot_stderr_failed", bot=self.bot_image, error=str(e))
+            self._stderr_task = None
+
+        self.log_stderr()
+        log.debug("bot_cleaned_up", bot=self.bot_image)
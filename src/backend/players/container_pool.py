@@ -0,0 +1,295 @@
+import asyncio
+import json
+
+from src.backend.events import log
+from src.backend.players.bot_player import DOCKER_BASE_COMMAND, EXIT_TIMEOUT, HANDSHAKE_TIMEOUT, STDERR_LIMIT
+from src.backend.players.stderr_buffer import StderrBuffer
+
+
+# Sent to a container between matches, the bot must answer with READY_MESSAGE
+NEW_GAME_MESSAGE = {"type": "new_game"}
+READY_MESSAGE = {"type": "ready"}
+
+
+class PooledContainer:
+    """
+    A running bot container owned by a ContainerPool.
+
+    Its stderr is read all the time into `stderr`, which the BotPlayer that uses the
+    container logs and clears at the end of each match.
+    """
+
+    def __init__(self, bot_image: str, process: asyncio.subprocess.Process, stderr_limit: int = STDERR_LIMIT):
+        """
+        :param bot_image: The Docker image of the bot
+        :type bot_image: str
+        :param process: The running container
+        :type process: asyncio.subprocess.Process
+        :param stderr_limit: Bytes of the bot's stderr to keep, the oldest ones are dropped.
+        :type stderr_limit: int
+        """
+        self.bot_image = bot_image
+        self.process = process
+        self.uses = 0
+        self.stderr = StderrBuffer(stderr_limit)
+        self.__stderr_task: asyncio.Task | None = None
+        if process.stderr is not None:
+            self.__stderr_task = asyncio.create_task(self.stderr.drain(process.stderr))
+
+    @property
+    def alive(self) -> bool:
+        """
+        Check if the container process is still running.
+
+        :return: True if the process hasn't exited, False otherwise
+        :rtype: bool
+        """
+        return self.process.returncode is None
+
+    async def reset(self) -> bool:
+        """
+        Tell the bot that a new game starts and wait for its answer.
+
+        :return: True if the bot answered READY_MESSAGE in time, False otherwise,
+            e.g. for a late answer to a move of the last match
+        :rtype: bool
+        """
+        try:
+            self.process.stdin.write((json.dumps(NEW_GAME_MESSAGE) + "\n").encode("utf-8"))
+            await self.process.stdin.drain()
+            output = await asyncio.wait_for(self.process.stdout.readline(), HANDSHAKE_TIMEOUT)
+        except Exception as e:
+            log.error("bot_reset_failed", bot=self.bot_image, error=str(e))
+            return False
+
+        try:
+            answer = json.loads(output)
+        except ValueError:
+            answer = None
+        if answer != READY_MESSAGE:
+            log.warning("bot_reset_rejected", bot=self.bot_image, answer=output.decode("utf-8", "replace").strip())
+            return False
+        return True
+
+    async def stop(self) -> None:
+        """
+        Close the container's stdin and terminate it if it's still running.
+        """
+        try:
+            if self.process.stdin:
+                self.process.stdin.close()
+        except Exception as e:
+            log.error("bot_close_failed", bot=self.bot_image, error=str(e))
+
+        if self.process.returncode is None:
+            try:
+                self.process.terminate()
+            except ProcessLookupError:
+                pass
+        await self.process.wait()
+
+        if self.__stderr_task is not None:
+            try:
+                await asyncio.wait_for(self.__stderr_task, EXIT_TIMEOUT)
+            except Exception as e:
+                log.error("bot_stderr_failed", bot=self.bot_image, error=str(e))
+            self.__stderr_task = None
+
+
+class ContainerPool:
+    """
+    Keeps a set number of pre-started containers of a bot image ready to be used,
+    so back-to-back matches don't pay for the container start-up.
+
+    The pool keeps `size` idle containers: every container taken by acquire is replaced
+    in the background. If none is ready, acquire launches one itself. A container given
+    back is kept if fewer than `size` are ready, and stopped otherwise.
+
+    A container is reset with NEW_GAME_MESSAGE when it's given back, and retired
+    after max_uses matches, as soon as it misbehaves or if it doesn't answer READY_MESSAGE.
+    """
+
+    def __init__(
+        self,
+        bot_image: str,
+        size: int = 2,
+        max_uses: int = 50,
+        base_command: list[str] | None = None
+    ):
+        """
+        :param bot_image: The Docker image of the bot
+        :type bot_image: str
+        :param size: The number of containers to keep ready
+        :type size: int
+        :param max_uses: The number of matches after which a container is retired
+        :type max_uses: int
+        :param base_command: The command the image is appended to, DOCKER_BASE_COMMAND by default.
+            Any executable that takes the image as its last argument can stand in for docker.
+        :type base_command: list[str] | None
+        """
+        self.bot_image = bot_image
+        self.size = size
+        self.max_uses = max_uses
+        self.base_command = base_command or DOCKER_BASE_COMMAND
+
+        self.__idle: list[PooledContainer] = []
+        self.__in_use: set[PooledContainer] = set()
+        self.__refills: set[asyncio.Task] = set()
+        # Containers given back that are being reset, they count as ready
+        self.__resetting = 0
+        self.__closed = False
+
+    @property
+    def idle(self) -> int:
+        """
+        Get the number of containers ready to be acquired.
+
+        :return: The number of idle containers
+        :rtype: int
+        """
+        return len(self.__idle)
+
+    async def __launch(self) -> PooledContainer:
+        process = await asyncio.create_subprocess_exec(
+            *self.base_command, self.bot_image,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        return PooledContainer(self.bot_image, process)
+
+    async def __refill(self) -> None:
+        """
+        Launch containers until `size` of them are ready again.
+        """
+        while not self.__closed and len(self.__idle) + self.__resetting < self.size:
+            try:
+                container = await self.__launch()
+            except Exception as e:
+                log.error("bot_launch_failed", bot=self.bot_image, error=str(e))
+                return
+            if self.__closed:
+                await container.stop()
+                return
+            self.__idle.append(container)
+
+    def __schedule_refill(self) -> None:
+        if self.__closed or self.__refills:
+            return
+        task = asyncio.create_task(self.__refill())
+        self.__refills.add(task)
+        task.add_done_callback(self.__refills.discard)
+
+    async def start(self) -> None:
+        """
+        Launch the containers that are kept ready.
+        """
+        self.__schedule_refill()
+        await asyncio.gather(*self.__refills)
+
+    async def acquire(self) -> PooledContainer:
+        """
+        Get a container for a match, launching one if none is ready.
+
+        :return: A running container
+        :rtype: PooledContainer
+        """
+        if self.__closed:
+            raise RuntimeError(f"The pool of {self.bot_image} is closed")
+
+        container = None
+        while self.__idle:
+            candidate = self.__idle.pop()
+            if candidate.alive:
+                container = candidate
+                break
+            await candidate.stop()
+
+        if container is None:
+            container = await self.__launch()
+
+        self.__in_use.add(container)
+        self.__schedule_refill()
+        return container
+
+    async def release(self, container: PooledContainer, healthy: bool = True) -> None:
+        """
+        Give a container back after a match.
+
+        :param container: The container returned by acquire
+        :type container: PooledContainer
+        :param healthy: False if the bot misbehaved during the match
+        :type healthy: bool
+        """
+        self.__in_use.discard(container)
+        container.uses += 1
+
+        reusable = (
+            healthy
+            and not self.__closed
+            and container.alive
+            and container.uses < self.max_uses
+            and len(self.__idle) + self.__resetting < self.size
+        )
+        if reusable:
+            # The refill doesn't launch a replacement while the container is reset
+            self.__resetting += 1
+            try:
+                reusable = await container.reset() and not self.__closed
+            finally:
+                self.__resetting -= 1
+
+        if reusable:
+            self.__idle.append(container)
+        else:
+            await container.stop()
+            self.__schedule_refill()
+
+    async def close(self) -> None:
+        """
+        Stop every container of the pool.
+        """
+        self.__closed = True
+        for task in list(self.__refills):
+            task.cancel()
+        await asyncio.gather(*self.__refills, return_exceptions=True)
+
+        containers = self.__idle + list(self.__in_use)
+        self.__idle = []
+        self.__in_use = set()
+        await asyncio.gather(*(container.stop() for container in containers))
+
+
+class ContainerPools:
+    """
+    One ContainerPool per bot image, created when the image is first needed.
+    """
+
+    def __init__(self, size: int = 2, max_uses: int = 50, base_command: list[str] | None = None):
+        self.size = size
+        self.max_uses = max_uses
+        self.base_command = base_command
+        self.__pools: dict[str, ContainerPool] = {}
+
+    async def get(self, bot_image: str) -> ContainerPool:
+        """
+        Get the pool of the given image, starting it if needed.
+
+        :param bot_image: The Docker image of the bot
+        :type bot_image: str
+        :return: The pool of the image
+        :rtype: ContainerPool
+        """
+        if bot_image not in self.__pools:
+            pool = ContainerPool(bot_image, self.size, self.max_uses, self.base_command)
+            self.__pools[bot_image] = pool
+            await pool.start()
+
+        return self.__pools[bot_image]
+
+    async def close(self) -> None:
+        """
+        Stop the containers of every pool.
+        """
+        await asyncio.gather(*(pool.close() for pool in self.__pools.values()))
+        self.__pools = {}
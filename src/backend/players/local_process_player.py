@@ -0,0 +1,80 @@
+import asyncio
+import shlex
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+from src.backend.players.bot_player import BotPlayer
+
+
+class ResourceLimits:
+    """
+    Operating system limits for a bot process, set in the child before the bot starts.
+    Only available where Python has the resource module (Linux, macOS...).
+    """
+
+    def __init__(self, cpu_time: int | None = None, memory: int | None = None):
+        """
+        :param cpu_time: Seconds of CPU time the bot can use in total. It gets SIGXCPU
+            when it runs out and is killed one second later.
+        :type cpu_time: int | None
+        :param memory: Bytes of address space the bot can use, allocations past it fail.
+        :type memory: int | None
+        """
+        self.cpu_time = cpu_time
+        self.memory = memory
+
+    def __bool__(self) -> bool:
+        return self.cpu_time is not None or self.memory is not None
+
+    def apply(self) -> None:
+        """
+        Set the limits on the current process. Runs in the bot process before exec.
+        """
+        if self.cpu_time is not None:
+            resource.setrlimit(resource.RLIMIT_CPU, (self.cpu_time, self.cpu_time + 1))
+        if self.memory is not None:
+            resource.setrlimit(resource.RLIMIT_AS, (self.memory, self.memory))
+
+
+class LocalProcessPlayer(BotPlayer):
+    """
+    A BotPlayer that runs the bot as a local executable instead of a Docker container,
+    with the same line-based protocol on its stdin and stdout.
+    """
+
+    def __init__(
+        self,
+        command: str | list[str],
+        resource_limits: ResourceLimits | None = None,
+        cwd: str | None = None,
+        **bot_options
+    ):
+        """
+        :param command: The command that runs the bot, as a shell-like string or a list of arguments
+        :type command: str | list[str]
+        :param resource_limits: The limits of the bot process, if any
+        :type resource_limits: ResourceLimits | None
+        :param cwd: The working directory of the bot, the current one if not given
+        :type cwd: str | None
+        :param bot_options: Keyword arguments for BotPlayer (offered_protocols, move_timeout...).
+        """
+        self.command = shlex.split(command) if isinstance(command, str) else list(command)
+        super().__init__(shlex.join(self.command), **bot_options)
+
+        if resource_limits and resource is None:
+            raise RuntimeError("Resource limits are not supported on this platform")
+        self.resource_limits = resource_limits
+        self.cwd = cwd
+
+    async def _launch(self) -> asyncio.subprocess.Process:
+        return await asyncio.create_subprocess_exec(
+            *self.command,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            cwd=self.cwd,
+            preexec_fn=self.resource_limits.apply if self.resource_limits else None,
+        )
@@ -0,0 +1,188 @@
+import math
+
+from src.backend.events import log
+
+
+class MoveClock:
+    """
+    Keeps the time a bot has to answer, like a chess clock.
+
+    Every move must arrive within `move_timeout` seconds and the time spent on all
+    the moves of a match is charged to a `time_bank`. The first answer of the bot
+    (its warm-up) has its own `startup_timeout` and isn't charged to the bank.
+    Any of the limits can be None to disable it.
+    """
+
+    def __init__(
+        self,
+        move_timeout: float | None = None,
+        time_bank: float | None = None,
+        startup_timeout: float | None = None
+    ):
+        """
+        :param move_timeout: Seconds the bot has to answer each move
+        :type move_timeout: float | None
+        :param time_bank: Seconds the bot has to answer all the moves of a match
+        :type time_bank: float | None
+        :param startup_timeout: Seconds the bot has to give its first answer
+        :type startup_timeout: float | None
+        """
+        self.move_timeout = move_timeout
+        self.time_bank = time_bank
+        self.startup_timeout = startup_timeout
+
+        self.__spent: float = 0.0
+        self.__samples: list[float] = []
+        self.__launch_time: float | None = None
+        self.__warmup_time: float | None = None
+        self.__missed: int = 0
+
+    @property
+    def warmed_up(self) -> bool:
+        """
+        Check if the bot already gave its first answer.
+
+        :return: True if the warm-up was recorded, False otherwise
+        :rtype: bool
+        """
+        return self.__warmup_time is not None
+
+    @property
+    def launch_time(self) -> float | None:
+        """
+        Get the seconds it took to start the bot, if it was measured.
+
+        :rtype: float | None
+        """
+        return self.__launch_time
+
+    @property
+    def warmup_time(self) -> float | None:
+        """
+        Get the seconds it took the bot to give its first answer, if it did.
+
+        :rtype: float | None
+        """
+        return self.__warmup_time
+
+    @property
+    def remaining(self) -> float | None:
+        """
+        Get the seconds left in the time bank, or None if there is no bank.
+
+        :rtype: float | None
+        """
+        if self.time_bank is None:
+            return None
+
+        return max(0.0, self.time_bank - self.__spent)
+
+    @property
+    def exhausted(self) -> bool:
+        """
+        Check if the time bank ran out.
+
+        :return: True if there is a bank and no time left in it
+        :rtype: bool
+        """
+        return self.remaining == 0.0
+
+    @property
+    def missed(self) -> int:
+        """
+        Get the number of moves that didn't arrive in time.
+
+        :rtype: int
+        """
+        return self.__missed
+
+    @property
+    def samples(self) -> list[float]:
+        """
+        Get the response times of every charged move, in seconds.
+
+        :rtype: list[float]
+        """
+        return self.__samples
+
+    def budget(self) -> float | None:
+        """
+        Get the seconds the bot has for its next answer.
+
+        :return: The timeout of the next answer, or None if it's unlimited
+        :rtype: float | None
+        """
+        if not self.warmed_up:
+            return self.startup_timeout
+
+        limits = [limit for limit in (self.move_timeout, self.remaining) if limit is not None]
+        return min(limits) if limits else None
+
+    def record_launch(self, elapsed: float) -> None:
+        """
+        Record how long it took to start the bot.
+
+        :param elapsed: The seconds spent
+        :type elapsed: float
+        """
+        self.__launch_time = elapsed
+
+    def record(self, elapsed: float, in_time: bool = True) -> None:
+        """
+        Record an answer, or the time waited for one that didn't arrive.
+        The first one is the warm-up, the rest are charged to the bank.
+
+        :param elapsed: The seconds spent waiting
+        :type elapsed: float
+        :param in_time: False if the answer didn't arrive before the deadline
+        :type in_time: bool
+        """
+        if not in_time:
+            self.__missed += 1
+
+        if not self.warmed_up:
+            self.__warmup_time = elapsed
+            return
+
+        self.__spent += elapsed
+        self.__samples.append(elapsed)
+
+    def record_skipped(self) -> None:
+        """
+        Record a move the bot wasn't asked for because it was still busy, as a missed one.
+        """
+        self.__missed += 1
+
+    def percentiles(self, percents: tuple[float, ...] = (50, 90, 99)) -> dict[float, float]:
+        """
+        Get the response time percentiles of the charged moves (nearest rank).
+
+        :param percents: The percentiles to compute, between 0 and 100
+        :type percents: tuple[float, ...]
+        :return: The seconds for each percentile, empty if no move was recorded
+        :rtype: dict[float, float]
+        """
+        if not self.__samples:
+            return {}
+
+        ordered = sorted(self.__samples)
+        return {
+            percent: ordered[max(0, math.ceil(percent / 100 * len(ordered)) - 1)]
+            for percent in percents
+        }
+
+    def log_response_times(self, bot: str) -> None:
+        """
+        Log the start-up time, the response time percentiles and the missed moves of a bot.
+
+        :param bot: The name of the bot in the log, e.g. its image
+        :type bot: str
+        """
+        log.info(
+            "bot_response_times",
+            bot=bot,
+            launch=self.launch_time,
+            warmup=self.warmup_time,
+            **{f"p{percent}": seconds for percent, seconds in self.percentiles().items()},
+            missed=self.missed,
+        )
@@ -1,5 +1,7 @@
 from abc import ABC, abstractmethod
 
+from src.backend.GameState import GameState
+
 
 class IPlayerType(ABC):
     """
@@ -14,6 +16,30 @@ class IPlayerType(ABC):
         """
         pass
 
+    @property
+    def name(self) -> str:
+        """
+        Get the name of this player in the logs and metrics.
+
+        :rtype: str
+        """
+        return "human"
+
+    def encode_state(self, game: GameState, player_number: int) -> str | bytes:
+        """
+        Encode the current game state in the format this player expects.
+        By default it's the full game state as JSON.
+
+        :param game: The current game state.
+        :type game: GameState
+        :param player_number: The number of this player in the game.
+        :type player_number: int
+
+        :return: The encoded game state, passed to get_move.
+        :rtype: str | bytes
+        """
+        return game.serialize_json_for_player(player_number)
+
     @abstractmethod
     async def get_move(self, game_state_json: str) -> int:
         """
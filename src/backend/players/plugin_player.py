@@ -0,0 +1,380 @@
+import asyncio
+import importlib
+import importlib.util
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.backend.analysis import BoardAnalysis
+from src.backend.GameState import GameState
+from src.backend.events import log
+from src.backend.player import Player
+from src.backend.players.bot_player import STARTUP_TIMEOUT
+from src.backend.players.move_clock import MoveClock
+from src.backend.players.player_input import IPlayerType
+
+
+# A bot given as "py:<module or file>:<attribute>" instead of a Docker image is a plugin
+PLUGIN_PREFIX = "py:"
+
+
+def is_plugin(bot_image: str | None) -> bool:
+    """
+    Check if a bot is given as a Python plugin instead of a Docker image.
+
+    :param bot_image: The image, or "py:<module or file>:<attribute>" for a plugin
+    :type bot_image: str | None
+    :rtype: bool
+    """
+    return bool(bot_image) and bot_image.startswith(PLUGIN_PREFIX)
+
+
+def load_plugin(spec: str):
+    """
+    Load the attribute named by a plugin spec.
+
+    :param spec: "<module>:<attribute>" or "<path to a .py file>:<attribute>", with or without PLUGIN_PREFIX
+    :type spec: str
+    :return: The attribute, a function or a class
+    :raises ValueError: If the spec has no attribute
+    :raises ImportError: If the module can't be imported
+    :raises AttributeError: If the module has no such attribute
+    """
+    if spec.startswith(PLUGIN_PREFIX):
+        spec = spec[len(PLUGIN_PREFIX):]
+    module_name, _, attribute = spec.rpartition(":")
+    if not module_name or not attribute:
+        raise ValueError(f"Invalid plugin {spec!r}, expected <module>:<attribute>")
+
+    if module_name.endswith(".py"):
+        path = os.path.abspath(module_name)
+        module_spec = importlib.util.spec_from_file_location(
+            f"hackatron_plugin_{abs(hash(path))}", path
+        )
+        if module_spec is None or module_spec.loader is None:
+            raise ImportError(f"Can't load a module from {module_name}")
+        module = importlib.util.module_from_spec(module_spec)
+        module_spec.loader.exec_module(module)
+    else:
+        module = importlib.import_module(module_name)
+
+    return getattr(module, attribute)
+
+
+class StaleViewError(RuntimeError):
+    """
+    Raised when a plugin reads a view of the game after its deadline passed.
+    """
+
+
+class ViewLease:
+    """
+    Lets the views of one tick be read until it expires.
+
+    Every read holds a lock, and expire takes it too: once expire returns no read is in
+    progress and every new one raises StaleViewError. An isolated plugin that misses its
+    deadline keeps running in its thread, but it can't see the game changing under it.
+    """
+
+    __slots__ = ("__lock", "__expired")
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__expired = False
+
+    def __enter__(self) -> None:
+        self.__lock.acquire()
+        if self.__expired:
+            self.__lock.release()
+            raise StaleViewError("The deadline of this move passed, the view of the game is gone")
+
+    def __exit__(self, *exc_info) -> None:
+        self.__lock.release()
+
+    def expire(self) -> None:
+        """
+        Stop the views from being read, waiting for a read in progress to finish.
+        """
+        with self.__lock:
+            self.__expired = True
+
+
+class PlayerView:
+    """
+    A read-only view of a Player for plugins.
+    """
+
+    __slots__ = ("__player", "__lease")
+
+    def __init__(self, player: Player, lease: ViewLease):
+        """
+        :param player: The player to show
+        :type player: Player
+        :param lease: The lease of the GameView the player was read from
+        :type lease: ViewLease
+        """
+        self.__player = player
+        self.__lease = lease
+
+    @property
+    def number(self) -> int:
+        with self.__lease:
+            return self.__player.number
+
+    @property
+    def head(self) -> tuple[int, int]:
+        """
+        Get the (row, col) of the head.
+
+        :rtype: tuple[int, int]
+        """
+        with self.__lease:
+            return self.__player.head
+
+    @property
+    def trail(self) -> tuple[tuple[int, int], ...]:
+        """
+        Get the cells of the trail from the head to the tail.
+
+        :rtype: tuple[tuple[int, int], ...]
+        """
+        with self.__lease:
+            return tuple(pos for pos in self.__player.position if pos is not None)
+
+    @property
+    def previous_move(self) -> int:
+        with self.__lease:
+            return self.__player.previous_move
+
+
+class GameView:
+    """
+    A read-only view of a GameState from the point of view of one player, given to plugins
+    instead of the serialized state. Nothing is copied: the view always shows the current
+    state of the game, so a plugin shouldn't keep it across moves.
+
+    The view of an isolated plugin expires when its deadline passes: from then on it,
+    and the PlayerViews read from it, raise StaleViewError instead of showing a state
+    the game loop may be changing.
+    """
+
+    __slots__ = ("__game", "__player_number", "__lease")
+
+    def __init__(self, game: GameState, player_number: int):
+        """
+        :param game: The game to show
+        :type game: GameState
+        :param player_number: The number of the player the plugin plays
+        :type player_number: int
+        """
+        self.__game = game
+        self.__player_number = player_number
+        self.__lease = ViewLease()
+
+    def expire(self) -> None:
+        """
+        Make the view and its PlayerViews unreadable, see ViewLease.
+        """
+        self.__lease.expire()
+
+    @property
+    def size(self) -> int:
+        with self.__lease:
+            return self.__game.size
+
+    @property
+    def tick_count(self) -> int:
+        with self.__lease:
+            return self.__game.tick_count
+
+    @property
+    def me(self) -> PlayerView:
+        with self.__lease:
+            return PlayerView(self.__game.player(self.__player_number), self.__lease)
+
+    @property
+    def opponents(self) -> list[PlayerView]:
+        """
+        Get the other players still in the game.
+
+        :rtype: list[PlayerView]
+        """
+        with self.__lease:
+            return [
+                PlayerView(player, self.__lease)
+                for player in self.__game.alive_players if player.number != self.__player_number
+            ]
+
+    @property
+    def opponent(self) -> PlayerView:
+        """
+        Get the other player of a game of two players.
+
+        :rtype: PlayerView
+        """
+        return self.opponents[0]
+
+    def cell(self, row: int, col: int) -> int:
+        """
+        Get the value of a cell of the board, as in GameState.board.
+
+        :param row: The row of the cell
+        :type row: int
+        :param col: The column of the cell
+        :type col: int
+        :rtype: int
+        """
+        with self.__lease:
+            return self.__game.board[row][col]
+
+    def is_free(self, row: int, col: int) -> bool:
+        """
+        Check if a cell of the board is empty.
+
+        :rtype: bool
+        """
+        with self.__lease:
+            return self.__game.board[row][col] == 0
+
+    def analysis(self) -> BoardAnalysis:
+        """
+        Get the reachable area, territory and articulation points of the current tick,
+        computed once per tick for every player that asks, see GameState.analysis.
+
+        :rtype: BoardAnalysis
+        """
+        with self.__lease:
+            return self.__game.analysis()
+
+
+class PluginPlayer(IPlayerType):
+    """
+    An IPlayerInput implementation that runs a bot written in Python in the server's process.
+
+    The plugin is a function called with a GameView every tick that returns its move,
+    or a class that is instantiated once per match and whose instances are called the
+    same way. The state isn't serialized, written to a pipe or parsed.
+
+    By default the plugin runs in the event loop, so a slow plugin holds up the game and
+    move_timeout can't be enforced. With isolated, it runs in a worker thread of its own
+    and the move_timeout, time_bank and startup_timeout apply as for BotPlayer. A plugin
+    that misses its deadline can't be stopped: it keeps running until its call returns,
+    with a view of the game that raises StaleViewError, and its move is dropped.
+    """
+
+    def __init__(
+        self,
+        spec: str,
+        isolated: bool = False,
+        move_timeout: float | None = None,
+        time_bank: float | None = None,
+        startup_timeout: float | None = STARTUP_TIMEOUT,
+        **bot_options
+    ):
+        """
+        :param spec: The plugin, "<module>:<attribute>" or "<file.py>:<attribute>", optionally with PLUGIN_PREFIX
+        :type spec: str
+        :param isolated: Whether to run the plugin in a worker thread instead of the event loop
+        :type isolated: bool
+        :param move_timeout: Seconds the plugin has to answer each move when isolated, None for no limit
+        :type move_timeout: float | None
+        :param time_bank: Seconds the plugin has for all its moves in the match when isolated, None for no limit
+        :type time_bank: float | None
+        :param startup_timeout: Seconds the plugin has for its first answer when isolated, None for no limit
+        :type startup_timeout: float | None
+        :param bot_options: Options of BotPlayer that don't apply to plugins, ignored
+        """
+        self.spec = spec
+        self.isolated = isolated
+        self.clock = MoveClock(move_timeout, time_bank, startup_timeout)
+        self.bot = None
+        self.__view: GameView | None = None
+        self.__executor: ThreadPoolExecutor | None = None
+        # The move being computed in the worker thread, kept after its deadline until it's done
+        self.__pending: asyncio.Future | None = None
+
+    @property
+    def name(self) -> str:
+        return self.spec
+
+    async def initialize(self) -> bool:
+        """
+        Import the plugin, and instantiate it if it's a class.
+        """
+        start = time.perf_counter()
+        try:
+            bot = load_plugin(self.spec)
+            self.bot = bot() if isinstance(bot, type) else bot
+        except Exception as e:
+            log.error("bot_launch_failed", bot=self.spec, error=str(e))
+            return False
+
+        if self.isolated:
+            self.__executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="plugin")
+        self.clock.record_launch(time.perf_counter() - start)
+        log.info("bot_launched", bot=self.spec, seconds=self.clock.launch_time)
+        return True
+
+    def encode_state(self, game: GameState, player_number: int) -> str:
+        """
+        Keep a view of the game for the next get_move instead of encoding it.
+        """
+        self.__view = GameView(game, player_number)
+        return ""
+
+    async def get_move(self, game_state_json: str) -> int:
+        """Calls the plugin with the view of the game and returns its move."""
+        if self.bot is None or self.__view is None:
+            log.error("bot_not_running", bot=self.spec)
+            return -1
+
+        if self.__executor is None:
+            try:
+                move = self.bot(self.__view)
+            except Exception as e:
+                log.error("bot_move_failed", bot=self.spec, error=str(e))
+                return -1
+            log.debug("bot_move", bot=self.spec, move=move)
+            return move
+
+        if self.clock.exhausted:
+            log.warning("bot_time_bank_exhausted", bot=self.spec)
+            return -1
+
+        if self.__pending is not None and not self.__pending.done():
+            # The thread can't be stopped, and a late move is dropped when it's done
+            self.clock.record_skipped()
+            log.warning("bot_still_thinking", bot=self.spec)
+            return -1
+
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        view = self.__view
+        self.__pending = loop.run_in_executor(self.__executor, self.bot, view)
+        try:
+            move = await asyncio.wait_for(asyncio.shield(self.__pending), self.clock.budget())
+        except asyncio.TimeoutError:
+            # The game goes on without the thread, which mustn't see it change
+            view.expire()
+            self.clock.record(time.perf_counter() - start, in_time=False)
+            log.warning("bot_move_timeout", bot=self.spec, budget=self.clock.budget())
+            return -1
+        except Exception as e:
+            self.clock.record(time.perf_counter() - start)
+            log.error("bot_move_failed", bot=self.spec, error=str(e))
+            return -1
+
+        self.clock.record(time.perf_counter() - start)
+        log.debug("bot_move", bot=self.spec, move=move)
+        return move
+
+    async def cleanup(self) -> None:
+        """
+        Stop the worker thread of an isolated plugin, without waiting for a move still being computed.
+        """
+        if self.__executor is not None:
+            self.clock.log_response_times(self.spec)
+            self.__executor.shutdown(wait=False, cancel_futures=True)
+            self.__executor = None
+        self.bot = None
@@ -0,0 +1,86 @@
+import asyncio
+
+
+class StderrBuffer:
+    """
+    Keeps the last `limit` bytes a bot wrote to stderr, and counts the ones dropped
+    before them, so the memory used doesn't depend on how much the bot logs.
+    """
+
+    def __init__(self, limit: int = 64 * 1024):
+        """
+        :param limit: The number of bytes to keep
+        :type limit: int
+        """
+        self.limit = limit
+        self.__data = bytearray()
+        self.__dropped = 0
+
+    @property
+    def dropped(self) -> int:
+        """
+        Get the number of bytes dropped because the buffer was full.
+
+        :rtype: int
+        """
+        return self.__dropped
+
+    @property
+    def total(self) -> int:
+        """
+        Get the number of bytes written to the buffer, kept or dropped.
+
+        :rtype: int
+        """
+        return self.__dropped + len(self.__data)
+
+    def __len__(self) -> int:
+        return len(self.__data)
+
+    def write(self, chunk: bytes) -> None:
+        """
+        Append a chunk, dropping the oldest bytes past the limit.
+
+        :param chunk: The bytes read from stderr
+        :type chunk: bytes
+        """
+        if len(chunk) >= self.limit:
+            self.__dropped += len(self.__data) + len(chunk) - self.limit
+            self.__data = bytearray(chunk[len(chunk) - self.limit:])
+            return
+
+        self.__data += chunk
+        excess = len(self.__data) - self.limit
+        if excess > 0:
+            del self.__data[:excess]
+            self.__dropped += excess
+
+    def clear(self) -> None:
+        """
+        Forget the bytes kept and dropped so far, e.g. between the matches of a pooled container.
+        """
+        self.__data = bytearray()
+        self.__dropped = 0
+
+    def text(self) -> str:
+        """
+        Get the bytes kept, decoded as UTF-8.
+
+        :rtype: str
+        """
+        return self.__data.decode("utf-8", errors="replace")
+
+    async def drain(self, stream: asyncio.StreamReader, chunk_size: int = 4096) -> None:
+        """
+        Read a stream into the buffer until EOF, so the writer never blocks on a full pipe.
+
+        :param stream: The stderr of the bot process
+        :type stream: asyncio.StreamReader
+        :param chunk_size: The maximum number of bytes read at once
+        :type chunk_size: int
+        """
+        while True:
+            chunk = await stream.read(chunk_size)
+            if not chunk:
+                return
+            self.write(chunk)
@@ -0,0 +1,301 @@
+"""
+Binary replay format, all integers little-endian:
+
+    header  magic "HTRP", version (u16), board size (u16), N_STELLA (u16),
+            initial row and col of player 1 and player 2 (u16 each),
+            then the image of each bot as a length (u16) followed by UTF-8 bytes
+    ticks   one 3 byte record per tick: move 1, move 2, outcome (u8 each)
+
+The moves are the ones given to GameState.tick, and the outcome encodes what it returned.
+A move that doesn't fit in a byte is recorded as MOVE_INVALID, which tick treats the same way.
+
+A record is only complete once its 3 bytes are on disk. A replay that is still being
+written can be opened, but the reader maps the file once: it only sees the ticks that
+were flushed before it was opened.
+"""
+
+import mmap
+import os
+import struct
+
+from src.backend.consts import PLAYER_1, PLAYER_2, N_STELLA, PLAYERS_COLLIDED, BOTH_DEAD
+from src.backend.GameState import GameState
+from src.backend.player import Player
+
+
+MAGIC = b"HTRP"
+VERSION = 1
+
+HEADER = struct.Struct("<4sHHHHHHH")
+IMAGE_LENGTH = struct.Struct("<H")
+TICK = struct.Struct("<BBB")
+TICKS_PER_CHUNK = 65536  # ticks copied out of the file at once when iterating
+
+# Move byte of the moves that don't fit in one, any other move that isn't 1 to 4 is kept
+MOVE_INVALID = 0xFF
+
+# Outcome byte of a tick record, any other value is the number of the winner
+OUTCOME_NONE = 0xFF
+OUTCOME_PLAYERS_COLLIDED = 0xFE
+OUTCOME_BOTH_DEAD = 0xFD
+
+
+class InvalidReplayError(Exception):
+    pass
+
+
+def encode_move(move: int) -> int:
+    """
+    Encode a move given to GameState.tick as the move byte of a tick record.
+
+    Every move that isn't 1 to 4 is invalid, but as a previous move 0 means there is none.
+    So the moves that fit in a byte are kept, and the rest, e.g. negative numbers, become MOVE_INVALID.
+
+    :param move: The move given to GameState.tick
+    :type move: int
+    :return: The move byte
+    :rtype: int
+    """
+    try:
+        if 0 <= move <= 0xFF and move == int(move):
+            return int(move)
+    except (TypeError, ValueError, OverflowError):
+        pass
+    return MOVE_INVALID
+
+
+def encode_outcome(collision: Player | int | None) -> int:
+    """
+    Encode the value returned by GameState.tick as the outcome byte of a tick record.
+
+    :param collision: The value returned by GameState.tick
+    :type collision: Player | int | None
+    :return: The outcome byte
+    :rtype: int
+    """
+    if collision is None:
+        return OUTCOME_NONE
+    if isinstance(collision, Player):
+        return collision.number
+    if collision == PLAYERS_COLLIDED:
+        return OUTCOME_PLAYERS_COLLIDED
+    if collision == BOTH_DEAD:
+        return OUTCOME_BOTH_DEAD
+
+    raise ValueError(f"Unknown collision type: {collision}")
+
+
+class ReplayWriter:
+    """
+    Streams the ticks of a game to a replay file while it's being played.
+    """
+
+    def __init__(self, path: str, game: GameState, bot_images: tuple[str, str] = ("", ""), flush_every: int = 64):
+        """
+        Create the replay file and write its header.
+
+        :param path: The path of the replay file
+        :type path: str
+        :param game: The game to record, before its first tick
+        :type game: GameState
+        :param bot_images: The images of the bots that play the game
+        :type bot_images: tuple[str, str]
+        :param flush_every: Number of ticks after which the file is flushed
+        :type flush_every: int
+        """
+        if game.tick_count != 0:
+            raise ValueError("The replay must start before the first tick")
+        if len(game.players) != 2:
+            raise ValueError("Replays can only record games of two players")
+
+        self.__file = open(path, "wb")
+        self.__flush_every = flush_every
+        self.__pending = 0
+
+        (row_1, col_1), (row_2, col_2) = game.player_1.head, game.player_2.head
+        self.__file.write(HEADER.pack(MAGIC, VERSION, game.size, N_STELLA, row_1, col_1, row_2, col_2))
+        for image in bot_images:
+            encoded = image.encode("utf-8")
+            self.__file.write(IMAGE_LENGTH.pack(len(encoded)) + encoded)
+        self.__file.flush()
+
+    def record(self, move_1: int, move_2: int, collision: Player | int | None) -> None:
+        """
+        Append one tick to the replay. The moves are encoded with encode_move.
+
+        :param move_1: The move given to GameState.tick for player 1
+        :type move_1: int
+        :param move_2: The move given to GameState.tick for player 2
+        :type move_2: int
+        :param collision: The value returned by GameState.tick
+        :type collision: Player | int | None
+        """
+        self.__file.write(TICK.pack(encode_move(move_1), encode_move(move_2), encode_outcome(collision)))
+        self.__pending += 1
+        if self.__pending >= self.__flush_every:
+            self.__file.flush()
+            self.__pending = 0
+
+    def close(self) -> None:
+        self.__file.close()
+
+    def __enter__(self) -> "ReplayWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class ReplayReader:
+    """
+    Reads a replay file through mmap, so only the pages that are used are loaded.
+    """
+
+    def __init__(self, path: str):
+        """
+        Open the replay file and read its header.
+
+        :param path: The path of the replay file
+        :type path: str
+        :raises InvalidReplayError: If the file is not a replay this version can read
+        """
+        with open(path, "rb") as file:
+            # An empty file can't be mapped
+            if os.fstat(file.fileno()).st_size < HEADER.size:
+                raise InvalidReplayError(f"{path} is too short to be a replay")
+            self.__mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            self.__read_header(path)
+        except InvalidReplayError:
+            self.__mmap.close()
+            raise
+        except (struct.error, UnicodeDecodeError) as e:
+            self.__mmap.close()
+            raise InvalidReplayError(f"{path} has a truncated or corrupt header: {e}") from e
+
+    def __read_header(self, path: str) -> None:
+        """
+        Read the header and the bot images, and find where the ticks start.
+
+        :raises InvalidReplayError: If the file is not a replay this version can read
+        :raises struct.error: If the file ends before the bot images
+        :raises UnicodeDecodeError: If a bot image is not UTF-8
+        """
+        magic, version, size, n_stella, row_1, col_1, row_2, col_2 = HEADER.unpack_from(self.__mmap, 0)
+        if magic != MAGIC:
+            raise InvalidReplayError(f"{path} is not a replay")
+        if version != VERSION:
+            raise InvalidReplayError(f"Unsupported replay version: {version}")
+
+        self.size: int = size
+        self.n_stella: int = n_stella
+        self.initial_positions: tuple[tuple[int, int], tuple[int, int]] = ((row_1, col_1), (row_2, col_2))
+
+        offset = HEADER.size
+        images = []
+        for _ in range(2):
+            (length,) = IMAGE_LENGTH.unpack_from(self.__mmap, offset)
+            offset += IMAGE_LENGTH.size
+            if offset + length > len(self.__mmap):
+                raise InvalidReplayError(f"{path} ends in the middle of a bot image")
+            images.append(bytes(self.__mmap[offset:offset + length]).decode("utf-8"))
+            offset += length
+        self.bot_images: tuple[str, str] = tuple(images)
+        self.__ticks_offset: int = offset
+
+    def __len__(self) -> int:
+        """
+        Get the number of complete tick records.
+        """
+        return (len(self.__mmap) - self.__ticks_offset) // TICK.size
+
+    def tick(self, index: int) -> tuple[int, int, int]:
+        """
+        Get one tick record.
+
+        :param index: The index of the tick, starting at 0
+        :type index: int
+        :return: The two moves and the outcome byte of the tick
+        :rtype: tuple[int, int, int]
+        """
+        if not 0 <= index < len(self):
+            raise IndexError(f"Tick {index} is not in the replay")
+
+        return TICK.unpack_from(self.__mmap, self.__ticks_offset + index * TICK.size)
+
+    def ticks(self, start: int = 0, stop: int | None = None):
+        """
+        Iterate over the tick records, reading them from the file in chunks.
+
+        :param start: The first tick
+        :type start: int
+        :param stop: The tick to stop at, the end of the replay if not given
+        :type stop: int | None
+        :return: An iterator of (move 1, move 2, outcome byte)
+        :rtype: Iterator[tuple[int, int, int]]
+        """
+        stop = len(self) if stop is None else min(stop, len(self))
+        for chunk_start in range(start, stop, TICKS_PER_CHUNK):
+            chunk_stop = min(chunk_start + TICKS_PER_CHUNK, stop)
+            begin = self.__ticks_offset + chunk_start * TICK.size
+            end = self.__ticks_offset + chunk_stop * TICK.size
+            yield from TICK.iter_unpack(self.__mmap[begin:end])
+
+    def state_at(self, tick: int | None = None) -> GameState:
+        """
+        Rebuild the game state after the given number of ticks by playing them again.
+
+        :param tick: The number of ticks to play, all of them if not given
+        :type tick: int | None
+        :return: The game state after those ticks
+        :rtype: GameState
+        :raises InvalidReplayError: If the replay was recorded with another N_STELLA
+        """
+        if self.n_stella != N_STELLA:
+            raise InvalidReplayError(f"The replay was recorded with N_STELLA={self.n_stella}")
+
+        position_1, position_2 = self.initial_positions
+        game = GameState(
+            self.size,
+            Player(PLAYER_1, self.size, initial_position=position_1),
+            Player(PLAYER_2, self.size, initial_position=position_2),
+        )
+        for move_1, move_2, outcome in self.ticks(0, tick):
+            collision = game.tick(move_1, move_2)
+            if encode_outcome(collision) != outcome:
+                raise InvalidReplayError(f"Tick {game.tick_count} doesn't match the recorded outcome")
+
+        return game
+
+    def matches(self, game: GameState) -> bool:
+        """
+        Check that playing the replay again gives the same state as the given game.
+
+        :param game: The live game the replay was recorded from
+        :type game: GameState
+        :return: True if both states are the same, False otherwise
+        :rtype: bool
+        """
+        try:
+            replayed = self.state_at(game.tick_count)
+        except InvalidReplayError:
+            return False
+
+        return (
+            replayed.tick_count == game.tick_count
+            and replayed.player_1.position == game.player_1.position
+            and replayed.player_2.position == game.player_2.position
+            and replayed.board == game.board
+            and replayed.game_over == game.game_over
+            and (replayed.winner and replayed.winner.number) == (game.winner and game.winner.number)
+        )
+
+    def close(self) -> None:
+        self.__mmap.close()
+
+    def __enter__(self) -> "ReplayReader":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
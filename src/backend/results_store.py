@@ -0,0 +1,359 @@
+"""
+A local SQLite database of the results of many matches.
+
+Every match is a row of the matches table, and the totals of every pairing of bots
+(games, wins of each side, draws, outcomes, ticks) are kept up to date in the pairings
+table in the same transaction. The win rates of every bot and of every pairing are read
+from pairings, which has a row per ordered pair of bots however many matches were
+played, so they take the same time with millions of matches as with a few.
+
+A result can have the "id" of its match, e.g. the match ids of a league: a result with
+the id of one already stored is ignored, so adding the same match again is harmless.
+
+The rows are buffered and inserted in batches, one transaction per batch, by the process
+that owns the store. Matches played in other processes are sent to it with their
+results, as run_batch does, instead of opening the database from every worker.
+"""
+
+import sqlite3
+import time
+
+from src.backend.consts import PLAYER_1, PLAYER_2
+from src.backend.metrics import Metrics, PHASE_ROUND_TRIP, PHASE_TICK
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bots (
+    id INTEGER PRIMARY KEY,
+    image TEXT NOT NULL UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS matches (
+    id INTEGER PRIMARY KEY,
+    bot_1 INTEGER NOT NULL REFERENCES bots (id),
+    bot_2 INTEGER NOT NULL REFERENCES bots (id),
+    winner INTEGER,
+    outcome TEXT,
+    ticks INTEGER NOT NULL,
+    duration REAL,
+    round_trip_mean REAL,
+    round_trip_p99 REAL,
+    tick_mean REAL,
+    seed INTEGER,
+    played_at REAL NOT NULL,
+    match_key TEXT
+);
+
+CREATE INDEX IF NOT EXISTS matches_pairing ON matches (bot_1, bot_2);
+CREATE INDEX IF NOT EXISTS matches_bot_2 ON matches (bot_2, bot_1);
+
+CREATE TABLE IF NOT EXISTS pairings (
+    bot_1 INTEGER NOT NULL REFERENCES bots (id),
+    bot_2 INTEGER NOT NULL REFERENCES bots (id),
+    games INTEGER NOT NULL,
+    wins_1 INTEGER NOT NULL,
+    wins_2 INTEGER NOT NULL,
+    draws INTEGER NOT NULL,
+    players_collided INTEGER NOT NULL,
+    both_dead INTEGER NOT NULL,
+    ticks INTEGER NOT NULL,
+    PRIMARY KEY (bot_1, bot_2)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS pairings_bot_2 ON pairings (bot_2);
+"""
+
+# Created after match_key is added to the databases of older versions
+MATCH_KEY_INDEX = "CREATE UNIQUE INDEX IF NOT EXISTS matches_key ON matches (match_key)"
+
+INSERT_MATCH = """
+INSERT INTO matches (
+    bot_1, bot_2, winner, outcome, ticks, duration,
+    round_trip_mean, round_trip_p99, tick_mean, seed, played_at, match_key
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+INSERT_MATCH_ONCE = INSERT_MATCH + "ON CONFLICT (match_key) DO NOTHING"
+
+UPSERT_PAIRING = """
+INSERT INTO pairings (bot_1, bot_2, games, wins_1, wins_2, draws, players_collided, both_dead, ticks)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (bot_1, bot_2) DO UPDATE SET
+    games = games + excluded.games,
+    wins_1 = wins_1 + excluded.wins_1,
+    wins_2 = wins_2 + excluded.wins_2,
+    draws = draws + excluded.draws,
+    players_collided = players_collided + excluded.players_collided,
+    both_dead = both_dead + excluded.both_dead,
+    ticks = ticks + excluded.ticks
+"""
+
+# The totals of every bot, from both sides of its pairings
+SELECT_WIN_RATES = """
+SELECT bots.image, SUM(games), SUM(wins), SUM(draws), SUM(ticks)
+FROM (
+    SELECT bot_1 AS bot, games, wins_1 AS wins, draws, ticks FROM pairings
+    UNION ALL
+    SELECT bot_2 AS bot, games, wins_2 AS wins, draws, ticks FROM pairings
+) AS sides
+JOIN bots ON bots.id = sides.bot
+GROUP BY sides.bot
+"""
+
+SELECT_PAIRING = """
+SELECT bot_1, games, wins_1, wins_2, draws, players_collided, both_dead, ticks
+FROM pairings
+WHERE (bot_1 = ? AND bot_2 = ?) OR (bot_1 = ? AND bot_2 = ?)
+"""
+
+
+def _rates(games: int, wins: int, draws: int, ticks: int) -> dict:
+    losses = games - wins - draws
+    return {
+        "games": games,
+        "wins": wins,
+        "draws": draws,
+        "losses": losses,
+        "win_rate": wins / games if games else 0.0,
+        "mean_ticks": ticks / games if games else 0.0,
+    }
+
+
+class ResultsStore:
+    """
+    Stores the results returned by run_match in a SQLite database.
+    """
+
+    def __init__(self, path: str, batch_size: int = 500):
+        """
+        :param path: The database file, created if it doesn't exist
+        :type path: str
+        :param batch_size: The number of results buffered before they are inserted
+        :type batch_size: int
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.__connection = sqlite3.connect(path, timeout=30, isolation_level=None)
+        # Readers don't block the writer, and a commit doesn't wait for the disk
+        self.__connection.execute("PRAGMA journal_mode = WAL")
+        self.__connection.execute("PRAGMA synchronous = NORMAL")
+        self.__connection.executescript(SCHEMA)
+        columns = [row[1] for row in self.__connection.execute("PRAGMA table_info(matches)")]
+        if "match_key" not in columns:
+            self.__connection.execute("ALTER TABLE matches ADD COLUMN match_key TEXT")
+        self.__connection.execute(MATCH_KEY_INDEX)
+        self.__bot_ids: dict[str, int] = {
+            image: bot_id for bot_id, image in self.__connection.execute("SELECT id, image FROM bots")
+        }
+        self.__pending: list[dict] = []
+
+    def __enter__(self) -> "ResultsStore":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    @property
+    def pending(self) -> int:
+        """
+        Get the number of results waiting to be inserted.
+
+        :rtype: int
+        """
+        return len(self.__pending)
+
+    def add(self, result: dict) -> None:
+        """
+        Buffer the result of a match, inserting the buffer once it has batch_size results.
+
+        :param result: A result returned by run_match, its "metrics" and "seed" are optional.
+            With an "id", it's ignored if a result with the same id is already stored.
+        :type result: dict
+        """
+        self.__pending.append(self.__row(result))
+        if len(self.__pending) >= self.batch_size:
+            self.flush()
+
+    def add_many(self, results: list[dict]) -> None:
+        """
+        Buffer the results of many matches, see add.
+        """
+        for result in results:
+            self.add(result)
+
+    @staticmethod
+    def __row(result: dict) -> dict:
+        round_trip_mean = round_trip_p99 = tick_mean = None
+        metrics: Metrics | None = result.get("metrics")
+        if metrics is not None:
+            round_trip = metrics.combined(PHASE_ROUND_TRIP)
+            tick = metrics.combined(PHASE_TICK)
+            if round_trip.count:
+                round_trip_mean = round_trip.sum / round_trip.count
+                round_trip_p99 = round_trip.quantile(0.99)
+            if tick.count:
+                tick_mean = tick.sum / tick.count
+
+        return {
+            "bot_1": result["bot_1"],
+            "bot_2": result["bot_2"],
+            "winner": result["winner"],
+            "outcome": result.get("outcome"),
+            "ticks": result["ticks"],
+            "duration": result.get("duration"),
+            "round_trip_mean": round_trip_mean,
+            # An estimate past the last bucket is stored as NULL rather than infinity
+            "round_trip_p99": round_trip_p99 if round_trip_p99 != float("inf") else None,
+            "tick_mean": tick_mean,
+            "seed": result.get("seed"),
+            "played_at": time.time(),
+            "key": result.get("id"),
+        }
+
+    def __bot_id(self, image: str) -> int:
+        bot_id = self.__bot_ids.get(image)
+        if bot_id is None:
+            self.__connection.execute("INSERT OR IGNORE INTO bots (image) VALUES (?)", (image,))
+            (bot_id,) = self.__connection.execute("SELECT id FROM bots WHERE image = ?", (image,)).fetchone()
+            self.__bot_ids[image] = bot_id
+        return bot_id
+
+    def __find_bot(self, image: str) -> int | None:
+        # Read from the database, another process may have added the bot
+        row = self.__connection.execute("SELECT id FROM bots WHERE image = ?", (image,)).fetchone()
+        return row[0] if row else None
+
+    def flush(self) -> None:
+        """
+        Insert the buffered results and update the totals of their pairings in one transaction.
+        The results with an id are inserted one by one, to skip the ones already stored.
+        """
+        if not self.__pending:
+            return
+
+        rows, self.__pending = self.__pending, []
+        connection = self.__connection
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            matches = []
+            pairings: dict[tuple[int, int], list[int]] = {}
+            for row in rows:
+                bot_1, bot_2 = self.__bot_id(row["bot_1"]), self.__bot_id(row["bot_2"])
+                values = (
+                    bot_1, bot_2, row["winner"], row["outcome"], row["ticks"], row["duration"],
+                    row["round_trip_mean"], row["round_trip_p99"], row["tick_mean"], row["seed"], row["played_at"],
+                    row["key"],
+                )
+                if row["key"] is None:
+                    matches.append(values)
+                elif not connection.execute(INSERT_MATCH_ONCE, values).rowcount:
+                    continue  # Already stored, its pairing already counts it
+
+                totals = pairings.setdefault((bot_1, bot_2), [0] * 7)
+                totals[0] += 1
+                totals[1] += row["winner"] == PLAYER_1
+                totals[2] += row["winner"] == PLAYER_2
+                totals[3] += row["winner"] is None
+                totals[4] += row["outcome"] == "players_collided"
+                totals[5] += row["outcome"] == "both_dead"
+                totals[6] += row["ticks"]
+
+            connection.executemany(INSERT_MATCH, matches)
+            connection.executemany(UPSERT_PAIRING, (key + tuple(totals) for key, totals in pairings.items()))
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            self.__pending = rows + self.__pending
+            # The ids of bots inserted in the rolled back transaction are gone
+            self.__bot_ids = {
+                image: bot_id for bot_id, image in connection.execute("SELECT id, image FROM bots")
+            }
+            raise
+
+    def win_rates(self) -> list[dict]:
+        """
+        Get the totals of every bot over all its matches, from either side.
+
+        :return: For every bot: "bot", "games", "wins", "draws", "losses", "win_rate" and
+            "mean_ticks", by win rate
+        :rtype: list[dict]
+        """
+        rows = [
+            {"bot": image, **_rates(games, wins, draws, ticks)}
+            for image, games, wins, draws, ticks in self.__connection.execute(SELECT_WIN_RATES)
+        ]
+        return sorted(rows, key=lambda row: (-row["win_rate"], row["bot"]))
+
+    def pairing(self, bot: str, opponent: str) -> dict:
+        """
+        Get the totals of the matches between two bots, whichever side each one played,
+        from the point of view of the first one.
+
+        :param bot: The image of the bot
+        :type bot: str
+        :param opponent: The image of its opponent
+        :type opponent: str
+        :return: "games", "wins", "draws", "losses", "win_rate" and "mean_ticks" of the bot,
+            and how many games ended with "players_collided" and "both_dead"
+        :rtype: dict
+        """
+        bot_id, opponent_id = self.__find_bot(bot), self.__find_bot(opponent)
+        games = wins = draws = ticks = players_collided = both_dead = 0
+        if bot_id is not None and opponent_id is not None:
+            for row in self.__connection.execute(SELECT_PAIRING, (bot_id, opponent_id, opponent_id, bot_id)):
+                bot_1, row_games, wins_1, wins_2, row_draws, row_collided, row_both_dead, row_ticks = row
+                games += row_games
+                wins += wins_1 if bot_1 == bot_id else wins_2
+                draws += row_draws
+                players_collided += row_collided
+                both_dead += row_both_dead
+                ticks += row_ticks
+
+        return {**_rates(games, wins, draws, ticks), "players_collided": players_collided, "both_dead": both_dead}
+
+    def matches(self, bot: str, opponent: str | None = None, limit: int = 100) -> list[dict]:
+        """
+        Get the latest matches of a bot, optionally only against one opponent.
+
+        :param bot: The image of the bot
+        :type bot: str
+        :param opponent: The image of the opponent, any if not given
+        :type opponent: str | None
+        :param limit: The maximum number of matches
+        :type limit: int
+        :return: The matches, newest first, with the columns of the matches table and the images of the bots
+        :rtype: list[dict]
+        """
+        bot_id = self.__find_bot(bot)
+        opponent_id = self.__find_bot(opponent) if opponent is not None else None
+        if bot_id is None or (opponent is not None and opponent_id is None):
+            return []
+
+        if opponent_id is None:
+            where, params = "bot_1 = ?1 OR bot_2 = ?1", (bot_id,)
+        else:
+            where, params = "(bot_1 = ?1 AND bot_2 = ?2) OR (bot_1 = ?2 AND bot_2 = ?1)", (bot_id, opponent_id)
+
+        cursor = self.__connection.execute(
+            f"""
+            SELECT matches.*, one.image, two.image FROM matches
+            JOIN bots AS one ON one.id = matches.bot_1
+            JOIN bots AS two ON two.id = matches.bot_2
+            WHERE {where}
+            ORDER BY matches.id DESC LIMIT {int(limit)}
+            """,
+            params
+        )
+        columns = [column[0] for column in cursor.description[:-2]]
+        return [
+            {**dict(zip(columns, row[:-2])), "bot_1": row[-2], "bot_2": row[-1]}
+            for row in cursor
+        ]
+
+    def close(self) -> None:
+        """
+        Insert the buffered results and close the database.
+        """
+        try:
+            self.flush()
+        finally:
+            self.__connection.close()
@@ -0,0 +1,83 @@
+import json
+
+from src.backend.consts import PLAYER_1, PLAYER_2
+
+
+class StateEncoder:
+    """
+    Builds the JSON of GameState.serialize_for_player for both players of a game,
+    the same as json.dumps would, without encoding the shared parts twice.
+
+    Each player's trail is encoded once per tick and used as "me" in one payload and
+    as "opponent" in the other. The board is kept as one JSON string per row, and
+    only the rows a tick can have changed are encoded again: the board is only written
+    at the cells of the players' trails before and after the tick.
+    """
+
+    def __init__(self, game):
+        """
+        :param game: The game to encode
+        :type game: GameState | GridGameState
+        """
+        self.__game = game
+        self.__prefix: str = '{"board_size": ' + json.dumps(game.size) + ', "me": '
+
+        self.__version: int | None = None
+        self.__players: dict[int, str] = {}
+        self.__rows: list[str] = []
+        self.__board: str = ""
+        # The trails at the last encoding, the cells whose rows may change in the next tick.
+        # A tick undone by GameState.unmake_move only changes the same cells.
+        self.__positions: list[tuple[int, int] | None] = []
+
+    def __current_positions(self) -> list[tuple[int, int] | None]:
+        return self.__game.player_1.position + self.__game.player_2.position
+
+    def __update(self) -> None:
+        """
+        Encode again the parts that changed since the last encoded tick.
+        """
+        game = self.__game
+        version = game.version
+        positions = self.__current_positions()
+
+        if self.__version is None or version != self.__version + 1:
+            # First encoding, or more than one change was missed: encode the whole board
+            self.__rows = [json.dumps(game.board_row(row)) for row in range(game.size)]
+        else:
+            dirty_rows = {pos[0] for pos in self.__positions + positions if pos is not None}
+            for row in dirty_rows:
+                self.__rows[row] = json.dumps(game.board_row(row))
+
+        self.__board = "[" + ", ".join(self.__rows) + "]"
+        self.__players = {
+            PLAYER_1: json.dumps(game.player_1.serialize()),
+            PLAYER_2: json.dumps(game.player_2.serialize()),
+        }
+        self.__positions = positions
+        self.__version = version
+
+    def encode_for_player(self, player_number: int) -> str:
+        """
+        Get json.dumps(game.serialize_for_player(player_number)) for the current tick.
+
+        :param player_number: The number of the player (PLAYER_1 or PLAYER_2)
+        :type player_number: int
+        :return: The serialized game state for that player
+        :rtype: str
+        """
+        if player_number == PLAYER_1:
+            opponent_number = PLAYER_2
+        elif player_number == PLAYER_2:
+            opponent_number = PLAYER_1
+        else:
+            raise ValueError("Número de jugador no válido")
+
+        if self.__version != self.__game.version:
+            self.__update()
+
+        return (
+            self.__prefix + self.__players[player_number]
+            + ', "opponent": ' + self.__players[opponent_number]
+            + ', "board": ' + self.__board + "}"
+        )
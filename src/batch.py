@@ -0,0 +1,276 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from src.backend.args import get_batch_args
+from src.backend.consts import PLAYER_1, PLAYER_2
+from src.backend.events import LEVELS, configure, log
+from src.backend.match import run_match
+from src.backend.metrics import Metrics
+from src.backend.players.bot_player import offered_features, offered_protocols
+from src.backend.players.container_pool import ContainerPools
+from src.backend.players.local_process_player import ResourceLimits
+from src.backend.results_store import ResultsStore
+
+
+def split_games(games: int, shards: int) -> list[int]:
+    """
+    Split a number of games into shards of (almost) equal size.
+
+    :param games: The total number of games
+    :type games: int
+    :param shards: The number of shards
+    :type shards: int
+    :return: The number of games in each non-empty shard
+    :rtype: list[int]
+    """
+    base, extra = divmod(games, shards)
+    sizes = [base + (1 if i < extra else 0) for i in range(shards)]
+    return [size for size in sizes if size > 0]
+
+
+async def play_shard(
+    bot_1_image: str,
+    bot_2_image: str,
+    games: int,
+    size: int,
+    bot_options: dict | None = None,
+    pool_size: int = 0,
+    max_uses: int = 50,
+    replay_dir: str | None = None,
+    seed: int | None = None,
+    bot_commands: tuple[str | None, str | None] = (None, None),
+    resource_limits: ResourceLimits | None = None
+) -> dict:
+    """
+    Play a shard of matches one after another.
+
+    :param bot_1_image: The Docker image for Bot 1
+    :type bot_1_image: str
+    :param bot_2_image: The Docker image for Bot 2
+    :type bot_2_image: str
+    :param games: The number of games to play
+    :type games: int
+    :param size: The size of the game board
+    :type size: int
+    :param bot_options: Keyword arguments for both BotPlayers, see create_player.
+    :type bot_options: dict | None
+    :param pool_size: Number of warm containers kept per image in each worker, 0 to disable the pools
+    :type pool_size: int
+    :param max_uses: Number of games after which a warm container is replaced
+    :type max_uses: int
+    :param replay_dir: Directory to record a replay of every game to, if any
+    :type replay_dir: str | None
+    :param seed: The seed of the first game, the next ones use seed + 1, seed + 2...
+    :type seed: int | None
+    :param bot_commands: Commands that run each bot as a local process instead of its image
+    :type bot_commands: tuple[str | None, str | None]
+    :param resource_limits: The limits of the local bot processes, if any
+    :type resource_limits: ResourceLimits | None
+    :return: The results of the finished matches and the number of failed ones
+    :rtype: dict
+    """
+    pools = ContainerPools(pool_size, max_uses) if pool_size > 0 else None
+
+    results = []
+    errors = 0
+    try:
+        for game in range(games):
+            match_id = f"{os.getpid()}-{game}"
+            replay_path = os.path.join(replay_dir, f"{match_id}.htr") if replay_dir else None
+            game_seed = seed + game if seed is not None else None
+            try:
+                results.append(await run_match(
+                    bot_1_image, bot_2_image, size, pools, bot_options, replay_path, game_seed,
+                    bot_commands, resource_limits, match_id
+                ))
+            except Exception as e:
+                log.error("match_failed", error=str(e))
+                errors += 1
+    finally:
+        if pools:
+            await pools.close()
+
+    return {"results": results, "errors": errors}
+
+
+def run_shard(
+    bot_1_image: str,
+    bot_2_image: str,
+    games: int,
+    size: int,
+    bot_options: dict | None = None,
+    pool_size: int = 0,
+    max_uses: int = 50,
+    replay_dir: str | None = None,
+    seed: int | None = None,
+    bot_commands: tuple[str | None, str | None] = (None, None),
+    resource_limits: ResourceLimits | None = None,
+    log_level: int | None = None,
+    log_file: str | None = None
+) -> dict:
+    """
+    Entry point of a worker process, see play_shard.
+    The worker's event log is configured with log_level and log_file if a level is given.
+    """
+    if log_level is not None:
+        configure(log_level, log_file)
+    return asyncio.run(
+        play_shard(
+            bot_1_image, bot_2_image, games, size, bot_options, pool_size, max_uses, replay_dir, seed,
+            bot_commands, resource_limits
+        )
+    )
+
+
+def summarize(results: list[dict], errors: int, elapsed: float) -> dict:
+    """
+    Aggregate the results of many matches from the point of view of Bot 1.
+
+    :param results: The results returned by run_match
+    :type results: list[dict]
+    :param errors: The number of matches that could not be played
+    :type errors: int
+    :param elapsed: Wall clock seconds spent on the whole batch
+    :type elapsed: float
+    :return: The aggregated results
+    :rtype: dict
+    """
+    wins = sum(1 for result in results if result["winner"] == PLAYER_1)
+    losses = sum(1 for result in results if result["winner"] == PLAYER_2)
+    ticks = sum(result["ticks"] for result in results)
+
+    return {
+        "games": len(results),
+        "wins": wins,
+        "draws": len(results) - wins - losses,
+        "losses": losses,
+        "errors": errors,
+        "ticks": ticks,
+        "elapsed": elapsed,
+        "matches_per_second": len(results) / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+def run_batch(
+    bot_1_image: str,
+    bot_2_image: str,
+    games: int,
+    size: int = 16,
+    workers: int | None = None,
+    bot_options: dict | None = None,
+    pool_size: int = 0,
+    max_uses: int = 50,
+    replay_dir: str | None = None,
+    seed: int | None = None,
+    bot_commands: tuple[str | None, str | None] = (None, None),
+    resource_limits: ResourceLimits | None = None,
+    log_level: int | None = None,
+    log_file: str | None = None,
+    results_store: ResultsStore | None = None
+) -> dict:
+    """
+    Play a batch of headless matches sharded across a pool of processes.
+
+    :param bot_1_image: The Docker image for Bot 1
+    :type bot_1_image: str
+    :param bot_2_image: The Docker image for Bot 2
+    :type bot_2_image: str
+    :param games: The number of games to play
+    :type games: int
+    :param size: The size of the game board
+    :type size: int
+    :param workers: The number of worker processes, defaults to the number of CPU cores
+    :type workers: int | None
+    :param bot_options: Keyword arguments for both BotPlayers, see create_player.
+    :type bot_options: dict | None
+    :param pool_size: Number of warm containers kept per image in each worker, 0 to disable the pools
+    :type pool_size: int
+    :param max_uses: Number of games after which a warm container is replaced
+    :type max_uses: int
+    :param replay_dir: Directory to record a replay of every game to, if any
+    :type replay_dir: str | None
+    :param seed: The seed of the first game, the next ones use seed + 1, seed + 2...
+    :type seed: int | None
+    :param bot_commands: Commands that run each bot as a local process instead of its image
+    :type bot_commands: tuple[str | None, str | None]
+    :param resource_limits: The limits of the local bot processes, if any
+    :type resource_limits: ResourceLimits | None
+    :param log_level: The level of the event log of the workers, they keep the default log if not given
+    :type log_level: int | None
+    :param log_file: The file every worker appends its events to as JSON lines, if any
+    :type log_file: str | None
+    :param results_store: Where to add the result of every match as its shard ends, if anywhere.
+        Only this process writes to it, the workers send their results back.
+    :type results_store: ResultsStore | None
+    :return: The aggregated results, see summarize, and the merged "metrics" of every match
+    :rtype: dict
+    """
+    workers = max(1, min(workers or os.cpu_count() or 1, games))
+    if replay_dir:
+        os.makedirs(replay_dir, exist_ok=True)
+
+    results = []
+    errors = 0
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = []
+        first_game = 0
+        for shard in split_games(games, workers):
+            shard_seed = seed + first_game if seed is not None else None
+            futures.append(executor.submit(
+                run_shard, bot_1_image, bot_2_image, shard, size, bot_options,
+                pool_size, max_uses, replay_dir, shard_seed, bot_commands, resource_limits,
+                log_level, log_file
+            ))
+            first_game += shard
+        for future in as_completed(futures):
+            shard_result = future.result()
+            results.extend(shard_result["results"])
+            errors += shard_result["errors"]
+            if results_store is not None:
+                results_store.add_many(shard_result["results"])
+
+    summary = summarize(results, errors, time.perf_counter() - start)
+    summary["metrics"] = Metrics()
+    for result in results:
+        summary["metrics"].merge(result["metrics"])
+    return summary
+
+
+def main():
+    args = get_batch_args()
+    configure(LEVELS[args.log_level], args.log_file)
+
+    bot_options = {
+        "offered_protocols": offered_protocols(args.offer_delta, args.offer_binary),
+        "offered_features": offered_features(args.offer_analysis),
+        "move_timeout": args.move_timeout,
+        "time_bank": args.time_bank,
+        "isolated": args.isolate_plugins,
+    }
+
+    resource_limits = ResourceLimits(args.cpu_time, args.memory * 1024 * 1024 if args.memory else None)
+
+    results_store = ResultsStore(args.results_db) if args.results_db else None
+    try:
+        summary = run_batch(
+            args.bot1, args.bot2, args.games, args.size, args.workers,
+            bot_options, args.warm_pool, args.max_uses, args.replay_dir, args.seed,
+            (args.bot1_cmd, args.bot2_cmd), resource_limits or None,
+            LEVELS[args.log_level], args.log_file, results_store
+        )
+    finally:
+        if results_store is not None:
+            results_store.close()
+
+    print(f"Games played: {summary['games']} ({summary['errors']} failed)")
+    print(f"{args.bot1_cmd or args.bot1} (Bot 1): {summary['wins']} wins, {summary['draws']} draws, {summary['losses']} losses")
+    print(f"Elapsed: {summary['elapsed']:.2f}s ({summary['matches_per_second']:.2f} matches/s)")
+    if args.metrics_file:
+        summary["metrics"].write_prometheus(args.metrics_file)
+
+
+if __name__ == "__main__":
+    main()
@@ -12,7 +12,7 @@ class Frontend:
     Class responsible for rendering the Tron game using Pygame.
     """
 
-    def __init__(self, game: GameState, cell_size: int, caption: str = "Tron Game"):
+    def __init__(self, game: GameState, cell_size: int, caption: str = "Tron Game", headless: bool = False):
         """
         Initializes the Frontend with the game state, cell size, and window caption.
 
@@ -22,6 +22,8 @@ class Frontend:
         :type cell_size: int
         :param caption: The caption for the game window.
         :type caption: str
+        :param headless: Draw on an off-screen surface instead of opening a window.
+        :type headless: bool
         """
         pygame.init()
         self.game = game
@@ -32,68 +34,143 @@ class Frontend:
         self.width = self.base_size
         self.height = self.base_size + 50
 
-        self.screen = pygame.display.set_mode((self.width, self.height))
-        pygame.display.set_caption(caption)
+        self.headless = headless
+        if headless:
+            self.screen = pygame.Surface((self.width, self.height))
+        else:
+            self.screen = pygame.display.set_mode((self.width, self.height))
+            pygame.display.set_caption(caption)
         self.font = pygame.font.Font(None, 36)
         self.clock = pygame.time.Clock()
 
-    def __draw_cell(self, x: int, y: int, color: tuple[int, int, int]) -> None:
-        pygame.draw.rect(
-            self.screen,
-            color,
-            (x * self.cell_size, y * self.cell_size, self.cell_size, self.cell_size)
-        )
+        self.background = self.__render_background()
+        # The cells drawn over the background in the last frame, None to redraw everything
+        self.__drawn: dict[tuple[int, int], tuple[int, int, int]] | None = None
+
+    def __cell_rect(self, x: int, y: int) -> pygame.Rect:
+        return pygame.Rect(x * self.cell_size, y * self.cell_size, self.cell_size, self.cell_size)
+
+    def __draw_cell(self, x: int, y: int, color: tuple[int, int, int], surface: pygame.Surface | None = None) -> None:
+        pygame.draw.rect(surface or self.screen, color, self.__cell_rect(x, y))
 
-    def draw_grid(self) -> None:
+    def draw_grid(self, surface: pygame.Surface | None = None) -> None:
         for i in range(self.game.size):
             for j in range(self.game.size):
                 if i % 3 == 0 or j % 3 == 0:
-                    self.__draw_cell(i, j, COLOR_GREY)
+                    self.__draw_cell(i, j, COLOR_GREY, surface)
                 else:
-                    self.__draw_cell(i, j, COLOR_PURPLE)
+                    self.__draw_cell(i, j, COLOR_PURPLE, surface)
 
-    def __draw_player_head(self, player: Player) -> None:
-        head_pos = player.position[0]
-        if head_pos is None:
-            raise ValueError("Player head position is None")
+    def __draw_walls(self, surface: pygame.Surface | None = None) -> None:
+        for wall in self.game.walls:
+            self.__draw_cell(wall[1], wall[0], COLOR_WALL, surface)
 
-        if player.number == PLAYER_1:
-            color = COLOR_P1_HEAD
+    def __render_background(self) -> pygame.Surface:
+        """
+        Draw the parts of the board that never change: the grid and the walls.
+        """
+        background = pygame.Surface((self.width, self.height))
+        background.fill(COLOR_BLACK)
+        self.draw_grid(background)
+        self.__draw_walls(background)
+        return background
 
+    def __player_colors(self, player: Player) -> tuple[tuple[int, int, int], tuple[int, int, int]]:
+        if player.number == PLAYER_1:
+            return COLOR_P1_HEAD, COLOR_P1_TRAIL
         elif player.number == PLAYER_2:
-            color = COLOR_P2_HEAD
-
+            return COLOR_P2_HEAD, COLOR_P2_TRAIL
+        elif player.number > PLAYER_2:
+            return COLORS_OTHER_PLAYERS[(player.number - 3) % len(COLORS_OTHER_PLAYERS)]
         else:
             raise ValueError("Invalid player number")
 
-        self.__draw_cell(head_pos[1], head_pos[0], color)
-
-    def __draw_player_trail(self, player: Player) -> None:
-        for pos in player.position[1:]:
-            if pos is None:
-                break
-            if player.number == PLAYER_1:
-                color = COLOR_P1_TRAIL
-            elif player.number == PLAYER_2:
-                color = COLOR_P2_TRAIL
-            else:
-                raise ValueError("Invalid player number")
-            self.__draw_cell(pos[1], pos[0], color)
+    def player_cells(self) -> dict[tuple[int, int], tuple[int, int, int]]:
+        """
+        Get the cells of the players in the game with the color each one is drawn with.
+        The heads go before the trails, so a trail covers a head on the same cell.
+        It's all draw_cells needs from the game.
 
-    def __draw_walls(self) -> None:
-        for wall in self.game.board.walls:
-            self.__draw_cell(wall[1], wall[0], COLOR_WALL)
+        :return: The color of every (row, col) a player is on
+        :rtype: dict[tuple[int, int], tuple[int, int, int]]
+        """
+        players = self.game.alive_players
+        cells = {}
+        for player in players:
+            head_pos = player.position[0]
+            if head_pos is None:
+                raise ValueError("Player head position is None")
+            cells[head_pos] = self.__player_colors(player)[0]
+
+        for player in players:
+            trail_color = self.__player_colors(player)[1]
+            for pos in player.position[1:]:
+                if pos is None:
+                    break
+                cells[pos] = trail_color
+
+        return cells
+
+    def invalidate(self) -> None:
+        """
+        Make the next draw_game_board redraw the whole screen.
+        """
+        self.__drawn = None
 
     def draw_game_board(self) -> None:
-        self.screen.fill(COLOR_BLACK)
-        self.draw_grid()
-        self.__draw_player_head(self.game.player_1)
-        self.__draw_player_head(self.game.player_2)
-        self.__draw_player_trail(self.game.player_1)
-        self.__draw_player_trail(self.game.player_2)
-        pygame.display.flip()
+        """
+        Draw the players over the cached background. Only the cells that changed
+        since the last frame are drawn and updated on the display.
+        """
+        self.update_display(self.draw_cells(self.player_cells()))
+
+    def draw_cells(self, cells: dict[tuple[int, int], tuple[int, int, int]]) -> list[pygame.Rect] | None:
+        """
+        Draw the given cells over the cached background on the screen surface, without
+        updating the display. It doesn't read the game, so it can run in another thread
+        while the game goes on.
+
+        :param cells: The cells to draw, see player_cells
+        :type cells: dict[tuple[int, int], tuple[int, int, int]]
+        :return: The rects that changed, None if the whole screen was drawn again
+        :rtype: list[pygame.Rect] | None
+        """
+        if self.__drawn is None:
+            self.screen.blit(self.background, (0, 0))
+            for (row, col), color in cells.items():
+                self.__draw_cell(col, row, color)
+            self.__drawn = cells
+            return None
+
+        dirty = []
+        for pos, color in cells.items():
+            if self.__drawn.get(pos) != color:
+                self.__draw_cell(pos[1], pos[0], color)
+                dirty.append(self.__cell_rect(pos[1], pos[0]))
+        for pos in self.__drawn.keys() - cells.keys():
+            rect = self.__cell_rect(pos[1], pos[0])
+            self.screen.blit(self.background, rect, rect)
+            dirty.append(rect)
+
+        self.__drawn = cells
+        return dirty
+
+    def update_display(self, dirty: list[pygame.Rect] | None) -> None:
+        """
+        Show what draw_cells drew in the window.
+
+        :param dirty: The rects returned by draw_cells
+        :type dirty: list[pygame.Rect] | None
+        """
+        if self.headless:
+            return
+        if dirty is None:
+            pygame.display.flip()
+        elif dirty:
+            pygame.display.update(dirty)
 
     def display_winner(self, winner: int) -> None:
+        self.invalidate()
         self.screen.fill(COLOR_BLACK)
         if winner is None:
             text = "It's a draw!"
@@ -10,4 +10,16 @@ COLOR_P1_HEAD = (0, 255, 255)  # Brighter Blue/Cyan
 COLOR_P2_TRAIL = (255, 50, 50)  # Red
 COLOR_P2_HEAD = (255, 150, 150)  # Brighter Red/Pink
 
+# (head, trail) colors of players 3 and up in free-for-all games
+COLORS_OTHER_PLAYERS = [
+    ((150, 255, 150), (50, 200, 50)),  # Green
+    ((255, 255, 150), (220, 200, 0)),  # Yellow
+    ((255, 200, 120), (255, 130, 0)),  # Orange
+    ((255, 150, 255), (200, 0, 200)),  # Magenta
+    ((200, 255, 255), (0, 170, 170)),  # Teal
+    ((255, 255, 255), (170, 170, 170)),  # White/Grey
+    ((210, 180, 140), (140, 90, 40)),  # Brown
+    ((180, 200, 255), (60, 80, 200)),  # Indigo
+]
+
 COLOR_GAME_OVER_TEXT = (255, 255, 0)  # Yellow for win/loss text
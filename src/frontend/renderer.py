@@ -0,0 +1,200 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# The frames are drawn off-screen, pygame must not look for a display
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+
+from src.backend.consts import PLAYER_1, PLAYER_2
+from src.backend.events import ERROR, configure
+from src.backend.GameState import GameState
+from src.backend.player import Player
+from src.backend.replay import ReplayReader
+
+from src.frontend.Frontend import Frontend
+
+CELL_SIZE = 30
+FRAME_NAME = "frame_{:06d}.png"
+# The invalid moves of a replay were already logged when the match was played
+LOG_LEVEL = ERROR
+
+
+def split_frames(frames: int, shards: int) -> list[tuple[int, int]]:
+    """
+    Split the frames of a match into contiguous ranges of (almost) equal size.
+
+    :param frames: The number of frames
+    :type frames: int
+    :param shards: The number of ranges
+    :type shards: int
+    :return: The (start, stop) of each non-empty range
+    :rtype: list[tuple[int, int]]
+    """
+    base, extra = divmod(frames, shards)
+    ranges = []
+    start = 0
+    for i in range(shards):
+        stop = start + base + (1 if i < extra else 0)
+        if stop > start:
+            ranges.append((start, stop))
+        start = stop
+    return ranges
+
+
+def render_frames(
+    size: int,
+    initial_positions: tuple[tuple[int, int], tuple[int, int]],
+    moves: list[tuple[int, int]],
+    out_dir: str,
+    start: int = 0,
+    stop: int | None = None,
+    cell_size: int = CELL_SIZE
+) -> int:
+    """
+    Play a match again and save the frames in [start, stop) as PNG files, without a display.
+    Frame N shows the board after N ticks, so frame 0 is the initial state.
+
+    :param size: The size of the game board
+    :type size: int
+    :param initial_positions: The initial (row, col) of player 1 and player 2
+    :type initial_positions: tuple[tuple[int, int], tuple[int, int]]
+    :param moves: The moves of both players on every tick
+    :type moves: list[tuple[int, int]]
+    :param out_dir: The directory to save the frames to
+    :type out_dir: str
+    :param start: The first frame to save
+    :type start: int
+    :param stop: The frame to stop at, the last one (len(moves) + 1) if not given
+    :type stop: int | None
+    :param cell_size: The size of each cell in pixels
+    :type cell_size: int
+    :return: The number of frames saved
+    :rtype: int
+    """
+    stop = len(moves) + 1 if stop is None else min(stop, len(moves) + 1)
+    position_1, position_2 = initial_positions
+    game = GameState(
+        size,
+        Player(PLAYER_1, size, initial_position=position_1),
+        Player(PLAYER_2, size, initial_position=position_2),
+    )
+    frontend = Frontend(game, cell_size, headless=True)
+
+    saved = 0
+    for frame in range(stop):
+        if frame > 0:
+            game.tick(*moves[frame - 1])
+        if frame < start:
+            continue
+        frontend.draw_game_board()
+        pygame.image.save(frontend.screen, os.path.join(out_dir, FRAME_NAME.format(frame)))
+        saved += 1
+
+    return saved
+
+
+def read_match(path: str) -> tuple[int, tuple[tuple[int, int], tuple[int, int]], list[tuple[int, int]]]:
+    """
+    Read what render_frames needs from a replay file.
+
+    :param path: The path of the replay file
+    :type path: str
+    :return: The board size, the initial positions and the moves of every tick
+    :rtype: tuple[int, tuple[tuple[int, int], tuple[int, int]], list[tuple[int, int]]]
+    """
+    with ReplayReader(path) as reader:
+        moves = [(move_1, move_2) for move_1, move_2, _ in reader.ticks()]
+        return reader.size, reader.initial_positions, moves
+
+
+def render_match(
+    size: int,
+    initial_positions: tuple[tuple[int, int], tuple[int, int]],
+    moves: list[tuple[int, int]],
+    out_dir: str,
+    workers: int | None = None,
+    cell_size: int = CELL_SIZE,
+    log_level: int = LOG_LEVEL
+) -> int:
+    """
+    Render every frame of one match, spreading ranges of frames across worker processes.
+    Each worker plays the match again up to its first frame, which is much cheaper than drawing.
+
+    :param workers: The number of worker processes, defaults to the number of CPU cores
+    :type workers: int | None
+    :param log_level: The level of the event log of the workers
+    :type log_level: int
+    :return: The number of frames saved
+    :rtype: int
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    frames = len(moves) + 1
+    workers = max(1, min(workers or os.cpu_count() or 1, frames))
+    if workers == 1:
+        return render_frames(size, initial_positions, moves, out_dir, cell_size=cell_size)
+
+    saved = 0
+    with ProcessPoolExecutor(max_workers=workers, initializer=configure, initargs=(log_level,)) as executor:
+        futures = [
+            executor.submit(render_frames, size, initial_positions, moves, out_dir, start, stop, cell_size)
+            for start, stop in split_frames(frames, workers)
+        ]
+        for future in as_completed(futures):
+            saved += future.result()
+
+    return saved
+
+
+def render_replay(path: str, out_dir: str, cell_size: int = CELL_SIZE) -> int:
+    """
+    Render every frame of a replay file in this process.
+
+    :return: The number of frames saved
+    :rtype: int
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    size, initial_positions, moves = read_match(path)
+    return render_frames(size, initial_positions, moves, out_dir, cell_size=cell_size)
+
+
+def render_replays(
+    paths: list[str],
+    out_dir: str,
+    workers: int | None = None,
+    cell_size: int = CELL_SIZE,
+    log_level: int = LOG_LEVEL
+) -> dict[str, int]:
+    """
+    Render many replays, one whole match per task of a process pool. The frames of
+    each replay go to a directory named after the file inside out_dir.
+
+    :param paths: The paths of the replay files
+    :type paths: list[str]
+    :param out_dir: The directory to save the frames to
+    :type out_dir: str
+    :param workers: The number of worker processes, defaults to the number of CPU cores
+    :type workers: int | None
+    :param cell_size: The size of each cell in pixels
+    :type cell_size: int
+    :param log_level: The level of the event log of the workers
+    :type log_level: int
+    :return: The number of frames saved for each replay
+    :rtype: dict[str, int]
+    """
+    targets = {
+        path: os.path.join(out_dir, os.path.splitext(os.path.basename(path))[0])
+        for path in paths
+    }
+    workers = max(1, min(workers or os.cpu_count() or 1, len(paths)))
+
+    saved = {}
+    with ProcessPoolExecutor(max_workers=workers, initializer=configure, initargs=(log_level,)) as executor:
+        futures = {
+            executor.submit(render_replay, path, target, cell_size): path
+            for path, target in targets.items()
+        }
+        for future in as_completed(futures):
+            saved[futures[future]] = future.result()
+
+    return saved
@@ -0,0 +1,424 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+import time
+
+from src.backend.args import get_league_args
+from src.backend.consts import PLAYER_1, PLAYER_2
+from src.backend.events import LEVELS, configure, log
+from src.backend.match import run_match
+from src.backend.metrics import Metrics
+from src.backend.players.bot_player import DOCKER_BASE_COMMAND, offered_features, offered_protocols
+from src.backend.results_store import ResultsStore
+
+# Points of a win and a draw in the standings
+WIN_POINTS = 3
+DRAW_POINTS = 1
+
+MEMORY_UNITS = {"b": 1, "k": 1024, "m": 1024 ** 2, "g": 1024 ** 3}
+
+
+def parse_memory(value: str) -> int:
+    """
+    Parse a Docker memory limit like "512m" into bytes.
+
+    :param value: A number of bytes, optionally followed by b, k, m or g
+    :type value: str
+    :rtype: int
+    """
+    value = value.strip().lower()
+    if value and value[-1] in MEMORY_UNITS:
+        return int(float(value[:-1]) * MEMORY_UNITS[value[-1]])
+    return int(value)
+
+
+def container_resources(base_command: list[str]) -> tuple[float, int | None]:
+    """
+    Get the CPUs and memory a bot container is limited to by its docker run command.
+
+    :param base_command: The command bots are run with, see DOCKER_BASE_COMMAND
+    :type base_command: list[str]
+    :return: The CPUs (1 if not limited) and the bytes of memory (None if not limited)
+    :rtype: tuple[float, int | None]
+    """
+    cpus, memory = 1.0, None
+    for option, value in zip(base_command, base_command[1:]):
+        if option == "--cpus":
+            cpus = float(value)
+        elif option in ("--memory", "-m"):
+            memory = parse_memory(value)
+
+    return cpus, memory
+
+
+def total_memory() -> int | None:
+    """
+    Get the physical memory of the machine in bytes, if the platform tells.
+
+    :rtype: int | None
+    """
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+class ResourceSlots:
+    """
+    The CPUs and memory of the machine that matches can take, given back when they end.
+    Matches get them in the order they ask for them.
+    """
+
+    def __init__(self, cpus: float, memory: int | None = None):
+        """
+        :param cpus: The CPUs available
+        :type cpus: float
+        :param memory: The bytes of memory available, None for no limit
+        :type memory: int | None
+        """
+        self.cpus = cpus
+        self.memory = memory
+        self.__free_cpus = cpus
+        self.__free_memory = memory
+        self.__changed = asyncio.Condition()
+
+    def __fits(self, cpus: float, memory: int) -> bool:
+        return cpus <= self.__free_cpus and (self.__free_memory is None or memory <= self.__free_memory)
+
+    async def acquire(self, cpus: float, memory: int = 0) -> None:
+        """
+        Wait until the given resources are free and take them.
+
+        :param cpus: The CPUs to take
+        :type cpus: float
+        :param memory: The bytes of memory to take
+        :type memory: int
+        :raises ValueError: If they are more than all the resources
+        """
+        if cpus > self.cpus or (self.memory is not None and memory > self.memory):
+            raise ValueError(f"A match needs {cpus} CPUs and {memory} bytes, more than the whole machine")
+
+        async with self.__changed:
+            await self.__changed.wait_for(lambda: self.__fits(cpus, memory))
+            self.__free_cpus -= cpus
+            if self.__free_memory is not None:
+                self.__free_memory -= memory
+
+    async def release(self, cpus: float, memory: int = 0) -> None:
+        """
+        Give back resources taken with acquire.
+        """
+        async with self.__changed:
+            self.__free_cpus += cpus
+            if self.__free_memory is not None:
+                self.__free_memory += memory
+            self.__changed.notify_all()
+
+
+def match_seed(seed: int, match_id: str) -> int:
+    """
+    Get the seed of a match of a league from the seed of the league and the id of the match,
+    so it doesn't change when other matches are added to the plan.
+
+    :param seed: The seed of the league
+    :type seed: int
+    :param match_id: The id of the match, see plan_league
+    :type match_id: str
+    :return: A seed between 0 and 2 ** 32 - 1
+    :rtype: int
+    """
+    digest = hashlib.blake2b(f"{seed}:{match_id}".encode("utf-8"), digest_size=4).digest()
+    return int.from_bytes(digest, "little")
+
+
+def replay_name(match_id: str) -> str:
+    """
+    Get the file name of the replay of a match from its id: the id with the characters
+    that can't be in a file name replaced, and a hash of the whole id so that two ids
+    never share a name.
+
+    :param match_id: The id of the match, see plan_league
+    :type match_id: str
+    :rtype: str
+    """
+    readable = re.sub(r"[^A-Za-z0-9._-]+", "_", match_id).strip("_")
+    digest = hashlib.blake2b(match_id.encode("utf-8"), digest_size=4).hexdigest()
+    return f"{readable}-{digest}.htr"
+
+
+def plan_league(bots: list[str], games: int, seed: int | None = None) -> list[dict]:
+    """
+    Plan a round robin: every pair of bots plays the given number of games,
+    switching sides after every game.
+
+    Every match has an "id" that only depends on the bots and the game number, and so
+    does its seed, so a checkpoint still matches when bots are added to the league.
+
+    :param bots: The images of the bots
+    :type bots: list[str]
+    :param games: The number of games of every pair of bots
+    :type games: int
+    :param seed: The seed of the league, the seed of every match is derived from it, see match_seed
+    :type seed: int | None
+    :return: The matches, with "id", "bot_1", "bot_2" and "seed"
+    :rtype: list[dict]
+    """
+    matches = []
+    for i, bot_a in enumerate(bots):
+        for bot_b in bots[i + 1:]:
+            for game in range(games):
+                bot_1, bot_2 = (bot_a, bot_b) if game % 2 == 0 else (bot_b, bot_a)
+                match_id = f"{bot_a} vs {bot_b} #{game}"
+                matches.append({
+                    "id": match_id,
+                    "bot_1": bot_1,
+                    "bot_2": bot_2,
+                    "seed": match_seed(seed, match_id) if seed is not None else None,
+                })
+
+    return matches
+
+
+def load_checkpoint(path: str) -> dict[str, dict]:
+    """
+    Read the results of the matches finished in previous runs.
+    A line cut short by an interruption is ignored, so its match is played again.
+
+    :param path: The checkpoint file
+    :type path: str
+    :return: The results by match id, empty if the file doesn't exist
+    :rtype: dict[str, dict]
+    """
+    results = {}
+    if not os.path.exists(path):
+        return results
+
+    with open(path, encoding="utf-8") as file:
+        for line in file:
+            try:
+                result = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            results[result["id"]] = result
+
+    return results
+
+
+def open_checkpoint(path: str):
+    """
+    Open a checkpoint to append the results of the next matches.
+
+    A line cut short by an interruption is removed first, otherwise the next line would be
+    written after it on the same line and both would be ignored by load_checkpoint.
+
+    :param path: The checkpoint file, created if it doesn't exist
+    :type path: str
+    :return: The file, open for appending text
+    """
+    if os.path.exists(path):
+        with open(path, "rb+") as file:
+            end = file.seek(0, os.SEEK_END)
+            position = end
+            while position > 0:
+                start = max(0, position - 4096)
+                file.seek(start)
+                newline = file.read(position - start).rfind(b"\n")
+                if newline >= 0:
+                    position = start + newline + 1
+                    break
+                position = start
+            if position != end:
+                file.truncate(position)
+
+    return open(path, "a", encoding="utf-8")
+
+
+def standings(results: list[dict]) -> list[dict]:
+    """
+    Rank the bots by points, then by wins.
+
+    :param results: The results of the matches, with "bot_1", "bot_2" and "winner"
+    :type results: list[dict]
+    :return: For every bot: "bot", "played", "wins", "draws", "losses" and "points"
+    :rtype: list[dict]
+    """
+    table: dict[str, dict] = {}
+    for result in results:
+        rows = []
+        for bot in (result["bot_1"], result["bot_2"]):
+            if bot not in table:
+                table[bot] = {"bot": bot, "played": 0, "wins": 0, "draws": 0, "losses": 0, "points": 0}
+            rows.append(table[bot])
+
+        for number, row in zip((PLAYER_1, PLAYER_2), rows):
+            row["played"] += 1
+            if result["winner"] is None:
+                row["draws"] += 1
+                row["points"] += DRAW_POINTS
+            elif result["winner"] == number:
+                row["wins"] += 1
+                row["points"] += WIN_POINTS
+            else:
+                row["losses"] += 1
+
+    return sorted(table.values(), key=lambda row: (-row["points"], -row["wins"], row["bot"]))
+
+
+async def run_league(
+    bots: list[str],
+    games: int,
+    size: int = 16,
+    cpus: float | None = None,
+    memory: int | None = None,
+    bot_options: dict | None = None,
+    checkpoint: str | None = None,
+    replay_dir: str | None = None,
+    seed: int | None = None,
+    results_store: ResultsStore | None = None
+) -> dict:
+    """
+    Play a round robin league, as many matches at once as the CPUs and memory allow.
+
+    Each bot is counted as one container limited as in its base command (DOCKER_BASE_COMMAND
+    by default). A new match starts as soon as another one ends and frees its resources.
+    Every finished match is appended to the checkpoint, and the matches already in it are
+    not played again.
+
+    :param bots: The images of the bots
+    :type bots: list[str]
+    :param games: The number of games of every pair of bots
+    :type games: int
+    :param size: The size of the game board
+    :type size: int
+    :param cpus: The CPUs the bots can use in total, defaults to the number of CPU cores
+    :type cpus: float | None
+    :param memory: The bytes of memory the bots can use in total, defaults to the physical memory
+    :type memory: int | None
+    :param bot_options: Keyword arguments for every BotPlayer, see create_player.
+    :type bot_options: dict | None
+    :param checkpoint: The file the finished matches are appended to as JSON lines, if any
+    :type checkpoint: str | None
+    :param replay_dir: Directory to record a replay of every match to, if any
+    :type replay_dir: str | None
+    :param seed: The seed of the league, see plan_league
+    :type seed: int | None
+    :param results_store: Where to add the result of every match of the league, if anywhere.
+        The matches are stored with their ids, so the ones already stored are skipped.
+    :type results_store: ResultsStore | None
+    :return: The "results" of every match of the league, the number of "played" and "failed"
+        ones in this run, its "elapsed" seconds and the "metrics" of the matches it played
+    :rtype: dict
+    """
+    bot_options = bot_options or {}
+    cpus_per_bot, memory_per_bot = container_resources(bot_options.get("base_command") or DOCKER_BASE_COMMAND)
+    match_cpus, match_memory = 2 * cpus_per_bot, 2 * (memory_per_bot or 0)
+    slots = ResourceSlots(cpus or os.cpu_count() or 1, memory if memory is not None else total_memory())
+
+    plan = plan_league(bots, games, seed)
+    finished = load_checkpoint(checkpoint) if checkpoint else {}
+    pending = [match for match in plan if match["id"] not in finished]
+    log.info("league_planned", matches=len(plan), finished=len(plan) - len(pending))
+
+    if results_store is not None and finished:
+        # A crash between writing the checkpoint line of a match and storing it left it out of the store
+        results_store.add_many(list(finished.values()))
+        results_store.flush()
+
+    if replay_dir:
+        os.makedirs(replay_dir, exist_ok=True)
+    checkpoint_file = open_checkpoint(checkpoint) if checkpoint else None
+
+    metrics = Metrics()
+    played = 0
+    failed = 0
+
+    async def play(match: dict) -> None:
+        nonlocal played, failed
+        try:
+            replay_path = os.path.join(replay_dir, replay_name(match["id"])) if replay_dir else None
+            result = await run_match(
+                match["bot_1"], match["bot_2"], size, None, bot_options, replay_path, match["seed"],
+                match_id=match["id"]
+            )
+        except Exception as e:
+            log.error("match_failed", match=match["id"], error=str(e))
+            failed += 1
+            return
+        finally:
+            await slots.release(match_cpus, match_memory)
+
+        match_metrics = result.pop("metrics")
+        metrics.merge(match_metrics)
+        record = {"id": match["id"], **result}
+        finished[match["id"]] = record
+        played += 1
+        if checkpoint_file is not None:
+            checkpoint_file.write(json.dumps(record) + "\n")
+            checkpoint_file.flush()
+            os.fsync(checkpoint_file.fileno())
+        if results_store is not None:
+            # After the checkpoint line: if the league is interrupted before this, it's stored
+            # when the league is resumed, and storing it again is skipped by its id
+            results_store.add({**record, "metrics": match_metrics})
+            results_store.flush()
+
+    start = time.perf_counter()
+    tasks: set[asyncio.Task] = set()
+    try:
+        for match in pending:
+            await slots.acquire(match_cpus, match_memory)
+            task = asyncio.create_task(play(match))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if checkpoint_file is not None:
+            checkpoint_file.close()
+
+    return {
+        "results": [finished[match["id"]] for match in plan if match["id"] in finished],
+        "played": played,
+        "failed": failed,
+        "elapsed": time.perf_counter() - start,
+        "metrics": metrics,
+    }
+
+
+def main():
+    args = get_league_args()
+    configure(LEVELS[args.log_level], args.log_file)
+
+    bot_options = {
+        "offered_protocols": offered_protocols(args.offer_delta, args.offer_binary),
+        "offered_features": offered_features(args.offer_analysis),
+        "move_timeout": args.move_timeout,
+        "time_bank": args.time_bank,
+    }
+
+    results_store = ResultsStore(args.results_db) if args.results_db else None
+    try:
+        summary = asyncio.run(run_league(
+            args.bots, args.games, args.size, args.cpus,
+            args.memory * 1024 * 1024 if args.memory else None,
+            bot_options, args.checkpoint, args.replay_dir, args.seed, results_store
+        ))
+    finally:
+        if results_store is not None:
+            results_store.close()
+
+    print(f"Matches played: {summary['played']} ({summary['failed']} failed), {len(summary['results'])} in total")
+    print(f"Elapsed: {summary['elapsed']:.2f}s")
+    print(f"{'Bot':<40} {'P':>4} {'W':>4} {'D':>4} {'L':>4} {'Pts':>5}")
+    for row in standings(summary["results"]):
+        print(f"{row['bot']:<40} {row['played']:>4} {row['wins']:>4} {row['draws']:>4} {row['losses']:>4} {row['points']:>5}")
+    if args.metrics_file:
+        summary["metrics"].write_prometheus(args.metrics_file)
+
+
+if __name__ == "__main__":
+    main()
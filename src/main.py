@@ -1,105 +1,145 @@
 import asyncio
-import json
+import time
+from random import Random
+
 import pygame
 
-from src.backend.args import get_args
-from src.backend.consts import PLAYER_1, PLAYER_2
+from src.backend.args import DEFAULT_FPS, DEFAULT_TICK_RATE, get_args
+from src.backend.events import LEVELS, configure, log, set_context
 from src.backend.GameState import GameState
+from src.backend.match import analyze_tick, create_player, describe_outcome, get_moves, log_metrics
+from src.backend.metrics import Metrics, PHASE_RENDER, PHASE_TICK, TICKS
 from src.backend.player import Player
+from src.backend.replay import ReplayReader, ReplayWriter
+from src.backend.results_store import ResultsStore
 
 from src.backend.players.player_input import IPlayerType
-from src.backend.players.bot_player import BotPlayer
-from src.backend.players.human_player import HumanPlayer
+from src.backend.players.bot_player import offered_features, offered_protocols
+from src.backend.players.local_process_player import ResourceLimits
 
 from src.frontend.Frontend import Frontend
 
-
-def create_player(bot_image: str | None, is_manual: bool) -> IPlayerType:
-    """
-    Create a player instance based on whether it's manual or bot.
-
-    :param bot_image: The Docker image for the bot player.
-    :type bot_image: str | None
-    :param is_manual: Flag indicating if the player is manual.
-    :type is_manual: bool
-    :return: An instance of IPlayerType (either HumanPlayer or BotPlayer).
-    :rtype: IPlayerType
-    """
-    if is_manual:
-        return HumanPlayer()
-
-    return BotPlayer(bot_image)
+WINDOW_SIZE = 480  # Width of the board in pixels, the cells are as big as fit
 
 
-async def get_moves(
+async def render_loop(
     game: GameState,
-    player_1_input: IPlayerType,
-    player_2_input: IPlayerType
-) -> tuple[tuple[int, int], tuple[int, int]]:
+    frontend: Frontend,
+    fps: float,
+    stop: asyncio.Event,
+    metrics: Metrics | None = None
+) -> None:
     """
-    Get moves from both players concurrently.
+    Draw the newest state of the game on its own frame clock until stop is set.
+    Ticks played between two frames are never drawn, so a slow frontend can't slow the game down.
+    The cells are read from the game here, but drawn in a worker thread, so the bots' answers
+    are read and timed while a frame is drawn.
 
     :param game: The current game state.
     :type game: GameState
-    :param player_1: The player 1 instance
-    :type player_1: IPlayerType
-    :param player_2: The player 2 instance
-    :type player_2: IPlayerType
-    :return: A tuple containing the moves of player 1 and player 2.
-    :rtype: tuple[tuple[int, int], tuple[int, int]]
+    :param frontend: The frontend to draw the game board.
+    :type frontend: Frontend
+    :param fps: Frames per second.
+    :type fps: float
+    :param stop: Set when the game is over.
+    :type stop: asyncio.Event
+    :param metrics: Where to record the time spent drawing each frame, if anywhere.
+    :type metrics: Metrics | None
     """
-    player_1, player_2 = game.player_1, game.player_2
-
-    state_for_p1 = json.dumps(game.serialize_for_player(PLAYER_1))
-    state_for_p2 = json.dumps(game.serialize_for_player(PLAYER_2))
-
-    move_1, move_2 = await asyncio.gather(
-        player_1_input.get_move(state_for_p1),
-        player_2_input.get_move(state_for_p2)
-    )
-
-    if not Player.is_valid_move(move_1):
-        move_1 = player_1.previous_move
-    if not Player.is_valid_move(move_2):
-        move_2 = player_2.previous_move
-
-    return move_1, move_2
+    render_time = metrics.histogram(PHASE_RENDER) if metrics is not None else None
+    frame_time = 1 / fps
+    drawn_tick = game.tick_count
+    while not stop.is_set():
+        if game.tick_count != drawn_tick:
+            drawn_tick = game.tick_count
+            start = time.perf_counter()
+            dirty = await asyncio.to_thread(frontend.draw_cells, frontend.player_cells())
+            frontend.update_display(dirty)
+            if render_time is not None:
+                render_time.observe(time.perf_counter() - start)
+        try:
+            await asyncio.wait_for(stop.wait(), frame_time)
+        except asyncio.TimeoutError:
+            pass
 
 
 async def play(
     game: GameState,
     frontend: Frontend,
-    player_1_input: IPlayerType,
-    player_2_input: IPlayerType,
-    auto_mode: bool
-) -> None:
+    player_inputs: list[IPlayerType],
+    auto_mode: bool,
+    replay: ReplayWriter | None = None,
+    tick_rate: float | None = DEFAULT_TICK_RATE,
+    fps: float = DEFAULT_FPS,
+    metrics: Metrics | None = None,
+    analyze: bool = False
+) -> Player | int | None:
     """
-    Play the game until it's over.
+    Play the game until it's over, while render_loop draws it.
 
     :param game: The current game state.
     :type game: GameState
     :param frontend: The frontend to draw the game board.
     :type frontend: Frontend
-    :param player_1: The player 1 instance
-    :type player_1: IPlayerType
-    :param player_2: The player 2 instance
-    :type player_2: IPlayerType
+    :param player_inputs: The input of every player, in number order
+    :type player_inputs: list[IPlayerType]
     :param auto_mode: Flag indicating if the game should run in automatic mode.
     :type auto_mode: bool
-    :return: None
-    :rtype: None
+    :param replay: Where to record the ticks of the game, if anywhere.
+    :type replay: ReplayWriter | None
+    :param tick_rate: Maximum ticks per second in automatic mode. None or 0 starts
+        the next tick as soon as all the moves arrive.
+    :type tick_rate: float | None
+    :param fps: Frames per second of the frontend.
+    :type fps: float
+    :param metrics: Where to record the time spent in each phase of the ticks, if anywhere.
+    :type metrics: Metrics | None
+    :param analyze: Whether to compute and log the analysis of every tick, see analyze_tick.
+    :type analyze: bool
+    :return: The value returned by the last GameState.tick, see describe_outcome
+    :rtype: Player | int | None
     """
-    while not game.game_over:
-        move_1, move_2 = await get_moves(game, player_1_input, player_2_input)
-        game.tick(move_1, move_2)
-        frontend.draw_game_board()
-        if not auto_mode:
-            await wait_for_keypress()
-        else:
-            await asyncio.sleep(0.1)
+    loop = asyncio.get_running_loop()
+    tick_interval = 1 / tick_rate if tick_rate else 0.0
+    next_tick = loop.time()
+
+    collision = None
+    stop = asyncio.Event()
+    renderer = asyncio.create_task(render_loop(game, frontend, fps, stop, metrics))
+    tick_time = metrics.histogram(PHASE_TICK) if metrics is not None else None
+    try:
+        while not game.game_over:
+            set_context(tick=game.tick_count)
+            if analyze:
+                analyze_tick(game, metrics)
+            moves = await get_moves(game, *player_inputs, metrics=metrics)
+            if tick_time is not None:
+                start = time.perf_counter()
+                collision = game.tick(*moves)
+                tick_time.observe(time.perf_counter() - start)
+            else:
+                collision = game.tick(*moves)
+            if replay is not None:
+                replay.record(*moves, collision)
+            if not auto_mode:
+                await wait_for_keypress()
+            elif tick_interval:
+                # Wait until the next tick is due, without catching up after slow moves
+                next_tick = max(next_tick + tick_interval, loop.time())
+                await asyncio.sleep(next_tick - loop.time())
+            else:
+                await asyncio.sleep(0)  # Let the frontend draw
+    finally:
+        stop.set()
+        await renderer
 
-    print("Game Over!")
-    print(f"Winner: {f'Player {game.winner.number}' if game.winner else 'Draw'}")
+    set_context(tick=None)
+    frontend.draw_game_board()
+    log.info("game_over", winner=game.winner.number if game.winner else None, ticks=game.tick_count)
+    if metrics is not None:
+        metrics.counter(TICKS).inc(game.tick_count)
+        log_metrics(metrics)
+    return collision
 
 
 async def wait_for_keypress():
@@ -115,38 +155,88 @@ async def main():
     """
     Initialize the game and frontend, then start playing.
     """
-    bot_1_image, bot_2_image, auto_mode, manual1, manual2 = get_args()
+    args = get_args()
+    configure(LEVELS[args.log_level], args.log_file)
+    bot_options = {
+        "offered_protocols": offered_protocols(args.offer_delta, args.offer_binary),
+        "offered_features": offered_features(args.offer_analysis),
+        "move_timeout": args.move_timeout,
+        "time_bank": args.time_bank,
+        "isolated": args.isolate_plugins,
+    }
+
+    if args.bots:
+        images = args.bots
+        manual = [False] * len(images)
+        commands = [None] * len(images)
+    else:
+        images = [args.bot1, args.bot2]
+        manual = [args.manual1, args.manual2]
+        commands = [args.bot1_cmd, args.bot2_cmd]
+    resource_limits = ResourceLimits(args.cpu_time, args.memory * 1024 * 1024 if args.memory else None)
+
+    if args.replay and len(images) != 2:
+        log.error("replay_refused", reason="Replays can only record games of two players", players=len(images))
+        return
 
-    player_1_input: IPlayerType = create_player(bot_1_image, manual1)
-    player_2_input: IPlayerType = create_player(bot_2_image, manual2)
+    player_inputs: list[IPlayerType] = [
+        create_player(image, is_manual, command, resource_limits or None, **bot_options)
+        for image, is_manual, command in zip(images, manual, commands)
+    ]
 
-    init_results = await asyncio.gather(
-        player_1_input.initialize(),
-        player_2_input.initialize()
-    )
+    init_results = await asyncio.gather(*(player_input.initialize() for player_input in player_inputs))
 
     if not all(init_results):
-        print("Failed to initialize players. Exiting.")
-        await asyncio.gather(
-            player_1_input.cleanup(),
-            player_2_input.cleanup()
-        )
+        log.error("init_failed", bots=[command or image for image, command in zip(images, commands)])
+        await asyncio.gather(*(player_input.cleanup() for player_input in player_inputs))
         return
 
-    game = GameState(16)
-    frontend = Frontend(game, 30)
+    game = GameState(args.size, rng=Random(args.seed) if args.seed is not None else None, n_players=len(images))
+    frontend = Frontend(game, max(1, WINDOW_SIZE // args.size))
     frontend.draw_game_board()
 
+    names = tuple(command or image for image, command in zip(images, commands))
+    replay = ReplayWriter(args.replay, game, names) if args.replay else None
+
+    metrics = Metrics()
+    collision = None
+    start = time.perf_counter()
     try:
-        await play(game, frontend, player_1_input, player_2_input, auto_mode)
+        collision = await play(
+            game, frontend, player_inputs, args.auto, replay, args.tick_rate, args.fps, metrics, args.offer_analysis
+        )
     except Exception as e:
-        print(f"Error occurred while playing: {e}")
+        log.error("play_failed", error=str(e))
     finally:
-        await asyncio.gather(
-            player_1_input.cleanup(),
-            player_2_input.cleanup()
-        )
+        await asyncio.gather(*(player_input.cleanup() for player_input in player_inputs))
         pygame.quit()
 
+    if replay is not None:
+        replay.close()
+        with ReplayReader(args.replay) as reader:
+            if reader.matches(game):
+                log.info("replay_saved", path=args.replay)
+            else:
+                log.error("replay_mismatch", path=args.replay)
+
+    if args.metrics_file:
+        metrics.write_prometheus(args.metrics_file)
+
+    if args.results_db and game.game_over:
+        if len(images) != 2:
+            log.warning("result_not_stored", reason="The results database only keeps games of two players")
+            return
+        with ResultsStore(args.results_db) as results_store:
+            results_store.add({
+                "bot_1": commands[0] or player_inputs[0].name,
+                "bot_2": commands[1] or player_inputs[1].name,
+                "winner": game.winner.number if game.winner else None,
+                "outcome": describe_outcome(collision),
+                "ticks": game.tick_count,
+                "duration": time.perf_counter() - start,
+                "seed": args.seed,
+                "metrics": metrics,
+            })
+
 if __name__ == "__main__":
     asyncio.run(main())
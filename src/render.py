@@ -0,0 +1,30 @@
+import os
+import time
+
+from src.backend.args import get_render_args
+from src.backend.events import LEVELS, configure
+from src.frontend.renderer import read_match, render_match, render_replays
+
+
+def main():
+    args = get_render_args()
+    level = LEVELS[args.log_level]
+    # A single worker renders in this process
+    configure(level)
+
+    start = time.perf_counter()
+    if len(args.replays) == 1:
+        size, initial_positions, moves = read_match(args.replays[0])
+        frames = render_match(
+            size, initial_positions, moves, args.out_dir, args.workers, args.cell_size, level
+        )
+    else:
+        frames = sum(render_replays(args.replays, args.out_dir, args.workers, args.cell_size, level).values())
+    elapsed = time.perf_counter() - start
+
+    print(f"Rendered {frames} frames of {len(args.replays)} replay(s) to {os.path.abspath(args.out_dir)}")
+    print(f"Elapsed: {elapsed:.2f}s ({frames / elapsed if elapsed else 0:.1f} frames/s)")
+
+
+if __name__ == "__main__":
+    main()
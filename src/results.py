@@ -0,0 +1,41 @@
+from src.backend.args import get_results_args
+from src.backend.results_store import ResultsStore
+
+
+def print_rates(label: str, rows: list[dict]) -> None:
+    print(f"{label:<40} {'G':>7} {'W':>7} {'D':>7} {'L':>7} {'Win %':>6} {'Ticks':>6}")
+    for name, row in rows:
+        print(
+            f"{name:<40} {row['games']:>7} {row['wins']:>7} {row['draws']:>7} {row['losses']:>7}"
+            f" {100 * row['win_rate']:>6.1f} {row['mean_ticks']:>6.1f}"
+        )
+
+
+def main():
+    args = get_results_args()
+
+    with ResultsStore(args.database) as store:
+        if args.bot is None:
+            print_rates("Bot", [(row["bot"], row) for row in store.win_rates()])
+            return
+
+        opponents = [args.opponent] if args.opponent else [row["bot"] for row in store.win_rates()]
+        rows = [
+            (opponent, store.pairing(args.bot, opponent))
+            for opponent in opponents
+            if opponent != args.bot
+        ]
+        print_rates(f"{args.bot} against", [(name, row) for name, row in rows if row["games"]])
+
+        if args.opponent:
+            print()
+            for match in store.matches(args.bot, args.opponent, args.limit):
+                winner = match[f"bot_{match['winner']}"] if match["winner"] else "draw"
+                print(
+                    f"#{match['id']} {match['bot_1']} vs {match['bot_2']}: {winner} ({match['outcome']})"
+                    f" in {match['ticks']} ticks"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,21 @@
+"""
+Stands in for `docker run` in the ContainerPool tests. The last argument is the image,
+which picks how the bot answers {"type": "new_game"}:
+- ready: with {"type": "ready"}
+- stale: with a move, as a bot that answered the last move of a match too late
+"""
+
+import json
+import sys
+
+mode = sys.argv[-1]
+print(f"started as {mode}", file=sys.stderr, flush=True)
+for line in sys.stdin:
+    try:
+        message = json.loads(line)
+    except ValueError:
+        message = None
+    if isinstance(message, dict) and message.get("type") == "new_game" and mode == "ready":
+        print(json.dumps({"type": "ready"}), flush=True)
+    else:
+        print(1, flush=True)
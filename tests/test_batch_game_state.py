@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+from src.backend.BatchGameState import BatchGameState, ONGOING
+from src.backend.consts import PLAYER_1, PLAYER_2, MOVE_RIGHT, MOVE_UP
+from src.backend.events import configure, LEVELS
+from src.backend.GameState import GameState
+from src.backend.player import InvalidMoveError, Player
+
+
+@pytest.fixture(autouse=True)
+def quiet_log():
+    # Every invalid move is logged as a warning
+    configure(LEVELS["error"], None)
+
+
+def play_both(batch_size: int, size: int, ticks: int, seed: int, lowest_move: int, highest_move: int) -> None:
+    """
+    Play the same moves in a BatchGameState and in one GameState per game, and check
+    that the trails, boards and outcomes are the same after every tick.
+    """
+    rng = np.random.default_rng(seed)
+    batch = BatchGameState(batch_size, size, rng, auto_reset=False)
+    games = []
+    for index in range(batch_size):
+        position_1, position_2 = batch.initial_positions(index)
+        games.append(GameState(
+            size,
+            Player(PLAYER_1, size, initial_position=position_1),
+            Player(PLAYER_2, size, initial_position=position_2),
+        ))
+
+    for _ in range(ticks):
+        moves = rng.integers(lowest_move, highest_move + 1, (batch_size, 2))
+        outcomes = batch.step(moves)
+        for index, game in enumerate(games):
+            if game.game_over:
+                assert outcomes[index] == ONGOING
+                continue
+            game.tick(*(int(move) for move in moves[index]))
+
+            assert batch.position(index, PLAYER_1) == game.player_1.position
+            assert batch.position(index, PLAYER_2) == game.player_2.position
+            assert batch.boards[index].tolist() == game.board
+            if game.game_over:
+                assert outcomes[index] != ONGOING
+                if outcomes[index] in (PLAYER_1, PLAYER_2):
+                    assert game.winner is not None and game.winner.number == outcomes[index]
+                else:
+                    assert game.winner is None
+            else:
+                assert outcomes[index] == ONGOING
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_same_games_as_game_state(seed):
+    play_both(100, 16, 60, seed, lowest_move=1, highest_move=4)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_invalid_moves_repeat_the_previous_move(seed):
+    # 0 is invalid, and it goes up when it's the previous move too
+    play_both(100, 16, 60, seed, lowest_move=0, highest_move=4)
+
+
+def test_invalid_move_after_a_valid_one():
+    player = Player(PLAYER_1, 16, initial_position=(8, 8))
+    player.move(MOVE_RIGHT)
+    player.move(0)
+    player.move(0)
+    assert player.position[:3] == [(7, 10), (8, 10), (8, 9)]
+
+
+def test_invalid_move_after_an_invalid_one():
+    player = Player(PLAYER_1, 16, initial_position=(8, 8))
+    player.move(5)
+    with pytest.raises(InvalidMoveError):
+        player.move(6)
+
+    batch = BatchGameState(2, 16, np.random.default_rng(2), auto_reset=False)
+    assert (batch.step(np.array([[5, MOVE_UP], [MOVE_UP, MOVE_UP]])) == ONGOING).all()
+    position = batch.position(0, PLAYER_1)
+    with pytest.raises(InvalidMoveError):
+        batch.step(np.array([[6, MOVE_UP], [MOVE_UP, MOVE_UP]]))
+    assert batch.position(0, PLAYER_1) == position
@@ -0,0 +1,48 @@
+import io
+from random import Random
+
+import pytest
+
+from src.backend.binary_protocol import FRAME_HEADER, decode_state, read_message
+from src.backend.events import configure, LEVELS
+from src.backend.GameState import GameState
+from src.backend.GridGameState import GridGameState
+
+
+@pytest.fixture(autouse=True)
+def quiet_log():
+    configure(LEVELS["error"], None)
+
+
+def expected_state(game, number: int) -> dict:
+    """
+    serialize_for_player with the player numbers decode_state adds to the two player states.
+    """
+    state = game.serialize_for_player(number)
+    if "opponent" in state:
+        state["me"] = {"number": number, **state["me"]}
+        state["opponent"] = {"number": 3 - number, **state["opponent"]}
+    return state
+
+
+@pytest.mark.parametrize("engine, n_players", [(GameState, 2), (GridGameState, 2), (GameState, 3)])
+def test_decoded_frames_match_serialize_for_player(engine, n_players):
+    for seed in range(10):
+        rng = Random(seed)
+        game = engine(16, rng=rng) if n_players == 2 else engine(16, rng=rng, n_players=n_players)
+        while not game.game_over:
+            for player in game.players:
+                frame = game.serialize_binary_for_player(player.number)
+                assert decode_state(frame[FRAME_HEADER.size:]) == expected_state(game, player.number)
+            game.tick(*(rng.randint(1, 4) for _ in game.players))
+
+
+def test_read_message_reads_frames_and_json_lines():
+    game = GameState(16, rng=Random(0))
+    stream = io.BytesIO(
+        game.serialize_binary_for_player(1) + b'{"type": "new_game"}\n' + game.serialize_binary_for_player(2)
+    )
+    assert read_message(stream) == expected_state(game, 1)
+    assert read_message(stream) == {"type": "new_game"}
+    assert read_message(stream) == expected_state(game, 2)
+    assert read_message(stream) is None
@@ -0,0 +1,118 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+from src.backend.events import configure, LEVELS
+from src.backend.players.container_pool import ContainerPool
+
+STUB_COMMAND = [sys.executable, os.path.join(os.path.dirname(__file__), "pool_stub_bot.py")]
+
+
+@pytest.fixture(autouse=True)
+def quiet_log():
+    configure(LEVELS["error"], None)
+
+
+def run_with_pool(test, image: str = "ready", size: int = 1, max_uses: int = 50):
+    """
+    Run an async test with a started pool of stub bots, closing the pool at the end.
+    """
+    async def main():
+        pool = ContainerPool(image, size, max_uses, base_command=STUB_COMMAND)
+        await pool.start()
+        try:
+            await test(pool)
+        finally:
+            await pool.close()
+
+    asyncio.run(main())
+
+
+def test_start_fills_the_pool():
+    async def test(pool):
+        assert pool.idle == 2
+
+    run_with_pool(test, size=2)
+
+
+def test_released_container_is_reset_and_reused():
+    async def test(pool):
+        container = await pool.acquire()
+        assert container.alive
+        await pool.release(container)
+        assert container.alive and container.uses == 1
+        assert pool.idle == 1
+        assert await pool.acquire() is container
+
+    run_with_pool(test)
+
+
+def test_stale_answer_to_new_game_retires_the_container():
+    async def test(pool):
+        container = await pool.acquire()
+        assert not await container.reset()
+        await pool.release(container)
+        assert not container.alive
+
+    run_with_pool(test, image="stale")
+
+
+def test_container_is_retired_after_max_uses():
+    async def test(pool):
+        container = await pool.acquire()
+        await pool.release(container)
+        assert await pool.acquire() is container
+        await pool.release(container)
+        assert not container.alive
+        await pool.start()
+        assert pool.idle == 1
+        assert await pool.acquire() is not container
+
+    run_with_pool(test, max_uses=2)
+
+
+def test_unhealthy_container_is_retired():
+    async def test(pool):
+        container = await pool.acquire()
+        await pool.release(container, healthy=False)
+        assert not container.alive
+        await pool.start()
+        assert pool.idle == 1
+
+    run_with_pool(test)
+
+
+def test_dead_container_is_retired():
+    async def test(pool):
+        container = await pool.acquire()
+        container.process.kill()
+        await container.process.wait()
+        await pool.release(container)
+        await pool.start()
+        assert pool.idle == 1
+        assert await pool.acquire() is not container
+
+    run_with_pool(test)
+
+
+def test_pool_refills_up_to_size():
+    async def test(pool):
+        taken = [await pool.acquire(), await pool.acquire()]
+        await pool.start()
+        assert pool.idle == 2
+        assert all(container.alive for container in taken)
+
+    run_with_pool(test, size=2)
+
+
+def test_stderr_is_kept_per_container():
+    async def test(pool):
+        container = await pool.acquire()
+        # The bot writes to stderr before it answers the reset, and stopping waits until all of it is read
+        assert await container.reset()
+        await container.stop()
+        assert "started as ready" in container.stderr.text()
+
+    run_with_pool(test)
@@ -0,0 +1,55 @@
+from random import Random
+
+import pytest
+
+from src.backend.events import configure, LEVELS
+from src.backend.GameState import GameState
+
+
+@pytest.fixture(autouse=True)
+def quiet_log():
+    configure(LEVELS["error"], None)
+
+
+def apply_delta(board: list[list[int]], delta: dict, values: dict[int, int]) -> None:
+    """
+    Update a board like a bot that receives deltas: free the tails, place the heads,
+    then write the cells of the eliminated players.
+    """
+    players = [delta["me"], *delta["opponents"]]
+    for player in players:
+        if player["freed"] is not None:
+            board[player["freed"]["x"]][player["freed"]["y"]] = 0
+    for player in players:
+        board[player["head"]["x"]][player["head"]["y"]] = values[player["number"]]
+    for cell in delta["cleared"]:
+        board[cell["x"]][cell["y"]] = cell["value"]
+
+
+@pytest.mark.parametrize("n_players", [3, 4])
+def test_deltas_rebuild_the_board(n_players: int):
+    eliminated = 0
+    for seed in range(20):
+        rng = Random(seed)
+        game = GameState(12, rng=rng, n_players=n_players)
+        values = {player.number: player.board_value for player in game.players}
+        boards = {
+            player.number: [list(row) for row in game.serialize_for_player(player.number)["board"]]
+            for player in game.players
+        }
+
+        while not game.game_over:
+            game.tick(*(rng.randint(1, 4) for _ in game.players))
+            if game.game_over:
+                break
+            for number, board in list(boards.items()):
+                delta = game.serialize_delta_for_player(number)
+                apply_delta(board, delta, values)
+                assert board == game.board
+                if number in delta["eliminated"]:
+                    # The bots out of the game get no more states
+                    eliminated += 1
+                    del boards[number]
+
+    # The games must take some players out before they are over
+    assert eliminated
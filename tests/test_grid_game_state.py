@@ -0,0 +1,43 @@
+from random import Random
+
+import pytest
+
+from src.backend.consts import PLAYER_1, PLAYER_2
+from src.backend.events import configure, LEVELS
+from src.backend.GameState import GameState
+from src.backend.GridGameState import GridGameState
+from src.backend.player import Player
+
+
+@pytest.fixture(autouse=True)
+def quiet_log():
+    configure(LEVELS["error"], None)
+
+
+def outcome(collision) -> int | None:
+    return collision.number if isinstance(collision, Player) else collision
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_same_games_as_game_state(seed):
+    rng = Random(seed)
+    size = rng.choice([8, 12, 20])
+    games = []
+    for engine in (GameState, GridGameState):
+        positions = Random(seed)
+        games.append(engine(
+            size,
+            Player(PLAYER_1, size, rng=positions),
+            Player(PLAYER_2, size, rng=positions),
+        ))
+    game, grid = games
+
+    while not game.game_over:
+        # 0 is invalid, the player repeats its previous move
+        moves = rng.randint(0, 4), rng.randint(0, 4)
+        assert outcome(grid.tick(*moves)) == outcome(game.tick(*moves))
+        assert grid.board == game.board
+        assert grid.player_1.position == game.player_1.position
+        assert grid.player_2.position == game.player_2.position
+        assert grid.game_over == game.game_over
+        assert (grid.winner and grid.winner.number) == (game.winner and game.winner.number)
@@ -0,0 +1,64 @@
+from random import Random
+
+import pytest
+
+from src.backend.events import configure, LEVELS
+from src.backend.GameState import GameState
+
+
+@pytest.fixture(autouse=True)
+def quiet_log():
+    configure(LEVELS["error"], None)
+
+
+def snapshot(game: GameState) -> tuple:
+    return (
+        [list(row) for row in game.board],
+        [player.position for player in game.players],
+        [player.previous_move for player in game.players],
+        [player.number for player in game.alive_players],
+        game.game_over,
+        game.winner and game.winner.number,
+        game.position_hash,
+        game.tick_count,
+    )
+
+
+def search(game: GameState, rng: Random, depth: int) -> None:
+    """
+    Play random moves down to the given depth and undo them, checking the state after every undo.
+    """
+    if depth == 0 or game.game_over:
+        return
+    for _ in range(2):
+        before = snapshot(game)
+        game.make_move(*(rng.randint(0, 4) for _ in game.players))
+        search(game, rng, depth - 1)
+        game.unmake_move()
+        assert snapshot(game) == before
+
+
+@pytest.mark.parametrize("n_players", [2, 3])
+def test_unmake_restores_the_state(n_players):
+    for seed in range(10):
+        rng = Random(seed)
+        game = GameState(12, rng=rng, n_players=n_players)
+        while not game.game_over:
+            search(game, rng, 3)
+            game.make_move(*(rng.randint(1, 4) for _ in game.players))
+
+
+def test_hash_is_the_same_as_a_game_that_got_there_directly():
+    rng = Random(0)
+    moves = [(rng.randint(1, 4), rng.randint(1, 4)) for _ in range(5)]
+    game = GameState(16, rng=Random(1))
+    searched = GameState(16, rng=Random(1))
+    searched.position_hash
+    for move in moves:
+        game.tick(*move)
+        searched.make_move(*move)
+        searched.make_move(1, 1)
+        searched.unmake_move()
+        if game.game_over:
+            break
+    assert searched.position_hash == game.position_hash
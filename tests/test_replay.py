@@ -0,0 +1,72 @@
+import pytest
+
+from src.backend.consts import PLAYER_1, PLAYER_2, MOVE_LEFT, MOVE_RIGHT, MOVE_DOWN
+from src.backend.events import configure, LEVELS
+from src.backend.GameState import GameState
+from src.backend.player import Player
+from src.backend.replay import HEADER, InvalidReplayError, MOVE_INVALID, ReplayReader, ReplayWriter
+
+
+@pytest.fixture(autouse=True)
+def quiet_log():
+    configure(LEVELS["error"], None)
+
+
+def new_game() -> GameState:
+    return GameState(
+        16,
+        Player(PLAYER_1, 16, initial_position=(4, 8)),
+        Player(PLAYER_2, 16, initial_position=(10, 6)),
+    )
+
+
+def write_replay(path: str, moves: list[tuple]) -> GameState:
+    game = new_game()
+    with ReplayWriter(path, game, ("bot-1", "bót-2")) as writer:
+        for move_1, move_2 in moves:
+            writer.record(move_1, move_2, game.tick(move_1, move_2))
+    return game
+
+
+@pytest.mark.parametrize("content", [b"", b"HTR", b"not a replay file at all, long enough"])
+def test_invalid_files_raise(tmp_path, content: bytes):
+    path = tmp_path / "game.htr"
+    path.write_bytes(content)
+    with pytest.raises(InvalidReplayError):
+        ReplayReader(str(path))
+
+
+def test_cut_headers_raise(tmp_path):
+    path = str(tmp_path / "game.htr")
+    write_replay(path, [])
+    with open(path, "rb") as file:
+        header = file.read()
+
+    for length in range(len(header)):
+        with open(path, "wb") as file:
+            file.write(header[:length])
+        with pytest.raises(InvalidReplayError):
+            ReplayReader(path)
+
+
+def test_image_that_is_not_utf8_raises(tmp_path):
+    path = str(tmp_path / "game.htr")
+    write_replay(path, [])
+    with open(path, "r+b") as file:
+        file.seek(HEADER.size + 2)
+        file.write(b"\xff")
+    with pytest.raises(InvalidReplayError):
+        ReplayReader(path)
+
+
+def test_invalid_moves_are_replayed(tmp_path):
+    path = str(tmp_path / "game.htr")
+    moves = [(MOVE_RIGHT, MOVE_LEFT), (-1, 300), (MOVE_DOWN, MOVE_DOWN), (7, 0), (MOVE_DOWN, 1.0)]
+    game = write_replay(path, moves)
+
+    with ReplayReader(path) as reader:
+        assert reader.bot_images == ("bot-1", "bót-2")
+        assert [tick[:2] for tick in reader.ticks()] == [
+            (MOVE_RIGHT, MOVE_LEFT), (MOVE_INVALID, MOVE_INVALID), (MOVE_DOWN, MOVE_DOWN), (7, 0), (MOVE_DOWN, 1),
+        ]
+        assert reader.matches(game)
@@ -0,0 +1,55 @@
+import sqlite3
+
+from src.backend.consts import PLAYER_1, PLAYER_2
+from src.backend.results_store import ResultsStore
+
+
+def result(match_id: str | None, winner: int | None, ticks: int = 10) -> dict:
+    return {
+        "id": match_id, "bot_1": "a", "bot_2": "b", "winner": winner,
+        "outcome": None if winner else "players_collided", "ticks": ticks,
+    }
+
+
+def test_duplicate_ids_are_ignored(tmp_path):
+    path = str(tmp_path / "results.db")
+    with ResultsStore(path, batch_size=2) as store:
+        store.add_many([result("m1", PLAYER_1), result("m2", PLAYER_2, 20), result("m1", PLAYER_1)])
+        store.flush()
+        # Another run stores the same match again, e.g. after resuming
+        store.add(result("m2", PLAYER_2, 20))
+        store.flush()
+
+        assert len(store.matches("a")) == 2
+        pairing = store.pairing("a", "b")
+        assert (pairing["games"], pairing["wins"], pairing["draws"], pairing["losses"]) == (2, 1, 0, 1)
+        assert pairing["mean_ticks"] == 15
+
+    with ResultsStore(path) as store:
+        store.add(result("m1", PLAYER_1))
+        store.flush()
+        assert store.pairing("a", "b")["games"] == 2
+
+
+def test_results_without_id_are_all_stored(tmp_path):
+    with ResultsStore(str(tmp_path / "results.db")) as store:
+        store.add_many([result(None, PLAYER_1), result(None, PLAYER_1), result(None, None)])
+        store.flush()
+        assert store.pairing("a", "b")["games"] == 3
+        assert store.pairing("a", "b")["draws"] == 1
+        assert store.pairing("b", "a")["losses"] == 2
+
+
+def test_old_databases_get_the_match_key(tmp_path):
+    path = str(tmp_path / "results.db")
+    with ResultsStore(path) as store:
+        store.add(result(None, PLAYER_1))
+    connection = sqlite3.connect(path)
+    connection.execute("DROP INDEX matches_key")
+    connection.execute("ALTER TABLE matches DROP COLUMN match_key")
+    connection.close()
+
+    with ResultsStore(path) as store:
+        store.add_many([result("m1", PLAYER_1), result("m1", PLAYER_1)])
+        store.flush()
+        assert store.pairing("a", "b")["games"] == 2
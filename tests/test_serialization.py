@@ -0,0 +1,31 @@
+import json
+from random import Random
+
+import pytest
+
+from src.backend.consts import PLAYER_1, PLAYER_2
+from src.backend.events import configure, LEVELS
+from src.backend.GameState import GameState
+from src.backend.GridGameState import GridGameState
+from src.backend.serialization import StateEncoder
+
+
+@pytest.fixture(autouse=True)
+def quiet_log():
+    configure(LEVELS["error"], None)
+
+
+@pytest.mark.parametrize("engine", [GameState, GridGameState])
+@pytest.mark.parametrize("every", [1, 3])
+def test_encoder_matches_json_dumps(engine, every):
+    # Encoding only every few ticks makes the encoder miss changes and encode the whole board again
+    for seed in range(10):
+        rng = Random(seed)
+        game = engine(16, rng=rng)
+        encoder = StateEncoder(game)
+        while not game.game_over:
+            if game.tick_count % every == 0:
+                for number in (PLAYER_1, PLAYER_2):
+                    assert encoder.encode_for_player(number) == json.dumps(game.serialize_for_player(number))
+            game.tick(rng.randint(0, 4), rng.randint(0, 4))
+        assert encoder.encode_for_player(PLAYER_1) == json.dumps(game.serialize_for_player(PLAYER_1))